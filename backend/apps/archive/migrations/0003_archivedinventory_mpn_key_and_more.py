@@ -0,0 +1,27 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:56
+
+import apps.common.mpn
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archive', '0002_rename_descreption_archivedinventory_description_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedinventory',
+            name='mpn_key',
+            field=apps.common.mpn.MpnKeyField(blank=True, default='', max_length=255),
+        ),
+        migrations.RunSQL(
+            "UPDATE archive_archivedinventory SET mpn_key = upper(regexp_replace(mpn, '[^A-Za-z0-9]', '', 'g'))",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='archivedinventory',
+            index=models.Index(fields=['mpn_key'], name='idx_archive_mpn_key', opclasses=['text_pattern_ops']),
+        ),
+    ]
@@ -1,7 +1,9 @@
 from django.db import models
+from apps.common.mpn import MpnKeyField
 
 class ArchivedInventory(models.Model):
     mpn = models.CharField(max_length=255)  
+    mpn_key = MpnKeyField()  # normalized mpn for prefix / typeahead search
     description = models.TextField(blank=True, null=True)
     manufacturer = models.CharField(max_length=255, blank=True, null=True)
     quantity = models.IntegerField()
@@ -13,3 +15,8 @@ class ArchivedInventory(models.Model):
     archived_at = models.DateTimeField(auto_now_add=True)
     url = models.URLField(blank=True, null=True)
     notes = models.TextField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['mpn_key'], opclasses=['text_pattern_ops'], name='idx_archive_mpn_key'),
+        ]
@@ -1,8 +1,10 @@
+from django.db import transaction
 from django.shortcuts import render
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import ArchivedInventory
 from ..inventory.models import InventoryItem
+from ..inventory.stock_summary import refresh_stock_summary
 from .serializers import ArchivedInventorySerializer
 from rest_framework import viewsets
 
@@ -33,8 +35,11 @@ class ArchivedInventoryViewSet(viewsets.ModelViewSet):
                 notes=item.notes,
             ) for item in items
         ]
-        ArchivedInventory.objects.bulk_create(archived_items)
-        items.delete()
+        mpn_keys = {item.mpn_key for item in items}
+        with transaction.atomic():
+            ArchivedInventory.objects.bulk_create(archived_items)
+            items.delete()
+            refresh_stock_summary(mpn_keys)
         return Response({'success': 'Items archived successfully'})
     
     @action(detail=False, methods=['POST'])
@@ -58,6 +63,8 @@ class ArchivedInventoryViewSet(viewsets.ModelViewSet):
                 cost=item.cost
             ) for item in items
         ]
-        InventoryItem.objects.bulk_create(restored_items)
-        items.delete()
+        with transaction.atomic():
+            InventoryItem.objects.bulk_create(restored_items)
+            items.delete()
+            refresh_stock_summary(item.mpn_key for item in restored_items)
         return Response({'success': 'Items restored successfully'})
@@ -0,0 +1,139 @@
+import json
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+from apps.common.mpn import MpnKeyField, normalize_mpn
+
+TEXT_LOOKUPS = {
+    "contains": ("icontains", False),
+    "notContains": ("icontains", True),
+    "equals": ("iexact", False),
+    "notEqual": ("iexact", True),
+    "startsWith": ("istartswith", False),
+    "endsWith": ("iendswith", False),
+}
+
+NUMBER_LOOKUPS = {
+    "equals": ("exact", False),
+    "notEqual": ("exact", True),
+    "lessThan": ("lt", False),
+    "lessThanOrEqual": ("lte", False),
+    "greaterThan": ("gt", False),
+    "greaterThanOrEqual": ("gte", False),
+}
+
+
+def _json_param(request, name, default):
+    raw = request.query_params.get(name)
+    if not raw:
+        return default
+    try:
+        return json.loads(raw)
+    except ValueError:
+        raise ValidationError({name: "Must be JSON"})
+
+
+def _blank(field, filter_type):
+    blank = Q(**{f"{field}__isnull": True})
+    if filter_type == "text":
+        blank |= Q(**{field: ""})
+    return blank
+
+
+def condition_q(field, condition):
+    """Q for one AG Grid column filter condition (text / number / date / set)."""
+    filter_type = condition.get("filterType", "text")
+    kind = condition.get("type")
+
+    if filter_type == "set":
+        values = condition.get("values") or []
+        q = Q(**{f"{field}__in": [v for v in values if v is not None]})
+        if None in values:
+            q |= Q(**{f"{field}__isnull": True})
+        return q
+    if kind == "blank":
+        return _blank(field, filter_type)
+    if kind == "notBlank":
+        return ~_blank(field, filter_type)
+
+    if filter_type == "date":
+        value, value_to = condition.get("dateFrom"), condition.get("dateTo")
+    else:
+        value, value_to = condition.get("filter"), condition.get("filterTo")
+
+    if kind == "inRange":
+        return Q(**{f"{field}__gte": value, f"{field}__lte": value_to})
+    lookups = TEXT_LOOKUPS if filter_type == "text" else NUMBER_LOOKUPS
+    if kind not in lookups:
+        raise ValidationError({"filterModel": f"Unsupported {filter_type} filter '{kind}' on '{field}'"})
+    lookup, negate = lookups[kind]
+    if filter_type == "date" and lookup == "exact":
+        lookup = "date"
+    q = Q(**{f"{field}__{lookup}": value})
+    return ~q if negate else q
+
+
+def column_filter_q(field, model):
+    """Q for a column's filter model, including combined `conditions` with AND / OR."""
+    conditions = model.get("conditions")
+    if not conditions:
+        return condition_q(field, model)
+    q = condition_q(field, conditions[0])
+    for condition in conditions[1:]:
+        if model.get("operator", "AND").upper() == "OR":
+            q |= condition_q(field, condition)
+        else:
+            q &= condition_q(field, condition)
+    return q
+
+
+class GridFilterBackend(BaseFilterBackend):
+    """
+    Server-side filtering / sorting in the shape AG Grid's server-side row model sends.
+
+    Query params:
+      filterModel  JSON {colId: {filterType, type, filter, filterTo, ...}}
+      sortModel    JSON [{colId, sort: "asc" | "desc"}]
+      quickFilter  space separated terms; every term must match one of grid_quick_search_fields
+
+    The view declares grid_fields (columns that may be filtered / sorted) and
+    grid_quick_search_fields. MpnKeyField columns match quick-search terms by
+    normalized prefix, so they stay on the mpn_key index.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        fields = set(getattr(view, "grid_fields", ()))
+
+        filter_model = _json_param(request, "filterModel", {})
+        if not isinstance(filter_model, dict):
+            raise ValidationError({"filterModel": "Must be an object"})
+        for field, model in filter_model.items():
+            if field not in fields:
+                raise ValidationError({"filterModel": f"Cannot filter on '{field}'"})
+            queryset = queryset.filter(column_filter_q(field, model))
+
+        terms = request.query_params.get("quickFilter", "").split()
+        search_fields = getattr(view, "grid_quick_search_fields", ())
+        for term in terms:
+            q = Q()
+            for field in search_fields:
+                if isinstance(queryset.model._meta.get_field(field), MpnKeyField):
+                    key = normalize_mpn(term)
+                    if key:
+                        q |= Q(**{f"{field}__startswith": key})
+                else:
+                    q |= Q(**{f"{field}__icontains": term})
+            queryset = queryset.filter(q)
+
+        sort_model = _json_param(request, "sortModel", [])
+        if not isinstance(sort_model, list):
+            raise ValidationError({"sortModel": "Must be a list"})
+        ordering = []
+        for sort in sort_model:
+            field = sort.get("colId")
+            if field not in fields:
+                raise ValidationError({"sortModel": f"Cannot sort on '{field}'"})
+            ordering.append(f"-{field}" if sort.get("sort") == "desc" else field)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return queryset
@@ -0,0 +1,42 @@
+import re
+from django.db import models
+
+MPN_STRIP_RE = re.compile(r"[^A-Za-z0-9]")
+
+# SQL twin of normalize_mpn() for set-based backfills / bulk writes
+MPN_KEY_SQL = "upper(regexp_replace({column}, '[^A-Za-z0-9]', '', 'g'))"
+
+
+def normalize_mpn(mpn):
+    """'abc-123 /x' -> 'ABC123X': case, dashes, spaces and punctuation are ignored."""
+    if not mpn:
+        return ""
+    return MPN_STRIP_RE.sub("", str(mpn)).upper()
+
+
+class MpnKeyField(models.CharField):
+    """
+    Normalized copy of the model's MPN field (see normalize_mpn).
+    Filled in by save() and bulk_create() through pre_save; QuerySet.update()
+    and raw SQL writes have to set it themselves.
+    """
+
+    def __init__(self, *args, source="mpn", **kwargs):
+        self.source = source
+        kwargs.setdefault("max_length", 255)
+        kwargs.setdefault("blank", True)
+        kwargs.setdefault("default", "")
+        kwargs["editable"] = False
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        del kwargs["editable"]
+        if self.source != "mpn":
+            kwargs["source"] = self.source
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        value = normalize_mpn(getattr(model_instance, self.source))
+        setattr(model_instance, self.attname, value)
+        return value
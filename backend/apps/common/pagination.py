@@ -0,0 +1,178 @@
+import base64
+import json
+from django.db import connection
+from django.db.models import F, Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+# below this many estimated rows an exact COUNT(*) is cheap enough
+EXACT_COUNT_THRESHOLD = 10000
+
+
+def estimate_count(queryset):
+    """
+    Approximate row count of a queryset without scanning it.
+    Unfiltered: pg_class.reltuples. Filtered: the planner's row estimate.
+    Small results (< EXACT_COUNT_THRESHOLD) are counted exactly.
+    Returns (count, is_estimate).
+    """
+    query = queryset.query
+    with connection.cursor() as cursor:
+        if not query.where:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+            estimate = row[0] if row else -1
+        else:
+            sql, params = queryset.order_by().values("pk").query.sql_with_params()
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            estimate = int(plan[0]["Plan"]["Plan Rows"])
+
+    # reltuples is -1 for tables that were never analyzed
+    if estimate < EXACT_COUNT_THRESHOLD:
+        return queryset.count(), False
+    return estimate, True
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset ("seek") pagination over the queryset's ordering, with `id` as the tie breaker.
+    Opt-in: without any of the paging params the view returns the plain list.
+
+    Query params:
+      page_size   rows per page (default 100, max 1000)
+      cursor      opaque token from the previous page's next_cursor (keyset mode)
+      startRow / endRow
+                  block bounds as sent by AG Grid's server-side row model (offset mode)
+
+    Response: {results, next_cursor, last_row, count, count_is_estimate}.
+    last_row is only set once the end of the data was reached (AG Grid's rowCount).
+    """
+    page_size = 100
+    max_page_size = 1000
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+
+    def _page_size(self, request):
+        start, end = request.query_params.get("startRow"), request.query_params.get("endRow")
+        try:
+            if start is not None and end is not None:
+                size = int(end) - int(start)
+            else:
+                size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            raise ValidationError({"page_size": "Must be an integer"})
+        return min(max(size, 1), self.max_page_size)
+
+    def _ordering(self, queryset):
+        """[(field, descending)] from the queryset's order_by(), always ending with id."""
+        ordering = []
+        for term in queryset.query.order_by or queryset.model._meta.ordering or ():
+            if not isinstance(term, str) or term == "?":
+                continue
+            descending = term.startswith("-")
+            field = term.lstrip("-")
+            if field == "pk":
+                field = "id"
+            if field not in [f for f, _ in ordering]:
+                ordering.append((field, descending))
+            if field == "id":
+                break
+        if "id" not in [f for f, _ in ordering]:
+            ordering.append(("id", False))
+        return ordering
+
+    @staticmethod
+    def _order_expression(field, descending):
+        # same NULL placement as Postgres' defaults, so plain btree indexes still apply
+        return F(field).desc(nulls_first=True) if descending else F(field).asc(nulls_last=True)
+
+    @staticmethod
+    def _after(field, descending, value):
+        """Rows strictly after `value` in this column's ordering."""
+        if value is None:
+            # NULLs sort last ascending / first descending
+            return Q(pk__in=[]) if not descending else Q(**{f"{field}__isnull": False})
+        if descending:
+            return Q(**{f"{field}__lt": value})
+        return Q(**{f"{field}__gt": value}) | Q(**{f"{field}__isnull": True})
+
+    @staticmethod
+    def _equal(field, value):
+        return Q(**{f"{field}__isnull": True}) if value is None else Q(**{field: value})
+
+    def _seek(self, ordering, values):
+        """(a > x) OR (a = x AND b > y) OR ... for the cursor's values."""
+        condition = Q(pk__in=[])
+        equal = Q()
+        for (field, descending), value in zip(ordering, values):
+            condition |= equal & self._after(field, descending, value)
+            equal &= self._equal(field, value)
+        return condition
+
+    def encode_cursor(self, ordering, row):
+        values = [row[field] for field, _ in ordering]
+        payload = json.dumps({"o": [f"-{f}" if d else f for f, d in ordering], "v": values}, default=str)
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, token, ordering):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+            terms, values = payload["o"], payload["v"]
+        except (ValueError, KeyError, TypeError):
+            raise ValidationError({"cursor": "Invalid cursor"})
+        if terms != [f"-{f}" if d else f for f, d in ordering] or len(values) != len(ordering):
+            raise ValidationError({"cursor": "Cursor does not match the current sort order"})
+        return values
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if not any(p in params for p in (self.page_size_query_param, self.cursor_query_param, "startRow")):
+            return None
+
+        size = self._page_size(request)
+        ordering = self._ordering(queryset)
+        queryset = queryset.order_by(*(self._order_expression(f, d) for f, d in ordering))
+        self.request = request
+        self.count, self.count_is_estimate = estimate_count(queryset)
+
+        token = params.get(self.cursor_query_param)
+        if token:
+            queryset = queryset.filter(self._seek(ordering, self.decode_cursor(token, ordering)))
+            self.offset = None
+        else:
+            try:
+                self.offset = max(int(params.get("startRow", 0)), 0)
+            except ValueError:
+                raise ValidationError({"startRow": "Must be an integer"})
+
+        start = self.offset or 0
+        # one extra row tells whether there is a next page, without a COUNT
+        rows = list(queryset[start:start + size + 1])
+        has_next = len(rows) > size
+        rows = rows[:size]
+
+        self.last_row = None
+        if not has_next and self.offset is not None:
+            self.last_row = self.offset + len(rows)
+        self.next_cursor = None
+        if has_next and rows:
+            keys = [f for f, _ in ordering]
+            last = queryset.filter(pk=rows[-1].pk).values(*keys).first()
+            self.next_cursor = self.encode_cursor(ordering, last)
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            "results": data,
+            "next_cursor": self.next_cursor,
+            "last_row": self.last_row,
+            "count": self.count,
+            "count_is_estimate": self.count_is_estimate,
+        })
@@ -0,0 +1,31 @@
+from urllib.parse import parse_qs
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+
+
+@database_sync_to_async
+def _user_for_token(token):
+    # imported here: asgi.py loads the routing before the app registry is ready
+    from knox.auth import TokenAuthentication
+    from rest_framework.exceptions import AuthenticationFailed
+    try:
+        user, _ = TokenAuthentication().authenticate_credentials(token.encode())
+        return user
+    except AuthenticationFailed:
+        return None
+
+
+class KnoxTokenAuthMiddleware(BaseMiddleware):
+    """
+    Websocket auth with the same knox token the REST API uses: ws/...?token=<token>.
+    Browsers can't set headers on a websocket, hence the query string.
+    Falls back to the scope's session user (AuthMiddlewareStack) when no valid token is sent.
+    """
+
+    async def __call__(self, scope, receive, send):
+        token = parse_qs(scope.get("query_string", b"").decode()).get("token", [None])[0]
+        if token:
+            user = await _user_for_token(token)
+            if user is not None:
+                scope = dict(scope, user=user)
+        return await super().__call__(scope, receive, send)
@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class CrmAccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.crm_accounts'
\ No newline at end of file
+    name = 'apps.crm_accounts'
+
+    def ready(self):
+        from . import signals  # noqa: F401 - connects the routing index and dedup cache invalidation
@@ -0,0 +1,205 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from .models import CRMInteraction
+
+logger = logging.getLogger('myapp')
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (double hashing on one blake2b digest)."""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def estimated_error_rate(self):
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
+
+
+class MessageIdDedup:
+    """
+    Duplicate check for CRMInteraction.message_id in front of its unique index.
+
+    - an LRU of ids recently seen in the table answers replays without a query;
+    - a Bloom filter of every message_id answers "definitely new" without a query;
+    - only Bloom hits (a real duplicate or a false positive) go to the database.
+
+    The filter is built with one streaming query on first use and rebuilt when it fills
+    up or is older than CRM_DEDUP_REBUILD_SECONDS, which drops deleted ids and adds ids
+    inserted by other processes. Those can be missed in between, so a Bloom negative
+    only means "not inserted by this process": it is trusted where an insert guarded by
+    the unique index (IntegrityError) follows, and every other path (precheck, merging
+    into an existing interaction) asks with use_bloom=False.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._built_at = None
+        self._building = None  # ids added while a rebuild runs
+        self._recent = OrderedDict()
+        self.lookups = 0
+        self.lru_hits = 0
+        self.bloom_negatives = 0
+        self.db_checks = 0
+        self.false_positives = 0
+        self.conflicts = 0
+        self.rebuilds = 0
+
+    def rebuild(self):
+        with self._lock:
+            self._building = []
+        total = CRMInteraction.objects.filter(message_id__isnull=False).count()
+        bloom = BloomFilter(max(total * 2, 10000), settings.CRM_DEDUP_BLOOM_ERROR_RATE)
+        ids = CRMInteraction.objects.filter(message_id__isnull=False).values_list('message_id', flat=True)
+        for message_id in ids.iterator(chunk_size=5000):
+            bloom.add(message_id)
+        with self._lock:
+            for message_id in self._building:
+                bloom.add(message_id)
+            self._building = None
+            self._bloom = bloom
+            self._built_at = time.monotonic()
+            self.rebuilds += 1
+        logger.debug(f"Message-id Bloom filter rebuilt: {bloom.count} ids, {bloom.size} bits, {bloom.hashes} hashes")
+        return bloom
+
+    def _current_bloom(self):
+        with self._lock:
+            bloom, built_at = self._bloom, self._built_at
+            building = self._building is not None
+        if bloom is None and not building:
+            return self.rebuild()
+        if not building and bloom is not None and (
+            bloom.count >= bloom.capacity
+            or time.monotonic() - built_at > settings.CRM_DEDUP_REBUILD_SECONDS
+        ):
+            return self.rebuild()
+        return bloom
+
+    def _remember(self, message_id):
+        # caller holds the lock
+        self._recent[message_id] = True
+        self._recent.move_to_end(message_id)
+        while len(self._recent) > settings.CRM_DEDUP_LRU_SIZE:
+            self._recent.popitem(last=False)
+
+    def existing(self, message_ids, use_bloom=True):
+        """
+        The subset of message_ids already stored; at most one IN query for the Bloom hits.
+        use_bloom=False checks every id not in the LRU against the table: for callers that
+        do not end in an insert the unique index can reject, and after such a conflict.
+        """
+        message_ids = {m for m in message_ids if m}
+        bloom = self._current_bloom() if use_bloom else None
+        found, maybe = set(), set()
+        with self._lock:
+            self.lookups += len(message_ids)
+            for message_id in message_ids:
+                if message_id in self._recent:
+                    self._recent.move_to_end(message_id)
+                    self.lru_hits += 1
+                    found.add(message_id)
+                elif bloom is not None and message_id not in bloom:
+                    self.bloom_negatives += 1
+                else:
+                    maybe.add(message_id)
+        if maybe:
+            stored = set(CRMInteraction.objects.filter(message_id__in=maybe).values_list('message_id', flat=True))
+            with self._lock:
+                self.db_checks += len(maybe)
+                self.false_positives += len(maybe - stored)
+                for message_id in stored:
+                    self._remember(message_id)
+            found |= stored
+        return found
+
+    def is_duplicate(self, message_id, use_bloom=True):
+        return message_id in self.existing([message_id], use_bloom=use_bloom)
+
+    def add(self, message_ids):
+        """Record freshly inserted ids (call after the insert committed)."""
+        with self._lock:
+            for message_id in message_ids:
+                if not message_id:
+                    continue
+                if self._bloom is not None:
+                    self._bloom.add(message_id)
+                if self._building is not None:
+                    self._building.append(message_id)
+                self._remember(message_id)
+
+    def record_conflict(self, message_ids=()):
+        """An insert hit the unique index: the ids exist, this process just had not seen them."""
+        with self._lock:
+            self.conflicts += 1
+        self.add(message_ids)
+
+    def discard(self, message_id):
+        with self._lock:
+            self._recent.pop(message_id, None)
+
+    def stats(self):
+        with self._lock:
+            bloom = self._bloom
+            answered = self.lru_hits + self.bloom_negatives
+            return {
+                "lookups": self.lookups,
+                "lru_hits": self.lru_hits,
+                "bloom_negatives": self.bloom_negatives,
+                "db_checks": self.db_checks,
+                "false_positives": self.false_positives,
+                "conflicts": self.conflicts,
+                "rebuilds": self.rebuilds,
+                # share of lookups answered without a query
+                "hit_rate": round(answered / self.lookups, 3) if self.lookups else None,
+                "lru_size": len(self._recent),
+                "bloom_ids": bloom.count if bloom else None,
+                "bloom_capacity": bloom.capacity if bloom else None,
+                "bloom_estimated_error_rate": round(bloom.estimated_error_rate(), 5) if bloom else None,
+            }
+
+
+message_dedup = MessageIdDedup()
+
+
+def create_interaction(**fields):
+    """
+    Insert a CRMInteraction and let the unique message_id index catch duplicates
+    (no check-then-insert race). Returns the interaction, or None if the message_id exists.
+    """
+    message_id = fields.get('message_id')
+    try:
+        with transaction.atomic():
+            interaction = CRMInteraction.objects.create(**fields)
+    except IntegrityError:
+        if not message_id or not CRMInteraction.objects.filter(message_id=message_id).exists():
+            raise
+        message_dedup.record_conflict([message_id])
+        return None
+    transaction.on_commit(lambda: message_dedup.add([message_id]))
+    return interaction
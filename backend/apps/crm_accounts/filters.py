@@ -0,0 +1,23 @@
+import django_filters
+from .models import CRMAccount
+
+
+class CharInFilter(django_filters.BaseInFilter, django_filters.CharFilter):
+    pass
+
+
+class NumberInFilter(django_filters.BaseInFilter, django_filters.NumberFilter):
+    pass
+
+
+class CRMAccountFilter(django_filters.FilterSet):
+    # ?status=active,slow  /  ?assigned_to=3,7  /  ?unassigned=true
+    status = CharInFilter(field_name="status", lookup_expr="in")
+    assigned_to = NumberInFilter(field_name="assigned_to", lookup_expr="in")
+    unassigned = django_filters.BooleanFilter(field_name="assigned_to", lookup_expr="isnull")
+
+    class Meta:
+        model = CRMAccount
+        fields = {
+            "company": ["exact"],
+        }
@@ -0,0 +1,277 @@
+import asyncio
+import base64
+import html
+import logging
+import httpx
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.utils import timezone
+from apps.email_connections import google_api
+from apps.email_connections.google_api import GMAIL_API
+from apps.email_connections.models import EmailConnection
+from apps.email_connections.utils import refresh_google_token
+from apps.jobs.models import Job
+from apps.jobs.utils import enqueue_job
+from apps.usersettings.models import UserSettings
+from .models import GmailThreadCache
+
+logger = logging.getLogger('myapp')
+
+TEXT_TYPES = ("text/html", "text/plain")
+PREFETCH_JOB = "crm_gmail_prefetch"
+PREFETCH_HANDLER = "apps.crm_accounts.gmail.prefetch_gmail_threads"
+
+
+class GmailAPIError(Exception):
+    def __init__(self, status_code, details):
+        super().__init__(f"Gmail API error {status_code}")
+        self.status_code = status_code
+        self.details = details
+
+
+class GmailTokenError(Exception):
+    pass
+
+
+def _get_thread(thread_id, access_token, **params):
+    name = "gmail.threads.get" if params.get("format") != "minimal" else "gmail.threads.check"
+    response = google_api.request("GET", f"{GMAIL_API}/threads/{thread_id}", name, access_token=access_token, params=params)
+    if response.status_code != 200:
+        try:
+            details = response.json()
+        except ValueError:
+            details = response.text
+        raise GmailAPIError(response.status_code, details)
+    return response.json()
+
+
+def _decode_body(data):
+    """Decode base64url safely (add padding) and unescape HTML."""
+    if not data:
+        return ""
+    try:
+        pad = len(data) % 4
+        if pad:
+            data += "=" * (4 - pad)
+        decoded_bytes = base64.urlsafe_b64decode(data.encode("utf-8"))
+        return html.unescape(decoded_bytes.decode("utf-8", errors="replace"))
+    except Exception:
+        return "[Body decode error]"
+
+
+def _pending_attachments(payload, message_id, root=True):
+    """
+    (message_id, attachmentId) of the text parts extract_body_from_payload reads whose
+    content sits behind attachmentId (Gmail stores big bodies that way).
+    """
+    pending = []
+    mt = (payload.get("mimeType") or "").lower()
+    body = payload.get("body", {}) or {}
+    if body.get("attachmentId") and not body.get("data") and (mt in TEXT_TYPES or (root and mt.startswith("text/"))):
+        pending.append((message_id, body["attachmentId"]))
+    for part in payload.get("parts", []) or []:
+        pending += _pending_attachments(part, message_id, root=False)
+    return pending
+
+
+async def _fetch_attachments(pending, access_token):
+    """Fetch attachment bodies concurrently over one pooled client: {(message_id, attachment_id): data}."""
+    limits = httpx.Limits(max_connections=settings.GMAIL_ATTACHMENT_CONCURRENCY)
+    headers = {"Authorization": f"Bearer {access_token}"}
+    async with httpx.AsyncClient(headers=headers, limits=limits, timeout=settings.GOOGLE_API_TIMEOUT) as client:
+        async def fetch(message_id, attachment_id):
+            try:
+                response = await google_api.arequest(
+                    client, "GET", f"{GMAIL_API}/messages/{message_id}/attachments/{attachment_id}",
+                    "gmail.attachments.get",
+                )
+                if response.status_code == 200:
+                    return response.json().get("data")
+                logger.warning(f"Gmail attachment {attachment_id} of {message_id}: HTTP {response.status_code}")
+            except httpx.HTTPError as e:
+                logger.warning(f"Gmail attachment {attachment_id} of {message_id} failed: {e}")
+            return None
+
+        bodies = await asyncio.gather(*(fetch(m, a) for m, a in pending))
+    return {key: data for key, data in zip(pending, bodies) if data}
+
+
+def _get_part_text(part, message_id, attachments):
+    """
+    Returns (text, mimeType) for text parts.
+    - If body.data exists -> decode and return.
+    - If body.attachmentId was fetched (text/* only) -> decode it.
+    - Otherwise -> (None, mimeType)
+    """
+    mt = (part.get("mimeType") or "").lower()
+    body = part.get("body", {}) or {}
+
+    raw = body.get("data")
+    if raw:
+        return _decode_body(raw), mt
+
+    attachment_id = body.get("attachmentId")
+    if attachment_id and mt.startswith("text/"):
+        data = attachments.get((message_id, attachment_id))
+        if data:
+            return _decode_body(data), mt
+
+    return None, mt
+
+
+def extract_body_from_payload(payload, message_id, attachments):
+    """
+    Recursively search for body; prefer text/html, then text/plain.
+    Bodies stored behind attachmentId come from `attachments` (fetched beforehand).
+    Returns a single string.
+    """
+    html_candidates = []
+    text_candidates = []
+
+    data, mt = _get_part_text(payload, message_id, attachments)
+
+    if data:
+        if mt == "text/html":
+            return data
+        elif mt == "text/plain":
+            text_candidates.append(data)
+
+    for part in payload.get("parts", []) or []:
+        mt = (part.get("mimeType") or "").lower()
+
+        # dive into multipart/*
+        if mt.startswith("multipart/"):
+            inner = extract_body_from_payload(part, message_id, attachments)
+            if inner:
+                # we don't guess by tags; we just keep order and prefer html later
+                # keep as text candidate unless explicit html was returned
+                if "<" in inner and ">" in inner:
+                    html_candidates.append(inner)
+                else:
+                    text_candidates.append(inner)
+            continue
+
+        if mt in TEXT_TYPES:
+            data, _ = _get_part_text(part, message_id, attachments)
+            if data:
+                if mt == "text/html":
+                    html_candidates.append(data)
+                else:
+                    text_candidates.append(data)
+
+    # 3) preference
+    return (html_candidates[0] if html_candidates else
+            (text_candidates[0] if text_candidates else "[No body found]"))
+
+
+def parse_thread(thread_data, access_token):
+    """
+    Messages of a format=full thread as the drawer shows them. Every attachment-backed
+    body of the thread is fetched in one concurrent batch, so a long thread costs
+    about one round trip instead of one per part.
+    """
+    raw_messages = thread_data.get('messages', [])
+    pending = []
+    for msg in raw_messages:
+        pending += _pending_attachments(msg.get('payload', {}), msg.get('id'))
+    attachments = async_to_sync(_fetch_attachments)(pending, access_token) if pending else {}
+
+    messages = []
+    for msg in raw_messages:
+        headers_map = {header['name']: header['value'] for header in msg.get('payload', {}).get('headers', [])}
+        messages.append({
+            "message_id": msg.get('id'),
+            "real_message_id": headers_map.get('Message-ID', ''),
+            "from": headers_map.get('From', ''),
+            "to": headers_map.get('To', ''),
+            "subject": headers_map.get('Subject', ''),
+            "date": headers_map.get('Date', ''),
+            "body": extract_body_from_payload(msg.get('payload', {}), msg.get('id'), attachments),
+        })
+    return messages
+
+
+def get_thread(conn, thread_id):
+    """
+    Parsed thread for the connection's mailbox, through the GmailThreadCache:
+    - checked less than GMAIL_THREAD_CACHE_TTL seconds ago: served without any API call;
+    - otherwise revalidated with a format=minimal request: an unchanged historyId
+      keeps the cached messages, a new one triggers a full fetch.
+    Returns (entry, served_from_cache).
+    """
+    now = timezone.now()
+    entry = GmailThreadCache.objects.filter(connection=conn, thread_id=thread_id).first()
+    if entry and (now - entry.checked_at).total_seconds() < settings.GMAIL_THREAD_CACHE_TTL:
+        return entry, True
+
+    try:
+        access_token = refresh_google_token(conn)
+    except Exception as e:
+        raise GmailTokenError(str(e)) from e
+    if entry:
+        minimal = _get_thread(thread_id, access_token, format="minimal", fields="id,historyId")
+        if minimal.get('historyId') == entry.history_id:
+            entry.checked_at = now
+            entry.save(update_fields=['checked_at'])
+            return entry, True
+
+    thread_data = _get_thread(thread_id, access_token, format="full")
+    entry, _ = GmailThreadCache.objects.update_or_create(
+        connection=conn,
+        thread_id=thread_id,
+        defaults={
+            "history_id": thread_data.get('historyId', ''),
+            "messages": parse_thread(thread_data, access_token),
+            "fetched_at": now,
+            "checked_at": now,
+        },
+    )
+    return entry, False
+
+
+def queue_thread_prefetch(conn, thread_ids, user=None):
+    """
+    Queue a background fetch of the threads that are not cached yet (the CRM drawer just opened).
+    At most one prefetch per connection waits in the queue: while one does (e.g. no worker is
+    running, or it is busy), reopening drawers queues nothing more.
+    """
+    pending = Job.objects.filter(kind=PREFETCH_JOB, status=Job.Status.QUEUED, params__connection_id=conn.id)
+    if pending.exists():
+        return None
+    thread_ids = list(dict.fromkeys(t for t in thread_ids if t))
+    cached = set(
+        GmailThreadCache.objects.filter(connection=conn, thread_id__in=thread_ids).values_list('thread_id', flat=True)
+    )
+    missing = [t for t in thread_ids if t not in cached]
+    if not missing:
+        return None
+    return enqueue_job(PREFETCH_JOB, PREFETCH_HANDLER, {"connection_id": conn.id, "thread_ids": missing}, user=user)
+
+
+def queue_user_thread_prefetch(user, thread_ids):
+    """queue_thread_prefetch on the user's CRM Gmail connection; never fails the calling request."""
+    try:
+        user_settings = UserSettings.objects.select_related('crm_email_connection').filter(user=user).first()
+        conn = user_settings.crm_email_connection if user_settings else None
+        if conn is None or conn.provider != 'google':
+            return None
+        return queue_thread_prefetch(conn, list(dict.fromkeys(thread_ids))[:settings.GMAIL_PREFETCH_THREADS], user=user)
+    except Exception as e:
+        logger.warning(f"Gmail thread prefetch not queued: {e}")
+        return None
+
+
+def prefetch_gmail_threads(job):
+    """Job handler: fill the thread cache for params.thread_ids (failures are logged, not retried)."""
+    conn = EmailConnection.objects.filter(pk=job.params["connection_id"]).first()
+    if conn is None:
+        return {"skipped": "connection was deleted"}
+    fetched, failed = 0, []
+    for thread_id in job.params["thread_ids"]:
+        try:
+            get_thread(conn, thread_id)
+            fetched += 1
+        except Exception as e:
+            logger.warning(f"Prefetch of Gmail thread {thread_id} failed: {e}")
+            failed.append(thread_id)
+    return {"fetched": fetched, "failed": failed}
@@ -0,0 +1,164 @@
+import logging
+from collections import Counter
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Greatest
+from django.db.models import F, Value
+from django.utils import timezone
+from .models import CRMAccount, CRMInteraction
+from .dedup import message_dedup
+from .routing import route_message, routing_index
+from .serializers import IngestEmailSerializer
+
+logger = logging.getLogger('myapp')
+
+INGEST_BATCH_MAX_MESSAGES = 1000
+
+
+def message_emails(data):
+    return {data['from_email'], data['watched_email'], *data['to_emails'], *data.get('cc_emails', [])}
+
+
+def route_messages(messages):
+    """[(index, data, account_id or None)] through the routing index; one query checks the ids still exist."""
+    for _ in range(2):
+        routes = [(index, data, route_message(message_emails(data), data['watched_email'])) for index, data in messages]
+        account_ids = {account_id for _, _, account_id in routes if account_id}
+        live = set(CRMAccount.objects.filter(id__in=account_ids).values_list('id', flat=True))
+        if live == account_ids:
+            break
+        # an account was deleted by another process since the index was built
+        routing_index.invalidate()
+    return [(index, data, account_id if account_id in live else None) for index, data, account_id in routes]
+
+
+def latest_thread_interactions(pairs):
+    """{(account_id, thread_id): latest CRMInteraction of that thread} for many pairs in one query."""
+    if not pairs:
+        return {}
+    interactions = (
+        CRMInteraction.objects
+        .filter(account_id__in={a for a, _ in pairs}, thread_id__in={t for _, t in pairs})
+        .order_by('account_id', 'thread_id', '-timestamp')
+        .distinct('account_id', 'thread_id')
+    )
+    return {(i.account_id, i.thread_id): i for i in interactions if (i.account_id, i.thread_id) in pairs}
+
+
+def merge_direction(current, direction):
+    return 'mixed' if current and current != direction else direction
+
+
+def _ingest(messages, user, use_bloom=True):
+    """One pass over validated messages: [(index, data)] -> {index: result}."""
+    results = {}
+    strategic = []
+    for index, data, account_id in route_messages(messages):
+        if account_id is None:
+            results[index] = {"status": "not_strategic"}
+        else:
+            strategic.append((index, data, account_id))
+
+    seen = message_dedup.existing({data['message_id'] for _, data, _ in strategic}, use_bloom=use_bloom)
+    threads = latest_thread_interactions({(a, d['thread_id']) for _, d, a in strategic if d.get('thread_id')})
+    if use_bloom:
+        # merging into an existing interaction inserts nothing the unique index could reject,
+        # so Bloom negatives of those messages (maybe stored by another worker) go to the table
+        merging = {d['message_id'] for _, d, a in strategic if (a, d.get('thread_id')) in threads} - seen
+        if merging:
+            seen |= message_dedup.existing(merging, use_bloom=False)
+
+    routed = []
+    for index, data, account_id in strategic:
+        if data['message_id'] in seen:
+            results[index] = {"status": "duplicate"}
+            continue
+        seen.add(data['message_id'])
+        routed.append((index, data, account_id))
+    created, updated, touched = [], {}, {}
+    # oldest first, so a thread's interaction is created by its first message and later ones merge into it
+    for index, data, account_id in sorted(routed, key=lambda r: r[1]['timestamp']):
+        thread_key = (account_id, data['thread_id']) if data.get('thread_id') else None
+        interaction = threads.get(thread_key)
+        if interaction is not None:
+            interaction.direction = merge_direction(interaction.direction, data['direction'])
+            if not interaction.timestamp or interaction.timestamp < data['timestamp']:
+                interaction.timestamp = data['timestamp']
+            if interaction.pk:
+                updated[interaction.pk] = interaction
+            results[index] = {"status": "updated_existing", "account_id": account_id, "interaction": interaction}
+        else:
+            interaction = CRMInteraction(
+                account_id=account_id,
+                type='email',
+                is_auto_generated=True,
+                message_id=data['message_id'],
+                thread_id=data.get('thread_id'),
+                direction=data['direction'],
+                title=data.get('subject', '')[:255],
+                summary="",
+                timestamp=data['timestamp'],
+                added_by=user,
+            )
+            created.append(interaction)
+            if thread_key:
+                threads[thread_key] = interaction
+            results[index] = {"status": "created", "account_id": account_id, "interaction": interaction}
+        if account_id not in touched or touched[account_id] < interaction.timestamp:
+            touched[account_id] = interaction.timestamp
+
+    now = timezone.now()
+    with transaction.atomic():
+        CRMInteraction.objects.bulk_create(created)
+        new_ids = [interaction.message_id for interaction in created]
+        transaction.on_commit(lambda: message_dedup.add(new_ids))
+        for interaction in updated.values():
+            interaction.updated_at = now
+        CRMInteraction.objects.bulk_update(updated.values(), ['direction', 'timestamp', 'updated_at'])
+        for account_id, last_interaction in touched.items():
+            # never move last_interaction backwards when backfilling old mail
+            CRMAccount.objects.filter(pk=account_id).update(
+                last_interaction=Greatest(F('last_interaction'), Value(last_interaction)),
+                status='active',
+                updated_at=now,
+            )
+
+    for result in results.values():
+        interaction = result.pop("interaction", None)
+        if interaction is not None:
+            result["interaction_id"] = interaction.id
+    return results
+
+
+def ingest_emails(payload, user=None):
+    """
+    Batch version of CRMInteractionViewSet.ingest_email for the mailbox watcher's backfills.
+    Accounts are resolved through the in-memory routing index, duplicates through the
+    message_id dedup cache (one IN query for the ids it can't rule out, one more for the
+    new-looking ids that merge into an existing thread) and open threads with one query;
+    interactions are written with bulk_create / bulk_update and each touched account
+    gets one last_interaction update.
+    Returns {results: [{index, status, account_id?, interaction_id?}], counts, errors}.
+    """
+    messages, errors, results = [], [], {}
+    for index, item in enumerate(payload):
+        serializer = IngestEmailSerializer(data=item)
+        if not serializer.is_valid():
+            errors.append({"index": index, "errors": serializer.errors})
+        elif not serializer.validated_data.get('matches_watched', True):
+            results[index] = {"status": "ignored_non_matching_mailbox"}
+        else:
+            messages.append((index, serializer.validated_data))
+
+    if messages:
+        try:
+            results.update(_ingest(messages, user))
+        except IntegrityError:
+            # another process inserted one of the message_ids; the retry checks them all against the table
+            logger.warning("Batch email ingest hit a message_id conflict, retrying once")
+            message_dedup.record_conflict()
+            results.update(_ingest(messages, user, use_bloom=False))
+
+    ordered = [{"index": index, **results[index]} for index in sorted(results)]
+    counts = Counter(result["status"] for result in ordered)
+    logger.debug(f"Batch email ingest: {dict(counts)}, {len(errors)} invalid")
+    return {"results": ordered, "counts": dict(counts), "errors": errors}
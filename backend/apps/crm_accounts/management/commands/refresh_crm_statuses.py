@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from apps.crm_accounts.status import refresh_account_statuses, send_status_report
+
+
+class Command(BaseCommand):
+    help = "Refresh CRM account statuses (slow / inactive) and email the status report (run daily from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-email', action='store_true', help="Update the statuses without sending the report.")
+
+    def handle(self, *args, **options):
+        updated, new_accounts_no_interaction = refresh_account_statuses()
+        for account in updated:
+            self.stdout.write(f"{account['name']} <{account['email']}>: {account['from_status']} -> {account['to_status']}")
+        sent = False if options['no_email'] else send_status_report(updated, new_accounts_no_interaction)
+        self.stdout.write(
+            f"Updated {len(updated)} accounts, {len(new_accounts_no_interaction)} new without interaction"
+            f"{', report sent' if sent else ''}"
+        )
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 21:05
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm_accounts', '0009_alter_crmaccount_options'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='crmaccount',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='idx_crmaccount_email_lower'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.4 on 2026-10-18 22:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm_accounts', '0010_crmaccount_idx_crmaccount_email_lower'),
+        ('email_connections', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GmailThreadCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('thread_id', models.CharField(max_length=255)),
+                ('history_id', models.CharField(max_length=64)),
+                ('messages', models.JSONField(default=list)),
+                ('fetched_at', models.DateTimeField()),
+                ('checked_at', models.DateTimeField()),
+                ('connection', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gmail_threads', to='email_connections.emailconnection')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('connection', 'thread_id'), name='uniq_gmail_thread_cache')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-18 23:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm_accounts', '0011_gmailthreadcache'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='crmaccount',
+            name='idx_crmaccount_email_lower',
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.conf import settings
 from apps.companies.models import Company
+from apps.email_connections.models import EmailConnection
 
 
 class CRMAccount(models.Model):
@@ -82,4 +83,19 @@ class CRMTask(models.Model):
     )
     due_date = models.DateTimeField()
     is_completed = models.BooleanField(default=False)
-    added_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
\ No newline at end of file
+    added_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
+
+
+class GmailThreadCache(models.Model):
+    """Parsed Gmail thread (headers + bodies) as shown in the CRM drawer, valid for history_id."""
+    connection = models.ForeignKey(EmailConnection, related_name='gmail_threads', on_delete=models.CASCADE)
+    thread_id = models.CharField(max_length=255)
+    history_id = models.CharField(max_length=64)
+    messages = models.JSONField(default=list)
+    fetched_at = models.DateTimeField()
+    checked_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['connection', 'thread_id'], name='uniq_gmail_thread_cache'),
+        ]
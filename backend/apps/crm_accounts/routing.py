@@ -0,0 +1,164 @@
+import logging
+import threading
+import time
+from django.conf import settings
+from django.db.models import Count, Max
+from django.db.models.functions import Lower
+from apps.companies.models import Company
+from .models import CRMAccount
+
+logger = logging.getLogger('myapp')
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+def email_domain(email):
+    return normalize_email(email).rpartition('@')[2]
+
+
+class _RoutingTable:
+    def __init__(self, emails, domains, signature):
+        self.emails = emails
+        self.domains = domains
+        self.signature = signature
+        self.checked_at = time.monotonic()
+
+
+class AccountRoutingIndex:
+    """
+    Process-wide map of lower(email) -> CRMAccount id and company domain -> CRMAccount id,
+    used to route mail in ingest / precheck without querying CRMAccount per message.
+
+    Built with one query. Saves / deletes of accounts and companies in this process drop
+    it right away (signals); changes made by another process are picked up once the table
+    is older than CRM_ROUTING_CACHE_TTL and the (count, max updated_at) signature differs.
+
+    Resolution is deterministic: an exact email match beats a company domain match, and
+    within a tier the oldest account (lowest id) wins. Free-mail domains
+    (CRM_FREE_MAIL_DOMAINS) and domains shared by several companies never route.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._table = None
+        self._generation = 0
+        self.routed = 0
+        self.not_strategic = 0
+        self.rebuilds = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _signature():
+        agg = CRMAccount.objects.aggregate(
+            accounts=Count('id'), updated=Max('updated_at'), company_updated=Max('company__updated_at'),
+        )
+        return (agg['accounts'], agg['updated'], agg['company_updated'])
+
+    @staticmethod
+    def _ambiguous_domains():
+        """Domains that say nothing about the company: free-mail providers and domains of several companies."""
+        shared = (
+            Company.objects.annotate(domain_key=Lower('domain'))
+            .exclude(domain_key__isnull=True).exclude(domain_key='')
+            .values('domain_key').annotate(companies=Count('id')).filter(companies__gt=1)
+            .values_list('domain_key', flat=True)
+        )
+        return {d.strip().lower() for d in settings.CRM_FREE_MAIL_DOMAINS if d.strip()} | set(shared)
+
+    def _build(self):
+        with self._lock:
+            generation = self._generation
+        signature = self._signature()
+        emails, domains = {}, {}
+        rows = (
+            CRMAccount.objects
+            .annotate(email_key=Lower('email'))
+            .values_list('id', 'email_key', 'company__domain')
+            .order_by('id')
+        )
+        by_domain = settings.CRM_ROUTE_BY_COMPANY_DOMAIN
+        ambiguous = self._ambiguous_domains() if by_domain else set()
+        for account_id, email, domain in rows:
+            if email:
+                emails.setdefault(email.strip(), account_id)
+            domain = (domain or '').strip().lower()
+            if by_domain and domain and domain not in ambiguous:
+                domains.setdefault(domain, account_id)
+        table = _RoutingTable(emails, domains, signature)
+        with self._lock:
+            self.rebuilds += 1
+            # an invalidation while building means the rows may already be stale
+            if generation == self._generation:
+                self._table = table
+        logger.debug(f"CRM routing index built: {len(emails)} emails, {len(domains)} domains")
+        return table
+
+    def _current(self):
+        with self._lock:
+            table = self._table
+        if table is None:
+            return self._build()
+        if time.monotonic() - table.checked_at > settings.CRM_ROUTING_CACHE_TTL:
+            if self._signature() != table.signature:
+                return self._build()
+            table.checked_at = time.monotonic()
+        return table
+
+    def route(self, emails, exclude_domains=()):
+        """CRMAccount id a message with these addresses belongs to, or None (not strategic)."""
+        table = self._current()
+        emails = {normalize_email(e) for e in emails if e}
+        account_ids = [table.emails[e] for e in emails if e in table.emails]
+        if not account_ids and settings.CRM_ROUTE_BY_COMPANY_DOMAIN:
+            domains = {email_domain(e) for e in emails} - {d.lower() for d in exclude_domains}
+            account_ids = [table.domains[d] for d in domains if d in table.domains]
+        with self._lock:
+            if account_ids:
+                self.routed += 1
+            else:
+                self.not_strategic += 1
+        return min(account_ids) if account_ids else None
+
+    def invalidate(self):
+        with self._lock:
+            self._table = None
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            table = self._table
+            return {
+                "emails": len(table.emails) if table else None,
+                "domains": len(table.domains) if table else None,
+                "routed": self.routed,
+                "not_strategic": self.not_strategic,
+                "rebuilds": self.rebuilds,
+                "invalidations": self.invalidations,
+            }
+
+
+routing_index = AccountRoutingIndex()
+
+
+def route_message(emails, watched_email):
+    """
+    CRMAccount id for a watched-mailbox message. The mailbox's own domain is never
+    used for company matching, so internal CCs don't route mail to a colleague's account.
+    """
+    return routing_index.route(emails, exclude_domains={email_domain(watched_email)})
+
+
+def routed_account(emails, watched_email):
+    """route_message, loading the CRMAccount; a stale entry (account deleted elsewhere) triggers one rebuild."""
+    for _ in range(2):
+        account_id = route_message(emails, watched_email)
+        if account_id is None:
+            return None
+        account = CRMAccount.objects.filter(pk=account_id).first()
+        if account is not None:
+            return account
+        routing_index.invalidate()
+    return None
@@ -20,7 +20,12 @@ class CRMTaskSerializer(serializers.ModelSerializer):
 
 
 class CRMAccountSerializer(serializers.ModelSerializer):
-    interactions = serializers.SerializerMethodField()
+    """
+    The full account for the drawer. The interaction history is not embedded:
+    it is paged through /accounts/<id>/interactions/ (interaction_count is set
+    on retrieve).
+    """
+    interaction_count = serializers.IntegerField(read_only=True)
     tasks = CRMTaskSerializer(many=True, read_only=True)
     assigned_to_name = serializers.CharField(source='assigned_to.get_full_name', read_only=True)
     company_details = CompanySerializer(source='company', read_only=True)
@@ -28,10 +33,31 @@ class CRMAccountSerializer(serializers.ModelSerializer):
     class Meta:
         model = CRMAccount
         fields = '__all__'
-    
-    def get_interactions(self, obj):
-        qs = obj.interactions.order_by('-timestamp')
-        return CRMInteractionSerializer(qs, many=True).data
+
+
+class CRMInteractionSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CRMInteraction
+        fields = ['id', 'type', 'direction', 'title', 'thread_id', 'timestamp']
+
+
+class CRMAccountListSerializer(serializers.ModelSerializer):
+    """
+    Account row for the CRM grid / kanban: the account columns plus aggregates
+    instead of the nested history. Expects the annotations and the
+    recent_interactions prefetch of CRMAccountViewSet.get_queryset.
+    """
+    assigned_to_name = serializers.CharField(source='assigned_to.get_full_name', read_only=True, default=None)
+    company_details = CompanySerializer(source='company', read_only=True)
+    interaction_count = serializers.IntegerField(read_only=True)
+    open_task_count = serializers.IntegerField(read_only=True)
+    next_task_due = serializers.DateTimeField(read_only=True)
+    next_task_title = serializers.CharField(read_only=True)
+    recent_interactions = CRMInteractionSummarySerializer(many=True, read_only=True)
+
+    class Meta:
+        model = CRMAccount
+        fields = '__all__'
     
 class IngestEmailSerializer(serializers.Serializer):
     message_id = serializers.CharField()
@@ -0,0 +1,22 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from apps.companies.models import Company
+from .dedup import message_dedup
+from .models import CRMAccount, CRMInteraction
+from .routing import routing_index
+
+
+@receiver(post_save, sender=CRMAccount)
+@receiver(post_delete, sender=CRMAccount)
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def invalidate_routing_index(sender, instance, **kwargs):
+    # emails and company domains both feed the index
+    routing_index.invalidate()
+
+
+@receiver(post_delete, sender=CRMInteraction)
+def forget_deleted_message_id(sender, instance, **kwargs):
+    # a deleted interaction's mail may be ingested again
+    if instance.message_id:
+        message_dedup.discard(instance.message_id)
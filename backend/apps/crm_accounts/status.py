@@ -0,0 +1,85 @@
+import logging
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from apps.system_settings.models import SystemSettings
+from utils.email_utils import send_system_email
+from .models import CRMAccount
+
+logger = logging.getLogger('myapp')
+
+STATUS_REPORT_TEMPLATE = "../templates/emails/crm_status_report.html"
+
+
+def _refresh_sql(table):
+    # (now - last_interaction).days > N  <=>  last_interaction <= now - (N + 1) days.
+    # Accounts within the slow threshold keep their status (interactions set 'active').
+    return f"""
+        UPDATE {table} AS a
+        SET status = s.to_status, updated_at = %(now)s
+        FROM (
+            SELECT id, status AS from_status,
+                CASE
+                    WHEN last_interaction <= %(inactive_before)s THEN 'inactive'
+                    WHEN last_interaction <= %(slow_before)s THEN 'slow'
+                END AS to_status
+            FROM {table}
+            WHERE status <> 'archived' AND last_interaction IS NOT NULL
+            FOR UPDATE
+        ) AS s
+        WHERE a.id = s.id AND s.to_status IS NOT NULL AND s.to_status <> s.from_status
+        RETURNING a.name, a.email, s.from_status, s.to_status, a.last_interaction
+    """
+
+
+def refresh_account_statuses():
+    """
+    Move non-archived accounts to 'slow' / 'inactive' by last_interaction against the
+    SystemSettings thresholds, with one UPDATE ... RETURNING (only changed rows are written).
+    Returns (updated, new_accounts_no_interaction) for the status report.
+    """
+    settings_obj = SystemSettings.get_solo()
+    now_ts = timezone.now()
+    params = {
+        "now": now_ts,
+        "inactive_before": now_ts - timedelta(days=settings_obj.inactive_threshold_days + 1),
+        "slow_before": now_ts - timedelta(days=settings_obj.slow_threshold_days + 1),
+    }
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(_refresh_sql(connection.ops.quote_name(CRMAccount._meta.db_table)), params)
+        rows = cursor.fetchall()
+
+    updated = [
+        {
+            "name": name,
+            "email": email,
+            "from_status": from_status,
+            "to_status": to_status,
+            "last_interaction": last_interaction.strftime('%Y-%m-%d'),
+        }
+        for name, email, from_status, to_status, last_interaction in sorted(rows, key=lambda r: r[0] or '')
+    ]
+    new_accounts_no_interaction = list(
+        CRMAccount.objects.filter(status='new', last_interaction__isnull=True)
+        .only('name', 'email', 'created_at')
+        .order_by('created_at')
+    )
+    logger.debug(f"CRM status refresh: {len(updated)} accounts changed, {len(new_accounts_no_interaction)} new without interaction")
+    return updated, new_accounts_no_interaction
+
+
+def send_status_report(updated, new_accounts_no_interaction):
+    """Email the refresh result to SYSTEM_EMAIL_RECIPIENTS; nothing is sent when there is nothing to report."""
+    if not updated and not new_accounts_no_interaction:
+        return False
+    return send_system_email(
+        to_email=settings.SYSTEM_EMAIL_RECIPIENTS,
+        subject="DotzHub CRM Status Update - {}".format(datetime.now().strftime("%Y-%m-%d")),
+        template_path=STATUS_REPORT_TEMPLATE,
+        context={
+            "updated_accounts": updated,
+            "new_accounts_no_interaction": new_accounts_no_interaction,
+            "year": datetime.now().year,
+        }
+    )
@@ -1,3 +1,101 @@
-from django.test import TestCase
+import time
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from .dedup import BloomFilter, MessageIdDedup
+from .serializers import CRMAccountSerializer
 
-# Create your tests here.
+
+class BloomFilterTests(SimpleTestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(capacity=2000, error_rate=0.01)
+        ids = [f"<msg-{n}@example.com>" for n in range(2000)]
+        for message_id in ids:
+            bloom.add(message_id)
+
+        self.assertTrue(all(message_id in bloom for message_id in ids))
+        self.assertEqual(bloom.count, 2000)
+
+    def test_false_positive_rate_stays_near_the_target(self):
+        bloom = BloomFilter(capacity=5000, error_rate=0.01)
+        for n in range(5000):
+            bloom.add(f"<stored-{n}@example.com>")
+
+        false_positives = sum(f"<new-{n}@example.com>" in bloom for n in range(20000))
+
+        self.assertLess(false_positives / 20000, 0.02)
+        self.assertLess(bloom.estimated_error_rate(), 0.02)
+
+
+@override_settings(CRM_DEDUP_LRU_SIZE=3, CRM_DEDUP_REBUILD_SECONDS=3600)
+class MessageIdDedupTests(SimpleTestCase):
+    """SimpleTestCase fails any real query: the table is mocked where a lookup is expected."""
+
+    def setUp(self):
+        self.dedup = MessageIdDedup()
+        self.dedup._bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        self.dedup._built_at = time.monotonic()
+
+    def _table(self, stored):
+        """Patch the IN query of existing(); returns the mock to inspect the ids it was asked for."""
+        objects = mock.patch('apps.crm_accounts.dedup.CRMInteraction.objects').start()
+        self.addCleanup(mock.patch.stopall)
+        objects.filter.return_value.values_list.side_effect = lambda *a, **k: [
+            m for m in objects.filter.call_args.kwargs['message_id__in'] if m in stored
+        ]
+        return objects
+
+    def test_bloom_negative_is_answered_without_a_query(self):
+        self.assertEqual(self.dedup.existing(['<new@x>']), set())
+        self.assertEqual(self.dedup.stats()['bloom_negatives'], 1)
+
+    def test_recently_added_id_is_an_lru_hit(self):
+        self.dedup.add(['<a@x>'])
+
+        self.assertTrue(self.dedup.is_duplicate('<a@x>'))
+        self.assertEqual(self.dedup.stats()['lru_hits'], 1)
+
+    def test_bloom_hit_is_confirmed_with_the_table(self):
+        self.dedup._bloom.add('<a@x>')
+        self.dedup._bloom.add('<deleted@x>')
+        objects = self._table(stored={'<a@x>'})
+
+        self.assertEqual(self.dedup.existing(['<a@x>', '<deleted@x>']), {'<a@x>'})
+        self.assertEqual(objects.filter.call_args.kwargs['message_id__in'], {'<a@x>', '<deleted@x>'})
+        self.assertEqual(self.dedup.stats()['false_positives'], 1)
+
+    def test_without_bloom_an_id_stored_by_another_process_is_found(self):
+        # the filter only knows this process' inserts until the next rebuild
+        objects = self._table(stored={'<other-worker@x>'})
+
+        self.assertFalse(self.dedup.is_duplicate('<other-worker@x>'))
+        objects.filter.assert_not_called()
+        self.assertTrue(self.dedup.is_duplicate('<other-worker@x>', use_bloom=False))
+        # now remembered: the next lookup needs no query
+        objects.reset_mock()
+        self.assertTrue(self.dedup.is_duplicate('<other-worker@x>', use_bloom=False))
+        objects.filter.assert_not_called()
+
+    def test_lru_is_bounded_and_discard_forgets(self):
+        self.dedup.add(['<1@x>', '<2@x>', '<3@x>', '<4@x>'])
+        self.dedup.discard('<4@x>')
+
+        self.assertEqual(list(self.dedup._recent), ['<2@x>', '<3@x>'])
+        # still in the Bloom filter, so the database decides
+        objects = self._table(stored=set())
+        self.assertFalse(self.dedup.is_duplicate('<4@x>'))
+        objects.filter.assert_called_once()
+
+    def test_conflict_records_the_ids(self):
+        self.dedup.record_conflict(['<a@x>'])
+
+        self.assertTrue(self.dedup.is_duplicate('<a@x>'))
+        self.assertEqual(self.dedup.stats()['conflicts'], 1)
+
+
+class CRMAccountSerializerTests(SimpleTestCase):
+    def test_detail_does_not_embed_the_interaction_history(self):
+        # the drawer pages through /accounts/<id>/interactions/ instead
+        fields = CRMAccountSerializer().fields
+
+        self.assertNotIn('interactions', fields)
+        self.assertTrue(fields['interaction_count'].read_only)
@@ -5,19 +5,26 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from apps.common.permissions import CanAccessCRM
 from rest_framework.decorators import action
-from django.db.models import Q
-from django.conf import settings
+from django.db.models import Count, F, IntegerField, OuterRef, Prefetch, Q, Subquery, Window
+from django.db.models.functions import Coalesce, RowNumber
+from apps.common.pagination import KeysetPagination
+from apps.common.grid import GridFilterBackend
+from rest_framework.settings import api_settings
 from .models import CRMAccount, CRMInteraction, CRMTask
-from .serializers import CRMAccountSerializer, CRMInteractionSerializer, CRMTaskSerializer, EmailPrecheckSerializer, AutomatedInteractionSerializer, IngestEmailSerializer
+from .filters import CRMAccountFilter
+from .serializers import CRMAccountSerializer, CRMAccountListSerializer, CRMInteractionSerializer, CRMTaskSerializer, EmailPrecheckSerializer, AutomatedInteractionSerializer, IngestEmailSerializer
+from .status import refresh_account_statuses, send_status_report
+from .ingest import ingest_emails, INGEST_BATCH_MAX_MESSAGES
+from .routing import route_message, routed_account, routing_index
+from .dedup import create_interaction, message_dedup
+from .gmail import GmailAPIError, GmailTokenError, get_thread, queue_user_thread_prefetch
 from django.utils import timezone
+from django.conf import settings
 from apps.system_settings.models import SystemSettings
 from apps.usersettings.models import UserSettings
 from apps.email_connections.models import EmailConnection
+from apps.email_connections.google_api import gmail_send
 from apps.email_connections.utils import refresh_google_token
-from utils.email_utils import send_system_email
-import requests
-import base64
-import html
 # from google.auth.transport.requests import Request
 
 
@@ -35,10 +42,107 @@ def update_account_status(account, reference_date):
     if account.status != new_status:
         account.status = new_status
 
+# interactions shown per account in the list
+RECENT_INTERACTIONS = 3
+
+
+def _count_subquery(queryset):
+    """COUNT(*) of a per-account correlated queryset, as an integer annotation."""
+    counted = queryset.order_by().values('account').annotate(n=Count('id')).values('n')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def account_list_queryset(queryset):
+    """
+    Aggregates for CRMAccountListSerializer: interaction / open task counts and the
+    next due task as correlated subqueries (no join fan-out), plus the latest
+    RECENT_INTERACTIONS interactions per account in one prefetch query.
+    """
+    interactions = CRMInteraction.objects.filter(account=OuterRef('pk'))
+    open_tasks = CRMTask.objects.filter(account=OuterRef('pk'), is_completed=False)
+    next_task = open_tasks.order_by('due_date', 'id')
+    recent = (
+        CRMInteraction.objects
+        .annotate(position=Window(
+            RowNumber(),
+            partition_by=[F('account_id')],
+            order_by=[F('timestamp').desc(nulls_last=True), F('id').desc()],
+        ))
+        .filter(position__lte=RECENT_INTERACTIONS)
+        .only('id', 'account_id', 'type', 'direction', 'title', 'thread_id', 'timestamp')
+        .order_by('-timestamp', '-id')
+    )
+    return (
+        queryset
+        .select_related('company', 'assigned_to')
+        .annotate(
+            interaction_count=_count_subquery(interactions),
+            open_task_count=_count_subquery(open_tasks),
+            next_task_due=Subquery(next_task.values('due_date')[:1]),
+            next_task_title=Subquery(next_task.values('title')[:1]),
+        )
+        .prefetch_related(Prefetch('interactions', queryset=recent, to_attr='recent_interactions'))
+    )
+
+
 class CRMAccountViewSet(viewsets.ModelViewSet):
-    queryset = CRMAccount.objects.all().order_by('-created_at')
+    """
+    List: slim rows with interaction / task aggregates (CRMAccountListSerializer),
+    keyset-paginated when page_size / cursor is sent, filterable by status /
+    assigned_to (comma separated) and unassigned; filterModel / sortModel /
+    quickFilter follow the CRM grid's columns (see GridFilterBackend).
+    Detail: the account with its tasks and interaction_count; /interactions/ pages
+    through the history.
+    """
+    queryset = CRMAccount.objects.all()
     serializer_class = CRMAccountSerializer
     permission_classes = [IsAuthenticated, CanAccessCRM]
+    pagination_class = KeysetPagination
+    filterset_class = CRMAccountFilter
+    filter_backends = [*api_settings.DEFAULT_FILTER_BACKENDS, GridFilterBackend]
+    grid_fields = ['name', 'email', 'phone', 'status', 'created_at', 'updated_at', 'last_interaction']
+    grid_quick_search_fields = ['name', 'email', 'phone']
+    search_fields = ['name', 'email', 'company__name']
+    ordering_fields = ['created_at', 'updated_at', 'last_interaction', 'name', 'status']
+    ordering = ['-created_at', '-id']
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            return account_list_queryset(queryset)
+        if self.action == 'retrieve':
+            return queryset.select_related('company', 'assigned_to').annotate(
+                interaction_count=Count('interactions'),
+            ).prefetch_related(
+                Prefetch('tasks', queryset=CRMTask.objects.select_related('added_by')),
+            )
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return CRMAccountListSerializer
+        return CRMAccountSerializer
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        # the drawer is opening: warm the Gmail thread cache for its latest email threads
+        # (a few rows per thread is enough to find GMAIL_PREFETCH_THREADS distinct ones)
+        thread_ids = instance.interactions.filter(type='email').exclude(thread_id__isnull=True).exclude(
+            thread_id='',
+        ).order_by('-timestamp').values_list('thread_id', flat=True)[:settings.GMAIL_PREFETCH_THREADS * 4]
+        queue_user_thread_prefetch(request.user, thread_ids)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def interactions(self, request, pk=None):
+        """The account's interactions newest first, keyset-paginated when page_size / cursor is sent."""
+        account = self.get_object()
+        queryset = account.interactions.select_related('added_by').order_by('-timestamp', '-id')
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(CRMInteractionSerializer(page, many=True).data)
+        return Response(CRMInteractionSerializer(queryset, many=True).data)
 
 class CRMInteractionViewSet(viewsets.ModelViewSet):
     queryset = CRMInteraction.objects.all().order_by('-timestamp')
@@ -121,18 +225,21 @@ class CRMInteractionViewSet(viewsets.ModelViewSet):
         timestamp = data['timestamp']
         all_emails = set([data['from_email'], data['watched_email'], *data['to_emails'], *data.get('cc_emails', [])])
 
-        # Check if the message ID already exists
-        if CRMInteraction.objects.filter(message_id=message_id).exists():
-            return Response( {"status": "duplicate"}, status=status.HTTP_200_OK)
-        
-        # Check if any of the emails match existing CRM accounts
-        matching_accounts = CRMAccount.objects.filter(email__in=all_emails)
-        if not matching_accounts.exists():
+        # Route through the in-memory index first: most mail is not strategic and needs no query
+        account = routed_account(all_emails, data['watched_email'])
+        if account is None:
             return Response({ "status": "not_strategic" }, status=status.HTTP_200_OK)
-        account = matching_accounts.first() # in the future, we might want to handle multiple matches differently.
+
+        # Check if the message ID already exists (Bloom filter / LRU, the database only on a Bloom hit)
+        if message_dedup.is_duplicate(message_id):
+            return Response( {"status": "duplicate"}, status=status.HTTP_200_OK)
+
         if thread_id:
             existing = CRMInteraction.objects.filter(thread_id=thread_id, account=account).order_by('-timestamp').first()
             if existing:
+                # no insert follows, so a Bloom negative (maybe stored by another worker) is confirmed with the table
+                if message_dedup.is_duplicate(message_id, use_bloom=False):
+                    return Response( {"status": "duplicate"}, status=status.HTTP_200_OK)
                 if existing.direction and existing.direction != direction:
                     existing.direction = 'mixed'
                 else:
@@ -153,7 +260,7 @@ class CRMInteractionViewSet(viewsets.ModelViewSet):
                 }, status=status.HTTP_200_OK)
             
         # create a new interaction
-        interaction = CRMInteraction.objects.create(
+        interaction = create_interaction(
             account=account,
             type='email',
             is_auto_generated=True,
@@ -165,6 +272,8 @@ class CRMInteractionViewSet(viewsets.ModelViewSet):
             timestamp=timestamp,
             added_by=request.user
         )
+        if interaction is None:
+            return Response( {"status": "duplicate"}, status=status.HTTP_200_OK)
         account.last_interaction = interaction.timestamp
         account.status = 'active'
         account.save()
@@ -175,6 +284,24 @@ class CRMInteractionViewSet(viewsets.ModelViewSet):
             "interaction_id": interaction.id
         }, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=['post'], url_path='ingest-emails')
+    def ingest_email_batch(self, request):
+        """
+        Batch ingest for mailbox backfills.
+        Body: {"messages": [<ingest-email payload>, ...]}
+        Returns {results: [{index, status, account_id, interaction_id}], counts, errors: [{index, errors}]}.
+        """
+        messages = request.data.get('messages')
+        if not messages:
+            return Response({"error": "No messages provided"}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(messages, list):
+            return Response({"error": "messages must be a list"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(messages) > INGEST_BATCH_MAX_MESSAGES:
+            return Response({"error": f"At most {INGEST_BATCH_MAX_MESSAGES} messages per request"}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = ingest_emails(messages, user=request.user)
+        return Response(result, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['post'])
     def precheck(self, request):
         serializer = EmailPrecheckSerializer(data=request.data)
@@ -191,34 +318,42 @@ class CRMInteractionViewSet(viewsets.ModelViewSet):
 
         all_emails = set([from_email] + to_emails + cc_emails)
 
-        # Check if the message ID already exists
-        if CRMInteraction.objects.filter(message_id=message_id).exists():
-            return Response( {"status": "duplicate"}, status=status.HTTP_200_OK)
-        
-        # Check if any of the emails match existing CRM accounts
-        matching_accounts = CRMAccount.objects.filter(email__in=all_emails)
-
-        if not matching_accounts.exists():
+        # Answered from the in-memory routing index: no query for non-strategic mail
+        account_id = route_message(all_emails, watched_email)
+        if account_id is None:
             return Response({ "status": "not_strategic" }, status=status.HTTP_200_OK)
-        
-        account = matching_accounts.first() # in the future, we might want to handle multiple matches differently.
+
+        # Check if the message ID already exists. Nothing is inserted here, so the Bloom filter
+        # (which only knows this process' inserts) can't rule it out: LRU, then the database
+        if message_dedup.is_duplicate(message_id, use_bloom=False):
+            return Response( {"status": "duplicate"}, status=status.HTTP_200_OK)
 
         if thread_id:
-            existing = CRMInteraction.objects.filter(thread_id=thread_id, account=account).first()
+            existing = CRMInteraction.objects.filter(thread_id=thread_id, account_id=account_id).first()
             if existing:
                 return Response({
                     "status": "process_existing_interaction",
-                    "account_id": account.id,
+                    "account_id": account_id,
                     "interaction_id": existing.id,
                     "direction": direction
                 })
 
         return Response({
             "status": "process_new_interaction",
-            "account_id": account.id,
+            "account_id": account_id,
             "direction": direction
         })
 
+    @action(detail=False, methods=['get'], url_path='routing-stats')
+    def routing_stats(self, request):
+        """Counters of this process' email -> account routing index."""
+        return Response(routing_index.stats())
+
+    @action(detail=False, methods=['get'], url_path='dedup-stats')
+    def dedup_stats(self, request):
+        """Hit-rate counters of this process' message_id dedup cache (Bloom filter + LRU)."""
+        return Response(message_dedup.stats())
+
     @action(detail=False, methods=['post'], url_path='automated-interaction')
     def automated(self, request):
         serializer = AutomatedInteractionSerializer(data=request.data)
@@ -232,9 +367,10 @@ class CRMInteractionViewSet(viewsets.ModelViewSet):
         # if the interaction_id is provided, we will update the existing interaction
         interaction_id = data.get('interaction_id')
         message_id = data['message_id']
+        # a Bloom negative is only trusted when the insert below (guarded by the unique index) follows
+        if message_dedup.is_duplicate(message_id, use_bloom=not interaction_id):
+            return Response({"status": "duplicate"}, status=status.HTTP_200_OK)
         if interaction_id:
-            if CRMInteraction.objects.filter(message_id=message_id).exists():
-                return Response({"status": "duplicate"}, status=status.HTTP_200_OK)
             interaction = CRMInteraction.objects.filter(id=interaction_id, account=account).first()
             if interaction:
                 interaction.summary += f"\n\n[+] {data['summary']}"
@@ -255,11 +391,8 @@ class CRMInteractionViewSet(viewsets.ModelViewSet):
                     "account_id": account.id
                 }, status=status.HTTP_200_OK)
         
-        if CRMInteraction.objects.filter(message_id=message_id).exists():
-            return Response({"status": "duplicate"}, status=status.HTTP_200_OK)
-        
         # if the interaction_id is not provided, we will create a new interaction
-        interaction = CRMInteraction.objects.create(
+        interaction = create_interaction(
             account=account,
             type='email',
             is_auto_generated=True,
@@ -271,6 +404,8 @@ class CRMInteractionViewSet(viewsets.ModelViewSet):
             timestamp=data['timestamp'],
             added_by=request.user
         )
+        if interaction is None:
+            return Response({"status": "duplicate"}, status=status.HTTP_200_OK)
         account.last_interaction = interaction.timestamp # in the future, we might check if this is the latest interaction
         account.status = 'active'
         account.save()
@@ -283,57 +418,8 @@ class CRMInteractionViewSet(viewsets.ModelViewSet):
         
     @action(detail=False, methods=['post'], url_path='refresh-status')
     def refresh_statuses(self, request):
-        print("Refreshing CRM account statuses...")
-        settings_obj = SystemSettings.get_solo()
-        now_ts = timezone.now()
-        updated = []
-        new_accounts_no_interaction = []
-        
-        print(f"Current time: {now_ts}, Inactive threshold: {settings_obj.inactive_threshold_days} days, Slow threshold: {settings_obj.slow_threshold_days} days")
-        for account in CRMAccount.objects.exclude(status='archived'):
-            last_interaction = account.last_interaction
-            if not last_interaction and account.status == 'new':
-                new_accounts_no_interaction.append(account)
-                continue
-            if not last_interaction:
-                continue
-            
-            delta_days  = (now_ts - last_interaction).days
-            prev_status = account.status
-            
-            if delta_days > settings_obj.inactive_threshold_days:
-                new_status = 'inactive'
-            elif delta_days > settings_obj.slow_threshold_days:
-                new_status = 'slow'
-            else:
-                continue
-            
-            if prev_status != new_status:
-                account.status = new_status
-                account.save()
-                updated.append({
-                    "name": account.name,
-                    "email": account.email,
-                    "from_status": prev_status,
-                    "to_status": new_status,
-                    "last_interaction": last_interaction.strftime('%Y-%m-%d')
-                })
-            
-            account.save()
-            
-        # send email notification if there are changes
-        if updated or new_accounts_no_interaction:
-            send_system_email(
-                to_email=settings.SYSTEM_EMAIL_RECIPIENTS,
-                subject="DotzHub CRM Status Update - {}".format(datetime.now().strftime("%Y-%m-%d")),
-                template_path="../templates/emails/crm_status_report.html",
-                context={
-                    "updated_accounts": updated,
-                    "new_accounts_no_interaction": new_accounts_no_interaction,
-                    "year": datetime.now().year,
-                }
-            )
-            
+        updated, new_accounts_no_interaction = refresh_account_statuses()
+        send_status_report(updated, new_accounts_no_interaction)
         return Response({
             "updated": len(updated),
             "message": "CRM accounts statuses updated successfully.",
@@ -343,7 +429,12 @@ class CRMInteractionViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'], url_path='send-test-email')
     def send_test_email(self, request):
         import base64
-        import requests
+
+        user_settings = UserSettings.objects.filter(user=request.user).select_related('crm_email_connection').first()
+        conn = user_settings.crm_email_connection if user_settings else None
+        if not conn or conn.provider != 'google':
+            return Response({"error": "No valid Google email connection found."}, status=status.HTTP_400_BAD_REQUEST)
+        access_token = refresh_google_token(conn)
 
         message_id = "CAJPdHdrkhxa0N6FkJ=zMRxhCS+5CfNM2+V3CMRowkMJx+5JoSQ@mail.gmail.com"
         thread_id = "198327655501bd42"
@@ -366,17 +457,12 @@ Content-Transfer-Encoding: 7bit
 
         raw_base64 = base64.urlsafe_b64encode(email_raw.encode("utf-8")).decode("utf-8")
 
-        url = "https://gmail.googleapis.com/gmail/v1/users/me/messages/send"
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Content-Type": "application/json"
-        }
         payload = {
             "raw": raw_base64,
             "threadId": thread_id
         }
 
-        response = requests.post(url, headers=headers, json=payload)
+        response = gmail_send(access_token, payload)
 
         if response.status_code == 200:
             return Response({"status": "Email sent successfully"})
@@ -395,150 +481,26 @@ class GmailThreadView(APIView):
             conn: EmailConnection = user_settings.crm_email_connection
 
             if not conn or conn.provider != 'google':
-                print(f"conn: {conn}")
-                print(f"conn.provider: {conn.provider if conn else 'None'}")
                 return Response({"error": "No valid Google email connection found."}, status=status.HTTP_400_BAD_REQUEST)
-            
+
             try:
-                access_token = refresh_google_token(conn)
-            except Exception as e:
+                entry, cached = get_thread(conn, thread_id)
+            except GmailTokenError as e:
                 return Response({"error": f"Token refresh failed: {str(e)}"}, status=status.HTTP_401_UNAUTHORIZED)
-            
-            url = f"https://gmail.googleapis.com/gmail/v1/users/me/threads/{thread_id}?format=full"
-            headers = {
-                "Authorization": f"Bearer {access_token}",
-                "Content-Type": "application/json"
-            }
-            response = requests.get(url, headers=headers)
-            if response.status_code != 200:
-                return Response({"error": "Failed to fetch thread data", "details": response.json()}, status=response.status_code)
-            
-            thread_data = response.json()
-            messages = []
-
-            for msg in thread_data.get('messages', []):
-                headers_map = {header['name']: header['value'] for header in msg.get('payload', {}).get('headers', [])}
-                body = extract_body_from_payload(
-                    msg.get('payload', {}),
-                    message_id=msg.get('id'),
-                    access_token=access_token
-                )
-                messages.append({
-                    "message_id": msg.get('id'),
-                    "real_message_id": headers_map.get('Message-ID', ''),
-                    "from": headers_map.get('From', ''),
-                    "to": headers_map.get('To', ''),
-                    "subject": headers_map.get('Subject', ''),
-                    "date": headers_map.get('Date', ''),
-                    "body": body,
-                })
+            except GmailAPIError as e:
+                return Response({"error": "Failed to fetch thread data", "details": e.details}, status=e.status_code)
+
             return Response({
-                "thread_id": thread_data.get('id'),
-                "messages": messages
+                "thread_id": entry.thread_id,
+                "history_id": entry.history_id,
+                "cached": cached,
+                "messages": entry.messages
             }, status=status.HTTP_200_OK)
         except UserSettings.DoesNotExist:
             return Response({"error": "User settings not found."}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({"error": f"An error occurred: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
-def extract_body_from_payload(payload, message_id, access_token):
-    """
-    Recursively search for body; prefer text/html, then text/plain.
-    If the content sits behind attachmentId (not a real file, often Gmail stores big bodies this way),
-    fetch it via the attachments API. Returns a single string.
-    """
-    html_candidates = []
-    text_candidates = []
-    
-    data, mt = _get_part_text(payload, message_id, access_token)
-
-    if data:
-        if mt == "text/html":
-            return data
-        elif mt == "text/plain":
-            text_candidates.append(data)
-
-    for part in payload.get("parts", []) or []:
-        mt = (part.get("mimeType") or "").lower()
-
-        # dive into multipart/*
-        if mt.startswith("multipart/"):
-            inner = extract_body_from_payload(part, message_id, access_token)
-            if inner:
-                # we don't guess by tags; we just keep order and prefer html later
-                # keep as text candidate unless explicit html was returned
-                if "<" in inner and ">" in inner:
-                    html_candidates.append(inner)
-                else:
-                    text_candidates.append(inner)
-            continue
-
-        # leaf: fetch data or attachment only for text types
-        if mt in ("text/html", "text/plain"):
-            data, _ = _get_part_text(part, message_id, access_token)
-            if data:
-                if mt == "text/html":
-                    html_candidates.append(data)
-                else:
-                    text_candidates.append(data)
-
-    # 3) preference
-    return (html_candidates[0] if html_candidates else
-            (text_candidates[0] if text_candidates else "[No body found]"))
-    
 
-def _get_part_text(part, message_id, access_token):
-    """
-    Returns (text, mimeType) for text parts.
-    - If body.data exists -> decode and return.
-    - If body.attachmentId exists and mimeType is text/* -> fetch attachment and decode.
-    - Otherwise -> (None, mimeType)
-    """
-    mt = (part.get("mimeType") or "").lower()
-    body = part.get("body", {}) or {}
-
-    # direct data
-    raw = body.get("data")
-    if raw:
-        return _decode_body(raw), mt
-
-    attachment_id = body.get("attachmentId")
-    if attachment_id and mt.startswith("text/"):
-        try:
-            url = f"https://gmail.googleapis.com/gmail/v1/users/me/messages/{message_id}/attachments/{attachment_id}"
-            headers = {"Authorization": f"Bearer {access_token}"}
-            resp = requests.get(url, headers=headers, timeout=15)
-            if resp.status_code == 200:
-                data = resp.json().get("data")
-                if data:
-                    return _decode_body(data), mt
-        except Exception:
-            pass
-
-    return None, mt
-
-def _decode_body(data):
-    """Decode base64url safely (add padding) and unescape HTML."""
-    if not data:
-        return ""
-    try:
-        pad = len(data) % 4
-        if pad:
-            data += "=" * (4 - pad)
-        decoded_bytes = base64.urlsafe_b64decode(data.encode("utf-8"))
-        return html.unescape(decoded_bytes.decode("utf-8", errors="replace"))
-    except Exception:
-        return "[Body decode error]"
-
-# def decode_body(data):
-#     if not data:
-#         return ""
-#     try:
-#         decoded_bytes = base64.urlsafe_b64decode(data.encode('UTF-8'))
-#         return html.unescape(decoded_bytes.decode('UTF-8'))
-#     except Exception:
-#         return "[Body decode error]"
-    
 class CRMTaskViewSet(viewsets.ModelViewSet):
     queryset = CRMTask.objects.all().order_by('-due_date')
     serializer_class = CRMTaskSerializer
@@ -0,0 +1,267 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import timedelta
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.utils import timezone
+from apps.jobs.utils import backoff_delay
+from .models import EmailConnection
+
+logger = logging.getLogger('myapp')
+
+TOKEN_URL = "https://oauth2.googleapis.com/token"
+USERINFO_URL = "https://openidconnect.googleapis.com/v1/userinfo"
+GMAIL_API = "https://gmail.googleapis.com/gmail/v1/users/me"
+
+# rate limited / server side errors; other statuses are returned to the caller as-is
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class GoogleTokenError(Exception):
+    pass
+
+
+class LatencyStats:
+    """Per-call-name counters and recent latencies (ms) of the Google API calls of this process."""
+
+    def __init__(self, samples=500):
+        self._lock = threading.Lock()
+        self._samples = samples
+        self._calls = {}
+
+    def record(self, name, seconds, status, retried=False):
+        with self._lock:
+            entry = self._calls.setdefault(name, {
+                "calls": 0, "errors": 0, "retries": 0, "total_ms": 0.0, "max_ms": 0.0,
+                "recent": deque(maxlen=self._samples),
+            })
+            ms = seconds * 1000
+            entry["calls"] += 1
+            entry["errors"] += 0 if isinstance(status, int) and status < 400 else 1
+            entry["retries"] += 1 if retried else 0
+            entry["total_ms"] += ms
+            entry["max_ms"] = max(entry["max_ms"], ms)
+            entry["recent"].append(ms)
+        if ms > settings.GOOGLE_API_SLOW_MS:
+            logger.warning(f"Slow Google API call {name}: {ms:.0f} ms (status {status})")
+
+    def stats(self):
+        with self._lock:
+            result = {}
+            for name, entry in self._calls.items():
+                recent = sorted(entry["recent"])
+                result[name] = {
+                    "calls": entry["calls"],
+                    "errors": entry["errors"],
+                    "retries": entry["retries"],
+                    "avg_ms": round(entry["total_ms"] / entry["calls"], 1),
+                    "p50_ms": round(recent[len(recent) // 2], 1),
+                    "p95_ms": round(recent[max(int(len(recent) * 0.95) - 1, 0)], 1),
+                    "max_ms": round(entry["max_ms"], 1),
+                }
+            return result
+
+
+api_stats = LatencyStats()
+
+
+class SessionPool:
+    """
+    Process-wide keep-alive requests.Sessions. A Session is not safe to share between
+    threads, so each call checks one out and returns it afterwards; at most
+    GOOGLE_API_POOL_SIZE idle sessions (and their open connections) are kept. Under ASGI
+    every sync view runs on a fresh executor thread, so per-thread sessions would never
+    be reused.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idle = []
+
+    def _new(self):
+        s = requests.Session()
+        # one connection per Google host (oauth2, gmail, openidconnect) per session
+        s.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=1))
+        return s
+
+    @contextmanager
+    def session(self):
+        with self._lock:
+            s = self._idle.pop() if self._idle else None
+        if s is None:
+            s = self._new()
+        try:
+            yield s
+        finally:
+            with self._lock:
+                keep = len(self._idle) < settings.GOOGLE_API_POOL_SIZE
+                if keep:
+                    self._idle.append(s)
+            if not keep:
+                s.close()
+
+
+sessions = SessionPool()
+
+
+def _retry_delay(response, attempt):
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(int(retry_after), settings.GOOGLE_API_RETRY_MAX_SECONDS)
+    return backoff_delay(attempt, settings.GOOGLE_API_RETRY_BASE_SECONDS, cap=settings.GOOGLE_API_RETRY_MAX_SECONDS)
+
+
+def _retry_policy(method, idempotent):
+    """(statuses to retry, whether to retry connection errors)."""
+    if idempotent is None:
+        idempotent = method.upper() in ("GET", "HEAD")
+    # a POST that failed with 5xx or mid-request may still have been applied (e.g. a sent email)
+    return (RETRY_STATUSES, True) if idempotent else ({429}, False)
+
+
+def request(method, url, name, access_token=None, idempotent=None, retries=None, **kwargs):
+    """
+    Google API call over the pooled session, with a timeout, retries with backoff on
+    429 / 5xx (and connection errors for idempotent calls) and latency recorded under `name`.
+    `retries` overrides GOOGLE_API_MAX_RETRIES for callers that hold a lock.
+    Returns the final requests.Response; connection errors are raised after the last attempt.
+    """
+    kwargs.setdefault("timeout", settings.GOOGLE_API_TIMEOUT)
+    headers = dict(kwargs.pop("headers", None) or {})
+    if access_token:
+        headers["Authorization"] = f"Bearer {access_token}"
+    statuses, retry_errors = _retry_policy(method, idempotent)
+    attempts = (settings.GOOGLE_API_MAX_RETRIES if retries is None else retries) + 1
+
+    for attempt in range(1, attempts + 1):
+        started = time.monotonic()
+        try:
+            with sessions.session() as s:
+                response = s.request(method, url, headers=headers, **kwargs)
+        except requests.RequestException as e:
+            api_stats.record(name, time.monotonic() - started, type(e).__name__, retried=attempt > 1)
+            if attempt == attempts or not retry_errors:
+                raise
+            response = None
+        else:
+            api_stats.record(name, time.monotonic() - started, response.status_code, retried=attempt > 1)
+            if response.status_code not in statuses or attempt == attempts:
+                return response
+        delay = _retry_delay(response, attempt)
+        logger.warning(f"Google API {name} attempt {attempt} failed, retrying in {delay}s")
+        time.sleep(delay)
+
+
+async def arequest(client, method, url, name, idempotent=None, **kwargs):
+    """request() for an httpx.AsyncClient (concurrent fetches): same retry policy and stats."""
+    statuses, retry_errors = _retry_policy(method, idempotent)
+    attempts = settings.GOOGLE_API_MAX_RETRIES + 1
+    for attempt in range(1, attempts + 1):
+        started = time.monotonic()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            api_stats.record(name, time.monotonic() - started, type(e).__name__, retried=attempt > 1)
+            if attempt == attempts or not retry_errors:
+                raise
+            response = None
+        else:
+            api_stats.record(name, time.monotonic() - started, response.status_code, retried=attempt > 1)
+            if response.status_code not in statuses or attempt == attempts:
+                return response
+        await asyncio.sleep(_retry_delay(response, attempt))
+
+
+class TokenManager:
+    """
+    Access tokens of Google EmailConnections.
+
+    A token is refreshed GOOGLE_TOKEN_REFRESH_MARGIN_SECONDS before it expires, and
+    only once per connection at a time in this process: threads wait on a per-connection
+    lock and whoever comes second finds the fresh token (re-read from the table, so a
+    refresh by another process is picked up too) instead of refreshing again.
+    No row lock is held during the token request, which is retried at most once.
+    Two processes may still refresh at the same time; both tokens are valid.
+    """
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._locks = {}
+
+    def _lock_for(self, connection_id):
+        with self._guard:
+            return self._locks.setdefault(connection_id, threading.Lock())
+
+    @staticmethod
+    def is_fresh(connection):
+        margin = timedelta(seconds=settings.GOOGLE_TOKEN_REFRESH_MARGIN_SECONDS)
+        return bool(connection.access_token and connection.token_expires
+                    and timezone.now() + margin < connection.token_expires)
+
+    @staticmethod
+    def _copy_tokens(source, target):
+        target.access_token = source.access_token
+        target.token_expires = source.token_expires
+
+    def access_token(self, connection, force=False):
+        """A valid access token for `connection` (refreshed and saved if needed)."""
+        if not force and self.is_fresh(connection):
+            return connection.access_token
+        stale_token = connection.access_token
+
+        with self._lock_for(connection.pk):
+            current = EmailConnection.objects.get(pk=connection.pk)
+            # someone else refreshed while we waited
+            if self.is_fresh(current) and (not force or current.access_token != stale_token):
+                self._copy_tokens(current, connection)
+                return connection.access_token
+
+            response = request("POST", TOKEN_URL, "oauth.refresh", idempotent=True, retries=1, data={
+                'client_id': settings.GOOGLE_OAUTH_CLIENT_ID,
+                'client_secret': settings.GOOGLE_OAUTH_CLIENT_SECRET,
+                'refresh_token': current.refresh_token,
+                'grant_type': 'refresh_token',
+            })
+            if response.status_code != 200:
+                raise GoogleTokenError(f"Token refresh failed: {response.content}")
+            tokens = response.json()
+            current.access_token = tokens['access_token']
+            current.token_expires = timezone.now() + timedelta(seconds=tokens['expires_in'])
+            EmailConnection.objects.filter(pk=current.pk).update(
+                access_token=current.access_token,
+                token_expires=current.token_expires,
+                updated_at=timezone.now(),
+            )
+
+        self._copy_tokens(current, connection)
+        logger.debug(f"Refreshed Google token of connection {connection.pk}")
+        return connection.access_token
+
+
+token_manager = TokenManager()
+
+
+def exchange_code(code):
+    """OAuth callback: authorization code -> token response (an auth code is single use, so no 5xx retry)."""
+    return request("POST", TOKEN_URL, "oauth.exchange", idempotent=False, data={
+        'client_id': settings.GOOGLE_OAUTH_CLIENT_ID,
+        'client_secret': settings.GOOGLE_OAUTH_CLIENT_SECRET,
+        'code': code,
+        'grant_type': 'authorization_code',
+        'redirect_uri': settings.GOOGLE_OAUTH_REDIRECT_URI,
+    })
+
+
+def user_info(access_token):
+    return request("GET", USERINFO_URL, "oauth.userinfo", access_token=access_token)
+
+
+def gmail_send(access_token, payload):
+    """POST users/me/messages/send ({raw, threadId})."""
+    return request("POST", f"{GMAIL_API}/messages/send", "gmail.messages.send", access_token=access_token, json=payload)
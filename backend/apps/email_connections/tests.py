@@ -1,3 +1,56 @@
-from django.test import TestCase
+from unittest import mock
+from django.test import SimpleTestCase
+from .models import EmailConnection
+from .utils import generate_oauth2_string, send_email
 
-# Create your tests here.
+# Gmail answers a rejected XOAUTH2 token with 334 + a base64 JSON error, then 535 after the empty reply
+REJECTED = (334, b'eyJzdGF0dXMiOiI0MDAifQ==')
+FAILED = (535, b'5.7.8 Username and Password not accepted')
+ACCEPTED = (235, b'2.7.0 Accepted')
+
+
+class SendEmailXOAuth2Tests(SimpleTestCase):
+    def setUp(self):
+        self.connection = EmailConnection(id=1, provider='google', email_address='sales@example.com')
+        patch = mock.patch('apps.email_connections.utils.EmailConnection.objects.get', return_value=self.connection)
+        patch.start()
+        self.tokens = mock.patch(
+            'apps.email_connections.utils.refresh_google_token',
+            side_effect=lambda connection, force=False: 'fresh-token' if force else 'stale-token',
+        ).start()
+        self.smtp = mock.patch('apps.email_connections.utils.smtplib.SMTP').start().return_value
+        self.addCleanup(mock.patch.stopall)
+
+    def _auth(self, token):
+        return mock.call('AUTH', 'XOAUTH2 ' + generate_oauth2_string('sales@example.com', token))
+
+    def test_rejected_token_ends_the_exchange_before_retrying(self):
+        self.smtp.docmd.side_effect = [REJECTED, FAILED, ACCEPTED]
+
+        send_email(1, 'Quote', '<p>hi</p>', 'buyer@example.com')
+
+        self.assertEqual(self.smtp.docmd.call_args_list, [
+            self._auth('stale-token'), mock.call(''), self._auth('fresh-token'),
+        ])
+        self.tokens.assert_called_with(self.connection, force=True)
+        self.smtp.sendmail.assert_called_once()
+
+    def test_second_rejection_raises_without_sending(self):
+        self.smtp.docmd.side_effect = [REJECTED, FAILED, REJECTED, FAILED]
+
+        with self.assertRaisesMessage(Exception, 'Gmail XOAUTH2 auth failed'):
+            send_email(1, 'Quote', '<p>hi</p>', 'buyer@example.com')
+
+        self.assertEqual(self.smtp.docmd.call_args_list, [
+            self._auth('stale-token'), mock.call(''), self._auth('fresh-token'), mock.call(''),
+        ])
+        self.smtp.sendmail.assert_not_called()
+        self.smtp.quit.assert_called_once()
+
+    def test_accepted_token_is_not_refreshed(self):
+        self.smtp.docmd.side_effect = [ACCEPTED]
+
+        send_email(1, 'Quote', '<p>hi</p>', 'buyer@example.com')
+
+        self.tokens.assert_called_once_with(self.connection)
+        self.smtp.sendmail.assert_called_once()
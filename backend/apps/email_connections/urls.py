@@ -1,6 +1,6 @@
 from rest_framework.routers import DefaultRouter
 from django.urls import path, include
-from .views import EmailConnectionViewSet, init_google_oauth, google_oauth_callback, send_test_email
+from .views import EmailConnectionViewSet, init_google_oauth, google_oauth_callback, send_test_email, google_api_stats
 
 router = DefaultRouter()
 router.register(r'email-connections', EmailConnectionViewSet, basename='emailconnection')
@@ -10,4 +10,5 @@ urlpatterns = [
     path('google/init/', init_google_oauth, name='init-google-oauth'),
     path('google/callback/', google_oauth_callback, name='google-oauth-callback'),
     path('send-test-email/', send_test_email, name='send-test-email'),
+    path('google/api-stats/', google_api_stats, name='google-api-stats'),
 ]
\ No newline at end of file
@@ -1,6 +1,5 @@
-import requests
 from django.conf import settings
-from django.utils import timezone
+from .google_api import token_manager
 from .models import EmailConnection
 import base64
 import smtplib
@@ -8,16 +7,16 @@ from email.mime.text import MIMEText
 from django.core.mail import EmailMessage, get_connection
 from email.mime.multipart import MIMEMultipart
 from email.mime.application import MIMEApplication
-from apps.email_templates.models import EmailTemplate
-from django.template import Template, Context
+from apps.email_templates.cache import template_cache
+from django.template import Context
 
 def send_templated_email(data, template_name, connection_id, attachments=None):
-    email_template = EmailTemplate.objects.filter(name=template_name).first()
-    if not email_template:
+    compiled = template_cache.get(template_name)
+    if not compiled:
         raise Exception(f"Email template '{template_name}' not found")
 
-    email_subject = Template(email_template.subject).render(Context(data))
-    email_body = Template(email_template.content).render(Context(data))
+    email_subject = compiled.subject.render(Context(data))
+    email_body = compiled.body.render(Context(data))
 
     send_email(
         connection_id=connection_id,
@@ -34,33 +33,24 @@ def generate_oauth2_string(email, access_token):
     auth_string = f"user={email}\x01auth=Bearer {access_token}\x01\x01"
     return base64.b64encode(auth_string.encode()).decode()
 
-def refresh_google_token(connection: EmailConnection):
+def xoauth2_login(server, auth_string):
     """
-    Refresh the Google OAuth2 token for the email connection.
+    AUTH XOAUTH2 on an open SMTP connection; returns the final (code, response).
+    A rejected token is answered with 334 <base64 error>: the empty reply ends that
+    exchange (the server then sends 535) so AUTH can be sent again on the same connection.
     """
-    if connection.token_expires and timezone.now() < connection.token_expires:
-        return connection.access_token
+    code, response = server.docmd('AUTH', 'XOAUTH2 ' + auth_string)
+    if code == 334:
+        code, response = server.docmd('')
+    return code, response
+
+def refresh_google_token(connection: EmailConnection, force=False):
+    """
+    Valid Google OAuth2 access token for the email connection, refreshed ahead of expiry
+    (at most once at a time per connection, see google_api.TokenManager).
+    """
+    return token_manager.access_token(connection, force=force)
 
-    # Make a request to refresh the token
-    response = requests.post(
-        'https://oauth2.googleapis.com/token',
-        data={
-            'client_id': settings.GOOGLE_OAUTH_CLIENT_ID,
-            'client_secret': settings.GOOGLE_OAUTH_CLIENT_SECRET,
-            'refresh_token': connection.refresh_token,
-            'grant_type': 'refresh_token',
-        }
-    )
-    
-    if response.status_code == 200:
-        tokens = response.json()
-        connection.access_token = tokens['access_token']
-        connection.token_expires = timezone.now() + timezone.timedelta(seconds=tokens['expires_in'])
-        connection.save()
-        return connection.access_token
-    else:
-        raise Exception(f"Token refresh failed: {response.content}")
-    
 def send_email(connection_id, subject, body, to_email, cc=None, bcc=None, attachments=None):
     """
     Send an email using the specified email connection.
@@ -78,11 +68,17 @@ def send_email(connection_id, subject, body, to_email, cc=None, bcc=None, attach
 
         msg.attach(MIMEText(body, 'html'))
 
-        server = smtplib.SMTP('smtp.gmail.com', 587)
+        server = smtplib.SMTP('smtp.gmail.com', 587, timeout=settings.GOOGLE_API_TIMEOUT)
         server.starttls()
         server.ehlo()
-        code, response = server.docmd('AUTH', 'XOAUTH2 ' + auth_string)
+        code, response = xoauth2_login(server, auth_string)
+        if code != 235:
+            # the token may have been revoked before its expiry: refresh once and retry
+            access_token = refresh_google_token(connection, force=True)
+            auth_string = generate_oauth2_string(connection.email_address, access_token)
+            code, response = xoauth2_login(server, auth_string)
         if code != 235:
+            server.quit()
             raise Exception(f"Gmail XOAUTH2 auth failed: {response}")
         if attachments:
             for filename, content, mime_type in attachments:
@@ -7,9 +7,9 @@ from rest_framework.response import Response
 from django.shortcuts import redirect
 from django.conf import settings
 from django.utils import timezone
-import requests
 from urllib.parse import urlencode
 from django.contrib.auth import get_user_model
+from .google_api import api_stats, exchange_code, user_info
 from .utils import send_templated_email
 
 
@@ -75,16 +75,7 @@ def google_oauth_callback(request):
     print("✅ CALLBACK TRIGGERED — CODE:", code)
 
     # Exchange the authorization code for an access token
-    token_url = 'https://oauth2.googleapis.com/token'
-    data = {
-        'client_id': settings.GOOGLE_OAUTH_CLIENT_ID,
-        'client_secret': settings.GOOGLE_OAUTH_CLIENT_SECRET,
-        'code': code,
-        'grant_type': 'authorization_code',
-        'redirect_uri': settings.GOOGLE_OAUTH_REDIRECT_URI,
-    }
-    
-    token_response  = requests.post(token_url, data=data)
+    token_response = exchange_code(code)
     if token_response.status_code != 200:
         return Response({"error": "Failed to fetch tokens", "details": token_response.text}, status=400)
 
@@ -98,8 +89,6 @@ def google_oauth_callback(request):
         return Response({"error": "Unexpected token type", "details": token_data.get('token_type')}, status=400)
 
     
-    print("✅ CALLBACK TRIGGERED — TOKEN DATA:", token_data)
-    
     access_token = token_data['access_token']
     refresh_token = token_data.get('refresh_token')
     expires_in = token_data.get('expires_in', 3600)
@@ -108,14 +97,11 @@ def google_oauth_callback(request):
     print("📦 SCOPES GRANTED:", token_data.get("scope"))
 
     # Create or update the email connection with the access token and refresh token
-    user_info = requests.get(
-        "https://openidconnect.googleapis.com/v1/userinfo",
-        headers={"Authorization": f"Bearer {access_token}"}
-    )
-    if user_info.status_code != 200:
-        return Response({"error": "Failed to fetch user info", "details": user_info.text}, status=400)
+    user_info_response = user_info(access_token)
+    if user_info_response.status_code != 200:
+        return Response({"error": "Failed to fetch user info", "details": user_info_response.text}, status=400)
 
-    user_email = user_info.json().get("email")
+    user_email = user_info_response.json().get("email")
     if not user_email:
         return Response({"error": "Failed to fetch user email"}, status=400)
     
@@ -173,4 +159,11 @@ def send_test_email(request):
         )
         return Response({"status": "sent"})
     except Exception as e:
-        return Response({"status": "failed", "error": str(e)}, status=400)
\ No newline at end of file
+        return Response({"status": "failed", "error": str(e)}, status=400)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def google_api_stats(request):
+    """Call counts and latencies of this process' Google API calls, by call name."""
+    return Response(api_stats.stats())
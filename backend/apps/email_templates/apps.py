@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class EmailTemplatesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.email_templates'
+
+    def ready(self):
+        from . import signals  # noqa: F401 - connects the template cache invalidation
@@ -0,0 +1,109 @@
+import logging
+import threading
+import time
+from functools import cached_property
+from django.conf import settings
+from django.template import Template
+from .models import EmailTemplate
+
+logger = logging.getLogger('myapp')
+
+
+class CompiledEmailTemplate:
+    def __init__(self, email_template):
+        self.name = email_template.name
+        self.updated_at = email_template.updated_at
+        self.subject = Template(email_template.subject)
+        self.body = Template(email_template.content)
+        self._content = email_template.content
+        self.checked_at = time.monotonic()
+
+    @cached_property
+    def items_table_body(self):
+        """
+        The body with {{items_table}} rendered unescaped: for the callers that pass
+        a pre-rendered HTML items table (send_html_email, the quote reply).
+        Compiled on first use.
+        """
+        return Template(self._content.replace("{{items_table}}", "{{items_table|safe}}"))
+
+
+class EmailTemplateCache:
+    """
+    Process-wide cache of compiled EmailTemplates, keyed by (name, updated_at).
+
+    Saves / deletes in this process invalidate an entry right away (post_save /
+    post_delete signals). Edits made by another process are picked up when an
+    entry is older than EMAIL_TEMPLATE_CACHE_TTL: it is revalidated with a
+    one-column updated_at query and only recompiled if the template changed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, name):
+        """CompiledEmailTemplate for `name`, or None if there is no such template."""
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry is not None and time.monotonic() - entry.checked_at > settings.EMAIL_TEMPLATE_CACHE_TTL:
+            updated_at = EmailTemplate.objects.filter(name=name).values_list('updated_at', flat=True).first()
+            if updated_at == entry.updated_at:
+                entry.checked_at = time.monotonic()
+            else:
+                entry = None
+        if entry is not None:
+            with self._lock:
+                self.hits += 1
+            return entry
+
+        email_template = EmailTemplate.objects.filter(name=name).first()
+        with self._lock:
+            self.misses += 1
+            if email_template is None:
+                self._entries.pop(name, None)
+                return None
+            entry = self._entries[name] = CompiledEmailTemplate(email_template)
+        return entry
+
+    def invalidate(self, name=None):
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+            self.invalidations += 1
+
+    def warm(self):
+        """Compile every template with one query (called at startup)."""
+        entries = {t.name: CompiledEmailTemplate(t) for t in EmailTemplate.objects.all()}
+        with self._lock:
+            self._entries = entries
+        logger.debug(f"Email template cache warmed with {len(entries)} templates")
+        return len(entries)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "templates": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            }
+
+
+template_cache = EmailTemplateCache()
+
+
+def warm_template_cache():
+    """Startup hook: a missing table or database only means a cold cache."""
+    try:
+        return template_cache.warm()
+    except Exception as e:
+        logger.warning(f"Email template cache not warmed: {e}")
+        return 0
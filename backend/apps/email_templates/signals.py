@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .cache import template_cache
+from .models import EmailTemplate
+
+
+@receiver(post_save, sender=EmailTemplate)
+@receiver(post_delete, sender=EmailTemplate)
+def invalidate_compiled_templates(sender, instance, **kwargs):
+    # drop every entry, not just instance.name: a rename must not leave the old name cached
+    template_cache.invalidate()
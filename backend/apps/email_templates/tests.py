@@ -1,3 +1,28 @@
-from django.test import TestCase
+from django.template import Context
+from django.test import SimpleTestCase
+from .cache import CompiledEmailTemplate
+from .models import EmailTemplate
 
-# Create your tests here.
+ITEMS_TABLE = '<table><tr><td>LM317T</td></tr></table>'
+
+
+class CompiledEmailTemplateTests(SimpleTestCase):
+    def setUp(self):
+        self.compiled = CompiledEmailTemplate(EmailTemplate(
+            name='quote', subject='Quote for {{customer_name}}', content='<p>Hi {{customer_name}}</p>{{items_table}}',
+        ))
+        self.data = {'customer_name': 'Dana <Acme>', 'items_table': ITEMS_TABLE}
+
+    def test_body_escapes_every_variable(self):
+        # send_templated_email renders the template as authored
+        body = self.compiled.body.render(Context(self.data))
+
+        self.assertIn('&lt;table&gt;', body)
+        self.assertIn('Dana &lt;Acme&gt;', body)
+
+    def test_items_table_body_only_trusts_the_items_table(self):
+        # send_html_email / the quote reply pass a pre-rendered HTML table
+        body = self.compiled.items_table_body.render(Context(self.data))
+
+        self.assertIn(ITEMS_TABLE, body)
+        self.assertIn('Dana &lt;Acme&gt;', body)
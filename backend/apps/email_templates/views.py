@@ -1,8 +1,16 @@
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from .models import EmailTemplate
 from .serializers import EmailTemplateSerializer
+from .cache import template_cache
 
 # Create your views here.
 class EmailTemplateViewSet(viewsets.ModelViewSet):
     queryset = EmailTemplate.objects.all()
-    serializer_class = EmailTemplateSerializer
\ No newline at end of file
+    serializer_class = EmailTemplateSerializer
+
+    @action(detail=False, methods=['get'], url_path='cache-stats')
+    def cache_stats(self, request):
+        """Hit / miss counters of this process' compiled template cache."""
+        return Response(template_cache.stats())
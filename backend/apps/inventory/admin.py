@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import InventoryItem
+from django.db import transaction
+from .models import InventoryItem, PlatformExportSegment, StockSummary
+from .stock_summary import refresh_stock_summary
 
 # Register your models here.
 @admin.register(InventoryItem)
@@ -20,4 +22,37 @@ class InventoryItemAdmin(admin.ModelAdmin):
         }),
     )
     readonly_fields = ('created_at', 'updated_at')
-    save_on_top = True
\ No newline at end of file
+    save_on_top = True
+
+    @transaction.atomic
+    def save_model(self, request, obj, form, change):
+        old_key = InventoryItem.objects.filter(pk=obj.pk).values_list('mpn_key', flat=True).first() if change else None
+        super().save_model(request, obj, form, change)
+        refresh_stock_summary([old_key, obj.mpn_key])
+
+    @transaction.atomic
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        refresh_stock_summary([obj.mpn_key])
+
+    @transaction.atomic
+    def delete_queryset(self, request, queryset):
+        mpn_keys = set(queryset.values_list('mpn_key', flat=True))
+        super().delete_queryset(request, queryset)
+        refresh_stock_summary(mpn_keys)
+
+
+@admin.register(PlatformExportSegment)
+class PlatformExportSegmentAdmin(admin.ModelAdmin):
+    list_display = ('platform', 'supplier', 'row_count', 'synced_at', 'updated_at')
+    list_filter = ('platform',)
+    search_fields = ('supplier',)
+    readonly_fields = ('digest', 'path', 'synced_at', 'updated_at')
+
+
+@admin.register(StockSummary)
+class StockSummaryAdmin(admin.ModelAdmin):
+    list_display = ('mpn', 'total_quantity', 'row_count', 'stock_source', 'updated_at')
+    list_filter = ('stock_source',)
+    search_fields = ('mpn', 'mpn_key')
+    readonly_fields = ('mpn_key', 'mpn', 'manufacturer', 'total_quantity', 'row_count', 'suppliers', 'stock_source', 'updated_at')
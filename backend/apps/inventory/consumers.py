@@ -0,0 +1,41 @@
+import json
+from channels.generic.websocket import AsyncWebsocketConsumer
+
+
+def upload_group(user_id, upload_id):
+    """Progress group of one upload; scoped to the uploader, so a leaked upload_id is not enough to listen."""
+    return f"inventory_upload_{user_id}_{upload_id}"
+
+
+class InventoryUploadConsumer(AsyncWebsocketConsumer):
+    async def connect(self):
+        user = self.scope.get('user')
+        if not (user and user.is_authenticated and user.is_active):
+            # rejects the handshake; the client connects with ?token=<knox token>
+            await self.close()
+            return
+
+        # the client picks a random upload_id and sends it along with the file
+        self.group_name = upload_group(user.id, self.scope['url_route']['kwargs']['upload_id'])
+
+        await self.channel_layer.group_add(
+            self.group_name,
+            self.channel_name
+        )
+
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        if not hasattr(self, 'group_name'):
+            return
+        await self.channel_layer.group_discard(
+            self.group_name,
+            self.channel_name
+        )
+
+    async def send_upload_progress(self, event):
+        message = event['message']
+
+        await self.send(text_data=json.dumps({
+            'message': message
+        }))
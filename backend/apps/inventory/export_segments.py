@@ -0,0 +1,192 @@
+import gzip
+import hashlib
+import json
+from datetime import timedelta
+from decimal import Decimal
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from .models import InventoryItem, PlatformExportSegment
+
+# Rows committed shortly after a sync can carry an updated_at older than the sync
+# time; every delta re-reads this window (fingerprints make the overlap harmless).
+SYNC_OVERLAP = timedelta(minutes=5)
+
+# pg_advisory_xact_lock key: one segment refresh at a time
+SEGMENTS_LOCK_KEY = 730_100
+
+FETCH_CHUNK_SIZE = 10000
+
+# Segment entry layout: [id, mpn, fingerprint, values]
+ENTRY_ID, ENTRY_MPN, ENTRY_FP, ENTRY_VALUES = range(4)
+
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def row_values(row, fields):
+    return [_json_value(row[f]) for f in fields]
+
+
+def fingerprint(values):
+    """Stable hash of the platform-visible values of a row."""
+    raw = json.dumps(values, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def segment_digest(entries):
+    h = hashlib.blake2b(digest_size=16)
+    for entry in entries:
+        h.update(f"{entry[ENTRY_ID]}:{entry[ENTRY_FP]};".encode("ascii"))
+    return h.hexdigest()
+
+
+def segment_path(platform, supplier):
+    key = hashlib.sha1(supplier.encode("utf-8")).hexdigest()
+    return f"export_segments/{platform}/{key}.json.gz"
+
+
+def load_entries(segment):
+    if not segment or not segment.path or not default_storage.exists(segment.path):
+        return None
+    with default_storage.open(segment.path, "rb") as fh:
+        return json.loads(gzip.decompress(fh.read()))
+
+
+def save_entries(platform, supplier, entries):
+    path = segment_path(platform, supplier)
+    if default_storage.exists(path):
+        default_storage.delete(path)
+    payload = json.dumps(entries, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return default_storage.save(path, ContentFile(gzip.compress(payload)))
+
+
+def _is_dirty(segment, live):
+    """A cached segment is stale when rows were added/removed or touched since its sync."""
+    count, last_updated = live
+    if segment.row_count != count:
+        return True
+    return bool(last_updated and last_updated > segment.synced_at - SYNC_OVERLAP)
+
+
+def refresh_segments(platform_fields, suppliers, full=False):
+    """
+    Bring the per-(platform, supplier) snapshots up to date and return
+    ({platform: {supplier: entries}}, stats).
+
+    Clean segments are read back from the cache. For stale ones only rows with
+    updated_at after the last sync are fetched; they are diffed against the
+    cached fingerprints (adds / changes), and ids that disappeared are dropped
+    (removals). full=True ignores the cache and rebuilds every segment.
+    """
+    platforms = list(platform_fields)
+    fetch_fields = sorted({"id", "mpn", "supplier"}.union(*platform_fields.values()))
+    started = timezone.now()
+    entries_by_platform = {p: {} for p in platforms}
+    stats = {p: {"reused": 0, "refreshed": 0, "rewritten": 0, "added": 0, "changed": 0, "removed": 0} for p in platforms}
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [SEGMENTS_LOCK_KEY])
+
+        segments = {
+            (seg.platform, seg.supplier): seg
+            for seg in PlatformExportSegment.objects.select_for_update().filter(
+                platform__in=platforms, supplier__in=suppliers
+            )
+        }
+        live = {
+            row["supplier"]: (row["n"], row["last"])
+            for row in (
+                InventoryItem.objects
+                .filter(supplier__in=suppliers)
+                .values("supplier")
+                .annotate(n=Count("id"), last=Max("updated_at"))
+                .order_by()
+            )
+        }
+
+        # ---------- decide what can be reused ----------
+        cached = {}  # (platform, supplier) -> entries of a stale segment (None = no usable cache)
+        since = {}   # supplier -> lower bound for the delta fetch (None = fetch all rows)
+        for supplier in suppliers:
+            supplier_live = live.get(supplier, (0, None))
+            for p in platforms:
+                seg = segments.get((p, supplier))
+                entries = None if full else load_entries(seg)
+                if entries is not None and not _is_dirty(seg, supplier_live):
+                    entries_by_platform[p][supplier] = entries
+                    stats[p]["reused"] += 1
+                    continue
+                cached[(p, supplier)] = entries
+                if entries is None or supplier in since and since[supplier] is None:
+                    since[supplier] = None
+                else:
+                    bound = seg.synced_at - SYNC_OVERLAP
+                    since[supplier] = min(since.get(supplier, bound), bound)
+
+        # ---------- delta fetch for stale suppliers ----------
+        current_ids = {}
+        changed_rows = {}
+        if since:
+            for supplier, row_id in (
+                InventoryItem.objects.filter(supplier__in=list(since)).values_list("supplier", "id")
+            ):
+                current_ids.setdefault(supplier, set()).add(row_id)
+
+            delta = Q()
+            for supplier, bound in since.items():
+                delta |= Q(supplier=supplier) if bound is None else Q(supplier=supplier, updated_at__gt=bound)
+            qs = InventoryItem.objects.filter(delta).order_by("supplier", "id").values(*fetch_fields)
+            for row in qs.iterator(chunk_size=FETCH_CHUNK_SIZE):
+                changed_rows.setdefault(row["supplier"], []).append(row)
+
+        # ---------- merge deltas into the stale segments ----------
+        for (p, supplier), entries in cached.items():
+            fields = platform_fields[p]
+            ids = current_ids.get(supplier, set())
+            by_id = {e[ENTRY_ID]: e for e in entries or []}
+            seg_stats = stats[p]
+
+            for row_id in [i for i in by_id if i not in ids]:
+                del by_id[row_id]
+                seg_stats["removed"] += 1
+
+            rows = changed_rows.get(supplier, [])
+            missing = ids.difference(by_id, (r["id"] for r in rows))
+            if missing:
+                # rows we never saw and whose updated_at predates the window
+                rows = rows + list(InventoryItem.objects.filter(id__in=missing).values(*fetch_fields))
+
+            for row in rows:
+                values = row_values(row, fields)
+                fp = fingerprint(values)
+                old = by_id.get(row["id"])
+                if old is None:
+                    seg_stats["added"] += 1
+                elif old[ENTRY_FP] != fp:
+                    seg_stats["changed"] += 1
+                else:
+                    continue
+                by_id[row["id"]] = [row["id"], row["mpn"], fp, values]
+
+            merged = [by_id[i] for i in sorted(by_id)]
+            entries_by_platform[p][supplier] = merged
+            seg_stats["refreshed"] += 1
+
+            digest = segment_digest(merged)
+            seg = segments.get((p, supplier)) or PlatformExportSegment(platform=p, supplier=supplier)
+            if digest != seg.digest or entries is None:
+                seg.path = save_entries(p, supplier, merged)
+                seg.digest = digest
+                seg_stats["rewritten"] += 1
+            seg.row_count = len(merged)
+            seg.synced_at = started
+            seg.save()
+
+    return entries_by_platform, stats
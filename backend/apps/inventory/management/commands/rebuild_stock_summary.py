@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from apps.inventory.models import StockSummary
+from apps.inventory.stock_summary import rebuild_stock_summary
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-MPN stock summary from the inventory (e.g. after raw SQL edits or a STOCK_SUPPLIER change)."
+
+    def handle(self, *args, **options):
+        with transaction.atomic(), connection.cursor() as cursor:
+            rebuild_stock_summary(cursor)
+        self.stdout.write(f"Stock summary rebuilt: {StockSummary.objects.count()} MPNs")
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_alter_inventoryitem_supplier'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlatformExportSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('platform', models.CharField(max_length=50)),
+                ('supplier', models.CharField(max_length=255)),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('digest', models.CharField(blank=True, default='', max_length=64)),
+                ('path', models.CharField(blank=True, default='', max_length=500)),
+                ('synced_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['supplier', 'updated_at'], name='idx_inv_supplier_updated'),
+        ),
+        migrations.AddConstraint(
+            model_name='platformexportsegment',
+            constraint=models.UniqueConstraint(fields=('platform', 'supplier'), name='uniq_export_segment_platform_supplier'),
+        ),
+    ]
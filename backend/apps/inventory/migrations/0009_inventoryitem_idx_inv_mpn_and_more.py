@@ -0,0 +1,24 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:55
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_platformexportsegment_and_more'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['mpn'], name='idx_inv_mpn'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['mpn'], name='idx_inv_mpn_trgm', opclasses=['gist_trgm_ops']),
+        ),
+    ]
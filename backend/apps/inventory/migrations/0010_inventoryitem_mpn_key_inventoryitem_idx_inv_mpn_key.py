@@ -0,0 +1,27 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:56
+
+import apps.common.mpn
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_inventoryitem_idx_inv_mpn_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='mpn_key',
+            field=apps.common.mpn.MpnKeyField(blank=True, default='', max_length=255),
+        ),
+        migrations.RunSQL(
+            "UPDATE inventory_inventoryitem SET mpn_key = upper(regexp_replace(mpn, '[^A-Za-z0-9]', '', 'g'))",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['mpn_key'], name='idx_inv_mpn_key', opclasses=['text_pattern_ops']),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:58
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.db import migrations, models
+
+
+# the summary as of this migration; later changes to apps.inventory.stock_summary do not apply here
+POPULATE_SQL = """
+    INSERT INTO inventory_stocksummary
+        (mpn_key, mpn, manufacturer, total_quantity, row_count, suppliers, stock_source, updated_at)
+    SELECT
+        i.mpn_key,
+        MIN(i.mpn),
+        MAX(i.manufacturer),
+        SUM(i.quantity),
+        COUNT(*),
+        jsonb_agg(jsonb_build_object(
+            'supplier', i.supplier,
+            'quantity', i.quantity,
+            'cost', i.cost,
+            'date_code', i.date_code
+        ) ORDER BY i.id),
+        CASE
+            WHEN COUNT(*) = 1 AND bool_or(position(%(stock_supplier)s IN lower(replace(replace(i.supplier, '-', ''), ' ', ''))) > 0)
+                THEN 'Stock'
+            WHEN bool_or(position(%(stock_supplier)s IN lower(replace(replace(i.supplier, '-', ''), ' ', ''))) > 0)
+                THEN 'Stock & Available'
+            ELSE 'Available'
+        END,
+        now()
+    FROM inventory_inventoryitem i
+    GROUP BY i.mpn_key
+"""
+
+
+def populate_stock_summary(apps, schema_editor):
+    stock_supplier = settings.STOCK_SUPPLIER.lower().replace("-", "").replace(" ", "")
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(POPULATE_SQL, {"stock_supplier": stock_supplier})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_inventoryitem_mpn_key_inventoryitem_idx_inv_mpn_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSummary',
+            fields=[
+                ('mpn_key', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('mpn', models.CharField(max_length=255)),
+                ('manufacturer', models.CharField(blank=True, max_length=255, null=True)),
+                ('total_quantity', models.BigIntegerField(default=0)),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('suppliers', models.JSONField(blank=True, default=list)),
+                ('stock_source', models.CharField(max_length=50)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [django.contrib.postgres.indexes.GistIndex(fields=['mpn'], name='idx_stock_summary_mpn_trgm', opclasses=['gist_trgm_ops'])],
+            },
+        ),
+        migrations.RunPython(populate_stock_summary, migrations.RunPython.noop),
+    ]
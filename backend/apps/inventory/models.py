@@ -1,10 +1,13 @@
 from django.db import models
+from django.contrib.postgres.indexes import GistIndex
+from apps.common.mpn import MpnKeyField
 from django.core.exceptions import ValidationError
 from django.conf import settings
 
 # Create your models here.
 class InventoryItem(models.Model):
     mpn = models.CharField(max_length=255)
+    mpn_key = MpnKeyField()  # normalized mpn for prefix / typeahead search
     description = models.TextField(blank=True, null=True)
     manufacturer = models.CharField(max_length=255, blank=True, null=True)
     quantity = models.IntegerField()
@@ -20,6 +23,15 @@ class InventoryItem(models.Model):
     url = models.URLField(blank=True, null=True)
     notes = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['supplier', 'updated_at'], name='idx_inv_supplier_updated'),
+            models.Index(fields=['mpn'], name='idx_inv_mpn'),
+            models.Index(fields=['mpn_key'], opclasses=['text_pattern_ops'], name='idx_inv_mpn_key'),
+            # pg_trgm: serves the `%` similarity filter and `<->` KNN ordering
+            GistIndex(fields=['mpn'], opclasses=['gist_trgm_ops'], name='idx_inv_mpn_trgm'),
+        ]
+
     def __str__(self):
         return f"{self.mpn} - {self.quantity}"
     
@@ -28,4 +40,51 @@ class InventoryItem(models.Model):
         required_suppliers = [s.strip().lower() for s in settings.LOCATION_REQUIRED_SUPPLIERS]
         if any(normalized_supplier.startswith(s) for s in required_suppliers) and not self.location:
             raise ValidationError({'location': f"Location is required when the supplier is '{self.supplier}'."})
-        
\ No newline at end of file
+        
+
+class PlatformExportSegment(models.Model):
+    """
+    Cached slice of a platform export (NetComponents / IC Source) for one supplier.
+    The rows live in a gzipped JSON file under MEDIA_ROOT/export_segments/; each row
+    carries a fingerprint of its exported values so later runs only rebuild the
+    suppliers whose inventory changed since synced_at.
+    """
+    platform = models.CharField(max_length=50)
+    supplier = models.CharField(max_length=255)
+    row_count = models.PositiveIntegerField(default=0)
+    digest = models.CharField(max_length=64, blank=True, default='')
+    path = models.CharField(max_length=500, blank=True, default='')
+    synced_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['platform', 'supplier'], name='uniq_export_segment_platform_supplier'),
+        ]
+
+    def __str__(self):
+        return f"{self.platform} / {self.supplier} ({self.row_count} rows)"
+
+
+class StockSummary(models.Model):
+    """
+    Per-MPN rollup of InventoryItem keyed by the normalized MPN.
+    Kept current by apps.inventory.stock_summary.refresh_stock_summary() on every
+    inventory write path (API, bulk edit/delete, uploads, archive/restore).
+    """
+    mpn_key = models.CharField(max_length=255, primary_key=True)
+    mpn = models.CharField(max_length=255)
+    manufacturer = models.CharField(max_length=255, blank=True, null=True)
+    total_quantity = models.BigIntegerField(default=0)
+    row_count = models.PositiveIntegerField(default=0)
+    suppliers = models.JSONField(default=list, blank=True)  # [{supplier, quantity, cost, date_code}]
+    stock_source = models.CharField(max_length=50)  # 'Stock' | 'Stock & Available' | 'Available'
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            GistIndex(fields=['mpn'], opclasses=['gist_trgm_ops'], name='idx_stock_summary_mpn_trgm'),
+        ]
+
+    def __str__(self):
+        return f"{self.mpn} - {self.total_quantity} ({self.stock_source})"
@@ -0,0 +1,248 @@
+import io
+import tempfile
+import time
+import zipfile
+from decimal import Decimal
+from django.conf import settings
+from django.utils import timezone
+from apps.system_settings.models import SystemSettings
+from utils.email_utils import send_html_email
+from .export_segments import ENTRY_VALUES, refresh_segments
+from .utils import write_csv_rows, write_xlsx_rows
+
+# ---------- Columns per destination ----------
+NC_FIELDS   = ["mpn", "description", "manufacturer", "quantity", "url", "break_qty_a", "price_a"]
+NC_COLUMNS  = ["P/N", "DESCRIPTION", "MFG", "QTY", "Shopping Cart URL", "BreakQtyA", "PriceA"]
+
+ICS_FIELDS  = ["mpn", "description", "manufacturer", "quantity"]
+ICS_COLUMNS = ["P/N", "DESCRIPTION", "MFG", "QTY"]
+
+CSV_CONTENT_TYPE = "text/csv"
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# exported as numbers in xlsx (segments keep decimals as strings)
+DECIMAL_FIELDS = {"price_a"}
+
+NETCOMPONENTS = "netcomponents"
+ICSOURCE = "icsource"
+
+PLATFORM_EXPORT_JOB = "inventory.platform_export"
+PLATFORM_EXPORT_HANDLER = "apps.inventory.platform_export.run_platform_export"
+
+
+def params_from_system_settings(system_settings):
+    """Export parameters for the Make.com trigger (always 'send')."""
+    return {
+        "source": "make",
+        "action": "send",
+        "net_components_enabled": system_settings.export_netcomponents,
+        "ic_source_enabled": system_settings.export_icsource,
+        "stock_suppliers": system_settings.stock_suppliers or [],
+        "available_suppliers": system_settings.available_suppliers or [],
+        "file_format": system_settings.export_file_format or "csv",
+        "max_nc_stock": system_settings.netcomponents_max_stock or 0,
+        "max_nc_avail": system_settings.netcomponents_max_available or 0,
+        "max_ics_stock": system_settings.icsource_max_stock or 0,
+        "max_ics_avail": system_settings.icsource_max_available or 0,
+        "full_rebuild": False,
+    }
+
+
+def params_from_payload(data):
+    """Export parameters for the web modal payload."""
+    nc = data.get("netCOMPONENTS", {}) or {}
+    ics = data.get("icSource", {}) or {}
+    return {
+        "source": "web",
+        "action": data.get("action", "send"),  # "send" | "download" | "both"
+        "net_components_enabled": nc.get("enabled", False),
+        "ic_source_enabled": ics.get("enabled", False),
+        "stock_suppliers": data.get("stockSuppliers", []) or [],
+        "available_suppliers": data.get("availableSuppliers", []) or [],
+        "file_format": data.get("fileFormat", "csv"),
+        "max_nc_stock": nc.get("max_stock_rows", 0) or 0,
+        "max_nc_avail": nc.get("max_available_rows", 0) or 0,
+        "max_ics_stock": ics.get("max_stock_rows", 0) or 0,
+        "max_ics_avail": ics.get("max_available_rows", 0) or 0,
+        "full_rebuild": bool(data.get("fullRebuild", False)),
+    }
+
+
+def unique_suppliers(params):
+    """Union of stock + available suppliers, order preserved."""
+    all_suppliers = []
+    for s in params["stock_suppliers"] + params["available_suppliers"]:
+        if s not in all_suppliers:
+            all_suppliers.append(s)
+    return all_suppliers
+
+
+def build_platform_rows(rows_by_supplier, stock_list, avail_list, stock_limit, avail_limit):
+    """
+    Fill stock rows first, overflow to available, then process available suppliers.
+    Works on any per-supplier row lists (segment entries included).
+    """
+    stock_rows = []
+    avail_rows = []
+
+    # Phase 1: STOCK suppliers
+    for s in stock_list:
+        for row in rows_by_supplier.get(s, []):
+            if len(stock_rows) < stock_limit:
+                stock_rows.append(row)
+            elif len(avail_rows) < avail_limit:
+                # overflow from stock → available
+                avail_rows.append(row)
+            else:
+                return stock_rows, avail_rows
+
+    # Phase 2: AVAILABLE suppliers
+    for s in avail_list:
+        for row in rows_by_supplier.get(s, []):
+            if len(avail_rows) < avail_limit:
+                avail_rows.append(row)
+            else:
+                return stock_rows, avail_rows
+
+    return stock_rows, avail_rows
+
+
+def render_entries(entries, fields, column_names, file_format):
+    """Render segment entries into CSV (utf-8-sig) or XLSX bytes."""
+    out = io.BytesIO()
+    if file_format == "xlsx":
+        decimal_idx = [i for i, f in enumerate(fields) if f in DECIMAL_FIELDS]
+        rows = []
+        for entry in entries:
+            values = list(entry[ENTRY_VALUES])
+            for i in decimal_idx:
+                if values[i] is not None:
+                    values[i] = Decimal(values[i])
+            rows.append(values)
+        write_xlsx_rows(out, rows, column_names, sheet_name="Sheet1")
+    else:
+        rows = (entry[ENTRY_VALUES] for entry in entries)
+        for _ in write_csv_rows(out, rows, column_names, encoding="utf-8-sig"):
+            pass
+    return out.getvalue()
+
+
+def content_type_for(filename):
+    return CSV_CONTENT_TYPE if filename.endswith(".csv") else XLSX_CONTENT_TYPE
+
+
+def run_platform_export(job):
+    """
+    Job handler for NetComponents / IC Source exports.
+    Builds the platform files, stores export.zip as a job artifact and
+    e-mails the files to the enabled platforms when the action asks for it.
+    """
+    params = job.params
+    file_format = params["file_format"]
+    action = params["action"]
+    nc_enabled = params["net_components_enabled"]
+    ics_enabled = params["ic_source_enabled"]
+    send_to_nc = action in ("send", "both") and nc_enabled
+    send_to_ics = action in ("send", "both") and ics_enabled
+
+    platform_fields = {}
+    if nc_enabled:
+        platform_fields[NETCOMPONENTS] = NC_FIELDS
+    if ics_enabled:
+        platform_fields[ICSOURCE] = ICS_FIELDS
+
+    # ---------- Refresh cached supplier segments (delta since last sync) ----------
+    job.set_progress(5, "Refreshing changed suppliers")
+    t0 = time.time()
+    all_suppliers = unique_suppliers(params)
+    if all_suppliers and platform_fields:
+        segments, segment_stats = refresh_segments(
+            platform_fields, all_suppliers, full=params.get("full_rebuild", False)
+        )
+    else:
+        segments, segment_stats = {}, {}
+    job.add_timing("segments", time.time() - t0)
+
+    files = []  # (platform, filename, content)
+    row_counts = {}
+
+    def add_file(platform, filename, entries, fields, columns):
+        row_counts[filename] = len(entries)
+        if entries:
+            files.append((platform, filename, render_entries(entries, fields, columns, file_format)))
+
+    # ---------- Build NC exports ----------
+    if nc_enabled:
+        job.set_progress(30, "Building NetComponents files")
+        t1 = time.time()
+        nc_stock_rows, nc_avail_rows = build_platform_rows(
+            segments[NETCOMPONENTS],
+            params["stock_suppliers"],
+            params["available_suppliers"],
+            params["max_nc_stock"],
+            params["max_nc_avail"],
+        )
+        add_file(NETCOMPONENTS, f"netcomponents_stock.{file_format}", nc_stock_rows, NC_FIELDS, NC_COLUMNS)
+        add_file(NETCOMPONENTS, f"netcomponents_available.{file_format}", nc_avail_rows, NC_FIELDS, NC_COLUMNS)
+        job.add_timing("netcomponents_files", time.time() - t1)
+
+    # ---------- Build ICS exports ----------
+    if ics_enabled:
+        job.set_progress(50, "Building IC Source files")
+        t2 = time.time()
+        ics_stock_rows, ics_avail_rows = build_platform_rows(
+            segments[ICSOURCE],
+            params["stock_suppliers"],
+            params["available_suppliers"],
+            params["max_ics_stock"],
+            params["max_ics_avail"],
+        )
+        add_file(ICSOURCE, f"icsource_stock.{file_format}", ics_stock_rows, ICS_FIELDS, ICS_COLUMNS)
+        add_file(ICSOURCE, f"icsource_available.{file_format}", ics_avail_rows, ICS_FIELDS, ICS_COLUMNS)
+        job.add_timing("icsource_files", time.time() - t2)
+
+    # ---------- Store export.zip so the files stay downloadable ----------
+    job.set_progress(70, "Saving export archive")
+    t3 = time.time()
+    with tempfile.TemporaryFile() as tmp:
+        with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as zf:
+            for _, filename, content in files:
+                zf.writestr(filename, content)
+        tmp.seek(0)
+        job.add_artifact("export.zip", tmp, "application/zip")
+    job.add_timing("archive", time.time() - t3)
+
+    # ---------- Send emails if needed ----------
+    emails_sent = []
+    for platform, enabled, email, template in (
+        (NETCOMPONENTS, send_to_nc, settings.NC_INVENTORY_UPDATE_EMAIL, "ncupdate"),
+        (ICSOURCE, send_to_ics, settings.ICS_INVENTORY_UPDATE_EMAIL, "icsupdate"),
+    ):
+        attachments = [
+            (filename, io.BytesIO(content), content_type_for(filename))
+            for (p, filename, content) in files if p == platform
+        ]
+        if not enabled or not attachments:
+            continue
+        job.set_progress(85, f"Sending {platform} email")
+        t4 = time.time()
+        if send_html_email(
+            data={"email": email, "my_company": settings.COMPANY_NAME},
+            template=template,
+            from_account="inventory",
+            attachments=attachments,
+        ) is None:
+            raise Exception(f"Failed to send {platform} email")
+        emails_sent.append(platform)
+        job.add_timing(f"email_{platform}", time.time() - t4)
+
+    system_settings = SystemSettings.get_solo()
+    system_settings.last_export_date = timezone.now()
+    system_settings.save(update_fields=["last_export_date", "updated_at"])
+
+    return {
+        "files": row_counts,
+        "emails_sent": emails_sent,
+        "suppliers": len(all_suppliers),
+        "segments": segment_stats,
+    }
@@ -0,0 +1,6 @@
+from django.urls import path
+from . import consumers
+
+websocket_urlpatterns = [
+    path('ws/inventory/uploads/<str:upload_id>/', consumers.InventoryUploadConsumer.as_asgi()),
+]
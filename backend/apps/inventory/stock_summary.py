@@ -0,0 +1,111 @@
+from django.conf import settings
+from django.db import connection
+from apps.common.mpn import normalize_mpn
+from .models import InventoryItem, StockSummary
+
+STOCK_SOURCE_STOCK = 'Stock'
+STOCK_SOURCE_MIXED = 'Stock & Available'
+STOCK_SOURCE_AVAILABLE = 'Available'
+
+
+def stock_supplier_key():
+    """settings.STOCK_SUPPLIER in the form suppliers are compared in (lowercase, no dashes/spaces)."""
+    return settings.STOCK_SUPPLIER.lower().replace("-", "").replace(" ", "")
+
+
+def _refresh_sql(keys_sql):
+    """
+    One statement that recomputes the summary rows of the keys returned by
+    keys_sql: keys without inventory are deleted, the rest are upserted.
+    """
+    summary = StockSummary._meta.db_table
+    inventory = InventoryItem._meta.db_table
+    is_stock = (
+        "position(%(stock_supplier)s IN lower(replace(replace(i.supplier, '-', ''), ' ', ''))) > 0"
+    )
+    return f"""
+        WITH keys AS ({keys_sql}),
+        removed AS (
+            DELETE FROM {summary} s
+            WHERE s.mpn_key IN (SELECT mpn_key FROM keys)
+              AND NOT EXISTS (SELECT 1 FROM {inventory} i WHERE i.mpn_key = s.mpn_key)
+        )
+        INSERT INTO {summary}
+            (mpn_key, mpn, manufacturer, total_quantity, row_count, suppliers, stock_source, updated_at)
+        SELECT
+            i.mpn_key,
+            MIN(i.mpn),
+            MAX(i.manufacturer),
+            SUM(i.quantity),
+            COUNT(*),
+            jsonb_agg(jsonb_build_object(
+                'supplier', i.supplier,
+                'quantity', i.quantity,
+                'cost', i.cost,
+                'date_code', i.date_code
+            ) ORDER BY i.id),
+            CASE
+                WHEN COUNT(*) = 1 AND bool_or({is_stock}) THEN '{STOCK_SOURCE_STOCK}'
+                WHEN bool_or({is_stock}) THEN '{STOCK_SOURCE_MIXED}'
+                ELSE '{STOCK_SOURCE_AVAILABLE}'
+            END,
+            now()
+        FROM {inventory} i
+        WHERE i.mpn_key IN (SELECT mpn_key FROM keys)
+        GROUP BY i.mpn_key
+        ON CONFLICT (mpn_key) DO UPDATE SET
+            mpn = EXCLUDED.mpn,
+            manufacturer = EXCLUDED.manufacturer,
+            total_quantity = EXCLUDED.total_quantity,
+            row_count = EXCLUDED.row_count,
+            suppliers = EXCLUDED.suppliers,
+            stock_source = EXCLUDED.stock_source,
+            updated_at = EXCLUDED.updated_at
+    """
+
+
+def refresh_stock_summary(mpn_keys, cursor=None):
+    """Recompute the summary of the given normalized MPNs (call after the inventory write)."""
+    mpn_keys = sorted({k for k in mpn_keys if k})
+    if not mpn_keys:
+        return
+    sql = _refresh_sql("SELECT unnest(%(keys)s::text[]) AS mpn_key")
+    params = {"keys": mpn_keys, "stock_supplier": stock_supplier_key()}
+    if cursor is not None:
+        cursor.execute(sql, params)
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def refresh_stock_summary_from(cursor, keys_sql):
+    """Same as refresh_stock_summary, with the keys coming from a query (e.g. a staging table)."""
+    cursor.execute(_refresh_sql(keys_sql), {"stock_supplier": stock_supplier_key()})
+
+
+def rebuild_stock_summary(cursor):
+    """Recompute every summary row from scratch."""
+    summary = StockSummary._meta.db_table
+    inventory = InventoryItem._meta.db_table
+    cursor.execute(f"DELETE FROM {summary}")
+    refresh_stock_summary_from(cursor, f"SELECT DISTINCT mpn_key FROM {inventory}")
+
+
+def stock_source_for(mpn):
+    """'Stock' / 'Stock & Available' / 'Available' for an MPN, or None when it is not in inventory."""
+    return (
+        StockSummary.objects
+        .filter(mpn_key=normalize_mpn(mpn))
+        .values_list('stock_source', flat=True)
+        .first()
+    )
+
+
+def stock_sources_for(mpns):
+    """{normalized mpn: stock source} for many MPNs in one query; MPNs not in inventory are absent."""
+    keys = {normalize_mpn(mpn) for mpn in mpns} - {""}
+    return dict(
+        StockSummary.objects
+        .filter(mpn_key__in=keys)
+        .values_list('mpn_key', 'stock_source')
+    )
@@ -1,3 +1,138 @@
-from django.test import TestCase
+from django.db.models import Q
+from django.test import SimpleTestCase
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from apps.common.mpn import MPN_KEY_SQL, MPN_STRIP_RE, MpnKeyField, normalize_mpn
+from apps.common.pagination import KeysetPagination
+from .models import InventoryItem
 
-# Create your tests here.
+
+def _matches(q, row):
+    """Evaluate the Q objects KeysetPagination builds against a dict row."""
+    results = []
+    for child in q.children:
+        if isinstance(child, Q):
+            results.append(_matches(child, row))
+            continue
+        key, value = child
+        field, _, lookup = key.partition("__")
+        current = row["id" if field == "pk" else field]
+        results.append({
+            "exact": lambda: current == value,
+            "gt": lambda: current is not None and current > value,
+            "lt": lambda: current is not None and current < value,
+            "isnull": lambda: (current is None) == value,
+            "in": lambda: current in value,
+        }[lookup or "exact"]())
+    matched = all(results) if q.connector == Q.AND else any(results)
+    return not matched if q.negated else matched
+
+
+def _postgres_sorted(rows, ordering):
+    """Rows in Postgres order: NULLs last ascending, first descending."""
+    for field, descending in reversed(ordering):
+        present = sorted((r for r in rows if r[field] is not None), key=lambda r: r[field], reverse=descending)
+        missing = [r for r in rows if r[field] is None]
+        rows = missing + present if descending else present + missing
+    return rows
+
+
+class NormalizeMpnTests(SimpleTestCase):
+    def test_case_and_punctuation_are_ignored(self):
+        for raw in ("LM317-T", "lm317t", " LM 317/T ", "lm.317_t"):
+            with self.subTest(raw=raw):
+                self.assertEqual(normalize_mpn(raw), "LM317T")
+
+    def test_empty_values(self):
+        for raw in (None, "", " - / "):
+            with self.subTest(raw=raw):
+                self.assertEqual(normalize_mpn(raw), "")
+
+    def test_non_strings_are_normalized_as_text(self):
+        self.assertEqual(normalize_mpn(74040), "74040")
+
+    def test_sql_twin_strips_the_same_characters(self):
+        self.assertIn(f"'{MPN_STRIP_RE.pattern}'", MPN_KEY_SQL)
+
+    def test_mpn_key_is_filled_on_save(self):
+        item = InventoryItem(mpn="sn74-hc595 n")
+        field = InventoryItem._meta.get_field("mpn_key")
+
+        self.assertEqual(field.pre_save(item, add=True), "SN74HC595N")
+        self.assertEqual(item.mpn_key, "SN74HC595N")
+
+    def test_deconstruct_keeps_only_a_custom_source(self):
+        _, _, _, kwargs = MpnKeyField().deconstruct()
+        self.assertNotIn("editable", kwargs)
+        self.assertNotIn("source", kwargs)
+
+        _, _, _, kwargs = MpnKeyField(source="part_number").deconstruct()
+        self.assertEqual(kwargs["source"], "part_number")
+
+
+class KeysetPaginationTests(SimpleTestCase):
+    def setUp(self):
+        self.paginator = KeysetPagination()
+
+    def _request(self, **params):
+        return Request(APIRequestFactory().get("/api/inventory/", params))
+
+    def test_ordering_ends_with_id(self):
+        queryset = InventoryItem.objects.order_by("-price", "mpn")
+
+        self.assertEqual(
+            self.paginator._ordering(queryset),
+            [("price", True), ("mpn", False), ("id", False)],
+        )
+
+    def test_ordering_stops_at_pk_and_defaults_to_id(self):
+        self.assertEqual(
+            self.paginator._ordering(InventoryItem.objects.order_by("-pk", "mpn")),
+            [("id", True)],
+        )
+        self.assertEqual(self.paginator._ordering(InventoryItem.objects.all()), [("id", False)])
+
+    def test_cursor_round_trip(self):
+        ordering = [("price", True), ("id", False)]
+        token = self.paginator.encode_cursor(ordering, {"price": "1.50", "id": 7})
+
+        self.assertEqual(self.paginator.decode_cursor(token, ordering), ["1.50", 7])
+
+    def test_cursor_rejects_another_sort_order_or_garbage(self):
+        token = self.paginator.encode_cursor([("price", True), ("id", False)], {"price": "1.50", "id": 7})
+
+        with self.assertRaises(ValidationError):
+            self.paginator.decode_cursor(token, [("price", False), ("id", False)])
+        with self.assertRaises(ValidationError):
+            self.paginator.decode_cursor("not-a-cursor", [("id", False)])
+
+    def test_seek_returns_exactly_the_rows_after_the_cursor(self):
+        rows = [
+            {"id": n, "price": price, "mpn": mpn}
+            for n, (price, mpn) in enumerate(
+                [(5, "B"), (None, "A"), (5, "A"), (1, None), (None, "C"), (3, "A"), (5, "A"), (1, "B")],
+                start=1,
+            )
+        ]
+        for ordering in (
+            [("price", False), ("mpn", False), ("id", False)],
+            [("price", True), ("mpn", False), ("id", False)],
+            [("mpn", True), ("price", False), ("id", True)],
+        ):
+            expected = _postgres_sorted(rows, ordering)
+            for position, cursor_row in enumerate(expected):
+                seek = self.paginator._seek(ordering, [cursor_row[f] for f, _ in ordering])
+                after = [r for r in expected if _matches(seek, r)]
+                with self.subTest(ordering=ordering, cursor=cursor_row["id"]):
+                    self.assertEqual(after, expected[position + 1:])
+
+    def test_page_size_from_block_bounds_is_capped(self):
+        self.assertEqual(self.paginator._page_size(self._request(startRow=100, endRow=200)), 100)
+        self.assertEqual(self.paginator._page_size(self._request(page_size=5000)), 1000)
+        self.assertEqual(self.paginator._page_size(self._request()), 100)
+        with self.assertRaises(ValidationError):
+            self.paginator._page_size(self._request(page_size="many"))
+
+    def test_list_stays_unpaginated_without_paging_params(self):
+        self.assertIsNone(self.paginator.paginate_queryset(InventoryItem.objects.all(), self._request()))
@@ -0,0 +1,386 @@
+import io
+import logging
+import numpy as np
+import openpyxl
+import pandas as pd
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import connection, transaction
+from apps.common.mpn import MPN_STRIP_RE
+from .consumers import upload_group
+from .models import InventoryItem
+from .stock_summary import refresh_stock_summary_from
+
+logger = logging.getLogger('myapp')
+
+# model field -> (column in the uploaded sheet, type)
+UPLOAD_COLUMNS = {
+    "mpn":          ("mpn", "str"),
+    "quantity":     ("quantity", "int"),
+    "supplier":     ("supplier", "str"),
+    "manufacturer": ("manufacturer", "str"),
+    "location":     ("location", "str"),
+    "description":  ("description", "str"),
+    "date_code":    ("dc", "str"),
+    "price":        ("price", "decimal"),
+    "cost":         ("cost", "decimal"),
+    "break_qty_a":  ("break_qty_a", "int"),
+    "price_a":      ("price_a", "decimal"),
+    "url":          ("url", "str"),
+    "notes":        ("notes", "str"),
+}
+UPLOAD_FIELDS = list(UPLOAD_COLUMNS)
+# columns written to the staging table / inventory (mpn_key is derived from mpn)
+STAGED_FIELDS = UPLOAD_FIELDS + ["mpn_key"]
+REQUIRED_FIELDS = ["mpn", "quantity", "supplier"]
+
+INT_MIN, INT_MAX = -2**31, 2**31 - 1
+
+STAGING_TABLE = "inventory_upload_staging"
+
+# rows parsed, validated and loaded per step
+UPLOAD_BATCH_SIZE = 5000
+
+
+# ---------- streaming parsers ----------
+def _header_names(header):
+    return [
+        str(name).strip() if name is not None else f"Unnamed: {i}"
+        for i, name in enumerate(header)
+    ]
+
+
+def iter_xlsx_batches(workbook, worksheet, batch_size=UPLOAD_BATCH_SIZE):
+    """
+    Yield DataFrames of batch_size rows from a read-only worksheet.
+    The index is the row position under the header (same as pd.read_excel),
+    so error rows still map to sheet rows; completely empty rows are skipped.
+    """
+    try:
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = _header_names(header)
+        batch, index = [], []
+        for position, row in enumerate(rows):
+            if all(value is None for value in row):
+                continue
+            # short rows (trailing empty cells) are padded by the DataFrame constructor
+            batch.append(row[:len(columns)])
+            index.append(position)
+            if len(batch) >= batch_size:
+                yield pd.DataFrame(batch, columns=columns, index=index, dtype=object)
+                batch, index = [], []
+        if batch:
+            yield pd.DataFrame(batch, columns=columns, index=index, dtype=object)
+    finally:
+        workbook.close()
+
+
+def iter_csv_batches(fileobj, batch_size=UPLOAD_BATCH_SIZE):
+    """Yield DataFrames of batch_size rows from a CSV file (all cells read as text)."""
+    reader = pd.read_csv(fileobj, chunksize=batch_size, dtype=str, encoding="utf-8-sig")
+    with reader:
+        for chunk in reader:
+            chunk.columns = _header_names(chunk.columns)
+            yield chunk
+
+
+def open_upload(file, batch_size=UPLOAD_BATCH_SIZE):
+    """
+    Returns (estimated_total_rows or None, iterator of DataFrame batches)
+    for an uploaded .csv or .xlsx file.
+    """
+    if (file.name or "").lower().endswith(".csv"):
+        return None, iter_csv_batches(file, batch_size)
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    worksheet = workbook.worksheets[0]
+    total = worksheet.max_row - 1 if worksheet.max_row else None
+    return total, iter_xlsx_batches(workbook, worksheet, batch_size)
+
+
+def _field_limits(field_name):
+    field = InventoryItem._meta.get_field(field_name)
+    max_length = getattr(field, "max_length", None)
+    decimal_limit = None
+    if getattr(field, "max_digits", None):
+        decimal_limit = 10 ** (field.max_digits - field.decimal_places)
+    return max_length, decimal_limit
+
+
+def _blank_mask(raw):
+    """NaN / None / whitespace-only cells count as empty."""
+    blank = raw.isna()
+    if raw.dtype == object:
+        blank |= raw.astype(str).str.strip().eq("") & ~blank
+    return blank
+
+
+def validate_frame(df):
+    """
+    Column-wise validation and coercion of an uploaded sheet.
+
+    Returns (clean, errors): `clean` holds the valid rows with model field names
+    as columns (nulls for empty cells), `errors` is a list of
+    {"row": <sheet index>, "error": <first problem found in that row>}.
+    """
+    index = df.index
+    clean = pd.DataFrame(index=index)
+    error = pd.Series(None, index=index, dtype=object)
+    blanks = {}
+
+    def flag(mask, message):
+        mask = mask & error.isna()
+        if mask.any():
+            error[mask] = message if isinstance(message, str) else message[mask]
+
+    for field, (column, kind) in UPLOAD_COLUMNS.items():
+        raw = df[column] if column in df.columns else pd.Series(np.nan, index=index, dtype=object)
+        blank = _blank_mask(raw)
+        blanks[field] = blank
+        max_length, decimal_limit = _field_limits(field)
+
+        if kind == "str":
+            values = raw.where(~blank).astype(object)
+            values[~blank] = raw[~blank].astype(str).str.strip()
+            if max_length:
+                flag(values.str.len().gt(max_length), f"{field} exceeds {max_length} characters")
+            clean[field] = values.where(~blank, None)
+            continue
+
+        numbers = pd.to_numeric(raw.where(~blank), errors="coerce").astype(float)
+        invalid = ~blank & (numbers.isna() | ~np.isfinite(numbers.fillna(0)))
+        flag(invalid, f"Invalid {field} value: " + raw.astype(str))
+
+        if kind == "int":
+            numbers = np.trunc(numbers)
+            flag(~invalid & ((numbers < INT_MIN) | (numbers > INT_MAX)), f"{field} out of range")
+            clean[field] = numbers.where(~invalid).astype("Int64")
+        else:
+            flag(~invalid & numbers.abs().ge(decimal_limit), f"{field} out of range")
+            clean[field] = numbers.where(~invalid)
+
+    # same normalization as apps.common.mpn.normalize_mpn, column-wise
+    clean["mpn_key"] = clean["mpn"].fillna("").str.replace(MPN_STRIP_RE, "", regex=True).str.upper()
+
+    # required fields take precedence over any other problem in the row
+    missing_required = np.logical_or.reduce([blanks[f] for f in REQUIRED_FIELDS])
+    error[missing_required] = "MPN, quantity, and supplier are required fields"
+
+    failed = error.notna()
+    errors = [{"row": int(row), "error": message} for row, message in error[failed].items()]
+    return clean[~failed], errors
+
+
+def create_staging(cursor):
+    """
+    Temp table for COPY-loaded rows (dropped on commit); row_no keeps the
+    sheet position. Must run inside a transaction.
+    """
+    table = InventoryItem._meta.db_table
+    columns = ", ".join(STAGED_FIELDS)
+    cursor.execute(
+        f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} ON COMMIT DROP "
+        f"AS SELECT 0::bigint AS row_no, {columns} FROM {table} WITH NO DATA"
+    )
+    cursor.execute(f"TRUNCATE {STAGING_TABLE}")
+
+
+def copy_batch(cursor, clean):
+    """COPY a validated batch into the staging table."""
+    if clean.empty:
+        return
+    buffer = io.StringIO()
+    clean[STAGED_FIELDS].to_csv(buffer, header=False)
+    buffer.seek(0)
+    columns = ", ".join(STAGED_FIELDS)
+    # unquoted empty field -> NULL (blank strings were already turned into nulls)
+    cursor.copy_expert(f"COPY {STAGING_TABLE} (row_no, {columns}) FROM STDIN WITH (FORMAT csv, NULL '')", buffer)
+
+
+def insert_frame(clean):
+    """Append validated rows to the inventory (COPY -> staging -> INSERT ... SELECT)."""
+    if clean.empty:
+        return 0
+    table = InventoryItem._meta.db_table
+    columns = ", ".join(STAGED_FIELDS)
+    with transaction.atomic(), connection.cursor() as cursor:
+        create_staging(cursor)
+        copy_batch(cursor, clean)
+        cursor.execute(
+            f"INSERT INTO {table} ({columns}, created_at, updated_at) "
+            f"SELECT {columns}, now(), now() FROM {STAGING_TABLE}"
+        )
+        inserted = cursor.rowcount
+        refresh_stock_summary_from(cursor, f"SELECT DISTINCT mpn_key FROM {STAGING_TABLE}")
+        return inserted
+
+
+# ---------- replace-by-supplier mode ----------
+NATURAL_KEY = ["mpn", "supplier", "date_code", "location"]
+VALUE_FIELDS = [f for f in UPLOAD_FIELDS if f not in NATURAL_KEY]
+
+MATCH_TABLE = "inventory_upload_matches"
+AFFECTED_KEYS_TABLE = "inventory_upload_affected_keys"
+
+
+def _key_join(left, right):
+    return " AND ".join(
+        f"{left}.{f} = {right}.{f}" if f in ("mpn", "supplier")
+        else f"COALESCE({left}.{f}, '') = COALESCE({right}.{f}, '')"
+        for f in NATURAL_KEY
+    )
+
+
+def merge_staged_snapshot(cursor):
+    """
+    Make the inventory of every supplier in the staging table equal to the staged rows.
+
+    Rows are matched on (mpn, supplier, date_code, location): matched rows whose
+    values differ are updated, unmatched uploaded rows are inserted and current
+    rows missing from the file are deleted - all in one transaction, so the
+    supplier never shows up without stock. Unchanged rows are not touched
+    (their updated_at stays, which keeps delta exports small).
+    Duplicate keys in the file: the last row wins.
+    Runs on the caller's cursor, inside its transaction. Returns the diff counts.
+    """
+    counts = {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0, "duplicates": 0}
+    table = InventoryItem._meta.db_table
+    columns = ", ".join(STAGED_FIELDS)
+    key_order = ", ".join(
+        f if f in ("mpn", "supplier") else f"COALESCE({f}, '')" for f in NATURAL_KEY
+    )
+    changed = " OR ".join(f"i.{f} IS DISTINCT FROM m.{f}" for f in VALUE_FIELDS)
+    assignments = ", ".join(f"{f} = m.{f}" for f in VALUE_FIELDS)
+
+    # serialize concurrent replaces of the same supplier
+    cursor.execute(
+        f"SELECT pg_advisory_xact_lock(hashtext(supplier)) "
+        f"FROM (SELECT DISTINCT supplier FROM {STAGING_TABLE} ORDER BY supplier) s"
+    )
+
+    # MPNs whose stock summary can change: everything the file or the replaced suppliers hold
+    cursor.execute(f"DROP TABLE IF EXISTS {AFFECTED_KEYS_TABLE}")
+    cursor.execute(
+        f"CREATE TEMP TABLE {AFFECTED_KEYS_TABLE} ON COMMIT DROP AS "
+        f"SELECT mpn_key FROM {table} WHERE supplier IN (SELECT DISTINCT supplier FROM {STAGING_TABLE}) "
+        f"UNION SELECT mpn_key FROM {STAGING_TABLE}"
+    )
+
+    # uploaded rows (last one per key) + id of the current row with the same key (if any)
+    cursor.execute(f"DROP TABLE IF EXISTS {MATCH_TABLE}")
+    cursor.execute(
+        f"CREATE TEMP TABLE {MATCH_TABLE} ON COMMIT DROP AS "
+        f"WITH uploaded AS ("
+        f"  SELECT DISTINCT ON ({key_order}) * FROM {STAGING_TABLE} "
+        f"  ORDER BY {key_order}, row_no DESC"
+        f"), current_rows AS ("
+        f"  SELECT DISTINCT ON ({key_order}) id, {', '.join(NATURAL_KEY)} FROM {table} "
+        f"  WHERE supplier IN (SELECT DISTINCT supplier FROM {STAGING_TABLE}) "
+        f"  ORDER BY {key_order}, id"
+        f") "
+        f"SELECT u.*, c.id AS item_id FROM uploaded u "
+        f"LEFT JOIN current_rows c ON {_key_join('c', 'u')}"
+    )
+    cursor.execute(f"SELECT (SELECT count(*) FROM {STAGING_TABLE}), (SELECT count(*) FROM {MATCH_TABLE})")
+    staged, distinct = cursor.fetchone()
+    counts["duplicates"] = staged - distinct
+
+    cursor.execute(
+        f"UPDATE {table} i SET {assignments}, updated_at = now() "
+        f"FROM {MATCH_TABLE} m WHERE i.id = m.item_id AND ({changed})"
+    )
+    counts["updated"] = cursor.rowcount
+
+    # current rows that are not in the file (including duplicates of matched keys)
+    cursor.execute(
+        f"DELETE FROM {table} i "
+        f"WHERE i.supplier IN (SELECT DISTINCT supplier FROM {STAGING_TABLE}) "
+        f"AND NOT EXISTS (SELECT 1 FROM {MATCH_TABLE} m WHERE m.item_id = i.id)"
+    )
+    counts["deleted"] = cursor.rowcount
+
+    cursor.execute(
+        f"INSERT INTO {table} ({columns}, created_at, updated_at) "
+        f"SELECT {columns}, now(), now() FROM {MATCH_TABLE} WHERE item_id IS NULL"
+    )
+    counts["inserted"] = cursor.rowcount
+
+    if counts["inserted"] or counts["updated"] or counts["deleted"]:
+        refresh_stock_summary_from(cursor, f"SELECT mpn_key FROM {AFFECTED_KEYS_TABLE}")
+
+    counts["unchanged"] = distinct - counts["inserted"] - counts["updated"]
+    return counts
+
+
+# ---------- upload driver ----------
+def upload_progress_notifier(upload_id, user):
+    """Callback that pushes progress to the user's ws/inventory/uploads/<upload_id>/ (None without an id)."""
+    if not upload_id or not (user and user.is_authenticated):
+        return None
+    channel_layer = get_channel_layer()
+    group = upload_group(user.id, upload_id)
+
+    def notify(progress):
+        try:
+            async_to_sync(channel_layer.group_send)(group, {
+                "type": "send_upload_progress",
+                "message": progress,
+            })
+        except Exception as e:
+            logger.error(f"Error sending upload progress: {e}")
+
+    return notify
+
+
+def import_upload(batches, mode="append", total=None, on_progress=None):
+    """
+    Validate and load uploaded batches as they are parsed.
+
+    append:  every batch is inserted on its own (rows of earlier batches stay
+             even if a later batch fails, like the chunked bulk_create did).
+    replace: batches are COPYed into one staging table and merged at the end in
+             a single transaction; nothing changes if any row is invalid.
+    """
+    result = {"success_count": 0, "failed_count": 0, "failed_details": []}
+    processed = 0
+
+    def report(done=False):
+        if on_progress:
+            on_progress({
+                "processed": processed,
+                "total": total,
+                "success_count": result["success_count"],
+                "failed_count": len(result["failed_details"]),
+                "done": done,
+            })
+
+    if mode == "replace":
+        with transaction.atomic(), connection.cursor() as cursor:
+            create_staging(cursor)
+            for df in batches:
+                clean, errors = validate_frame(df)
+                processed += len(df)
+                result["failed_details"] += errors
+                if not result["failed_details"]:
+                    copy_batch(cursor, clean)
+                    result["success_count"] += len(clean)
+                report()
+            if result["failed_details"]:
+                result["success_count"] = 0
+            else:
+                diff = merge_staged_snapshot(cursor)
+                result["success_count"] -= diff["duplicates"]
+                result.update(diff)
+    else:
+        for df in batches:
+            clean, errors = validate_frame(df)
+            processed += len(df)
+            result["success_count"] += insert_frame(clean)
+            result["failed_details"] += errors
+            report()
+
+    result["failed_count"] = len(result["failed_details"])
+    report(done=True)
+    return result
@@ -9,6 +9,7 @@ urlpatterns = [
     path('inventory/upload/', BulkUploadView.as_view(), name='bulk-upload'),
     path('inventory/search/<path:mpn>/', search_parts, name='search-parts'),
     path('inventory/search-similar/<path:mpn>/', search_similar_parts, name='search-similar-parts'),
+    path('inventory/mpn-typeahead/', mpn_typeahead, name='mpn-typeahead'),
     path('inventory/suppliers/', get_suppliers, name='get-suppliers'),
     path('inventory/export/', export_inventory, name='export-data'),
     path("inventory/export/platforms/", export_inventory, name="export_platforms"),
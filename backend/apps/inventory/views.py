@@ -1,28 +1,53 @@
+import json
 import math
 from rest_framework import viewsets
-from .models import InventoryItem
+from .models import InventoryItem, StockSummary
 from apps.system_settings.models import SystemSettings
 from .serializers import InventoryItemSerializer
-import pandas as pd
+from .utils import streaming_zip_response
+from .upload import open_upload, import_upload, upload_progress_notifier
+from .stock_summary import refresh_stock_summary
+from .platform_export import (
+    PLATFORM_EXPORT_JOB,
+    PLATFORM_EXPORT_HANDLER,
+    params_from_payload,
+    params_from_system_settings,
+)
+from apps.jobs.utils import enqueue_job
+from apps.common.mpn import normalize_mpn
+from apps.common.grid import GridFilterBackend
+from apps.common.pagination import KeysetPagination
+from apps.archive.models import ArchivedInventory
+from apps.orders.models import OrderItem
+from apps.quotes.models import QuoteItem
+from apps.rfqs.models import RFQ
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView # import the APIView class for handling file uploads
 from rest_framework.decorators import api_view
+from rest_framework.settings import api_settings
 from rest_framework.parsers import MultiPartParser, FormParser, FileUploadParser
-from django.db import connection
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
 import logging
-from utils.email_utils import send_html_email
-from django.http import HttpResponse
 from django.db.models import Case, When
-from django.conf import settings
-import zipfile
-import pandas as pd
-import io
 import time
-from decimal import Decimal
 
 logger = logging.getLogger('myapp')
 
+TYPEAHEAD_LIMIT = 10
+TYPEAHEAD_MIN_PREFIX = 2
+TYPEAHEAD_SOURCES = [
+    ("inventory", InventoryItem),
+    ("archive", ArchivedInventory),
+    ("rfqs", RFQ),
+    ("quotes", QuoteItem),
+    ("orders", OrderItem),
+]
+
+SIMILAR_PARTS_LIMIT = 10
+
 # ---- shared download fields  ----
 DB_FIELDS = [
     "mpn",
@@ -49,41 +74,6 @@ DOWNLOAD_COLUMNS = [
 ]
 
 
-def _df_from_queryset(qs, fields, columns):
-    rows = list(qs.values(*fields))
-    df = pd.DataFrame(rows)
-    # Ensure all columns exist (even if queryset returned empty)
-    for f in fields:
-        if f not in df.columns:
-            df[f] = None
-    df = df[fields]
-    df.columns = columns
-    return df
-
-
-def _zip_single_file_response(df: pd.DataFrame, base_name: str, format_type: str):
-    """
-    Returns a ZIP (export.zip) that contains a single file: {base_name}.{csv|xlsx}
-    """
-    zip_buffer = io.BytesIO()
-    ext = "xlsx" if format_type == "xlsx" else "csv"
-    filename = f"{base_name}.{ext}"
-
-    with zipfile.ZipFile(zip_buffer, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-        if format_type == "xlsx":
-            file_buffer = io.BytesIO()
-            with pd.ExcelWriter(file_buffer, engine="openpyxl") as writer:
-                df.to_excel(writer, index=False, sheet_name="Inventory")
-            zf.writestr(filename, file_buffer.getvalue())
-        else:
-            zf.writestr(filename, df.to_csv(index=False))
-
-    zip_buffer.seek(0)
-    resp = HttpResponse(zip_buffer.getvalue(), content_type="application/zip")
-    resp["Content-Disposition"] = 'attachment; filename="export.zip"'
-    return resp
-
-
 @api_view(["POST"])
 def download_inventory_all(request):
     """
@@ -94,8 +84,7 @@ def download_inventory_all(request):
     fmt = data.get("fileFormat", "csv")
 
     qs = InventoryItem.objects.all().order_by("id")
-    df = _df_from_queryset(qs, DB_FIELDS, DOWNLOAD_COLUMNS)
-    return _zip_single_file_response(df, "inventory_all", fmt)
+    return streaming_zip_response(request, qs, DB_FIELDS, DOWNLOAD_COLUMNS, "inventory_all", fmt)
 
 
 @api_view(["POST"])
@@ -112,8 +101,7 @@ def download_inventory_suppliers(request):
         return Response({"error": "No suppliers provided"}, status=400)
 
     qs = InventoryItem.objects.filter(supplier__in=suppliers).order_by("supplier", "id")
-    df = _df_from_queryset(qs, DB_FIELDS, DOWNLOAD_COLUMNS)
-    return _zip_single_file_response(df, "inventory_suppliers", fmt)
+    return streaming_zip_response(request, qs, DB_FIELDS, DOWNLOAD_COLUMNS, "inventory_suppliers", fmt)
 
 
 @api_view(["POST"])
@@ -130,19 +118,17 @@ def download_inventory_selected(request):
         return Response({"error": "No ids provided"}, status=400)
 
     qs = InventoryItem.objects.filter(id__in=ids_list).order_by("id")
-    df = _df_from_queryset(qs, DB_FIELDS, DOWNLOAD_COLUMNS)
-    return _zip_single_file_response(df, "inventory_selected_rows", fmt)
+    return streaming_zip_response(request, qs, DB_FIELDS, DOWNLOAD_COLUMNS, "inventory_selected_rows", fmt)
 
 # search_parts view to search for parts by MPN
 @api_view(['GET'])
 def search_parts(request, mpn):
     """
     Search for parts in the inventory by MPN.
-    Return all parts that match the exact MPN.
+    Return all parts that match the MPN, ignoring case, dashes and spaces.
     """
     try:
-        print(f"Searching for parts with MPN: {mpn}")
-        items = InventoryItem.objects.filter(mpn=mpn)
+        items = InventoryItem.objects.filter(mpn_key=normalize_mpn(mpn))
         serializer = InventoryItemSerializer(items, many=True)
         return Response(serializer.data)
     except InventoryItem.DoesNotExist:
@@ -152,37 +138,107 @@ def search_parts(request, mpn):
 @api_view(['GET'])
 def search_similar_parts(request, mpn):
     """
-    Search for similar parts based on MPN similarity using raw SQL.
+    Search for similar parts based on MPN trigram similarity.
+    Query params: threshold (0-1, default settings.INVENTORY_SIMILARITY_THRESHOLD), limit (default 10).
+
+    Reads the per-MPN stock summary: the `%` filter and the `<->` KNN ordering
+    are served by its GiST trigram index, and the per-supplier breakdown is
+    already aggregated there.
     """
-    query = """
+    try:
+        threshold = float(request.query_params.get('threshold', settings.INVENTORY_SIMILARITY_THRESHOLD))
+        limit = int(request.query_params.get('limit', SIMILAR_PARTS_LIMIT))
+    except ValueError:
+        return Response({"error": "Invalid threshold or limit"}, status=400)
+    threshold = min(max(threshold, 0.0), 1.0)
+    limit = min(max(limit, 1), 100)
+
+    query = f"""
         SELECT 
             mpn,
-            SUM(quantity) AS total_quantity,
-            STRING_AGG(supplier || '(' || quantity || ')', ', ') AS supplier_quantities,
-            STRING_AGG(supplier || '(' || date_code || ')', ', ') AS supplier_dc,
-            STRING_AGG(supplier || '(' || cost || ')', ', ') AS supplier_cost,
-            MAX(manufacturer) AS manufacturer,
-            similarity(mpn, %s) AS similarity_score
+            total_quantity,
+            suppliers,
+            manufacturer,
+            similarity(mpn, %(mpn)s) AS similarity_score
         FROM 
-            inventory_inventoryitem
+            {StockSummary._meta.db_table}
         WHERE 
-            similarity(mpn, %s) > 0.5
-        GROUP BY 
-            mpn
+            mpn %% %(mpn)s
         ORDER BY 
-            similarity_score DESC
-        LIMIT 10;
+            mpn <-> %(mpn)s, mpn
+        LIMIT %(limit)s;
+    """
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            # threshold used by `%` for this transaction only (same as set_limit, but scoped)
+            cursor.execute("SELECT set_config('pg_trgm.similarity_threshold', %s, true)", [str(threshold)])
+            cursor.execute(query, {"mpn": mpn, "limit": limit})
+            rows = cursor.fetchall()
+    except Exception as e:
+        return Response({"error": str(e)}, status=500)
+
+    def per_supplier(suppliers, key):
+        # "A(10), B(5)" - suppliers without a value are skipped
+        return ", ".join(f"{s['supplier']}({s[key]})" for s in suppliers if s[key] is not None) or None
+
+    results = []
+    for mpn_value, total_quantity, suppliers, manufacturer, score in rows:
+        if isinstance(suppliers, str):
+            suppliers = json.loads(suppliers)
+        results.append({
+            "mpn": mpn_value,
+            "total_quantity": total_quantity,
+            "supplier_quantities": per_supplier(suppliers, "quantity"),
+            "supplier_dc": per_supplier(suppliers, "date_code"),
+            "supplier_cost": per_supplier(suppliers, "cost"),
+            "manufacturer": manufacturer,
+            "similarity_score": score,
+        })
+    return Response(results, status=200)
+
+# mpn_typeahead view for prefix search over every table that stores an MPN
+@api_view(['GET'])
+def mpn_typeahead(request):
+    """
+    Prefix search on the normalized MPN across inventory, archive, RFQs,
+    quotes and orders, in one round trip.
+    Query params: q (at least 2 characters after normalization), limit (default 10).
+    Returns [{mpn_key, mpn, sources: {inventory: <rows>, rfqs: <rows>, ...}}] ordered by mpn_key.
+    """
+    prefix = normalize_mpn(request.query_params.get('q', ''))
+    try:
+        limit = min(max(int(request.query_params.get('limit', TYPEAHEAD_LIMIT)), 1), 50)
+    except ValueError:
+        return Response({"error": "Invalid limit"}, status=400)
+    if len(prefix) < TYPEAHEAD_MIN_PREFIX:
+        return Response({"results": []}, status=200)
+
+    # each branch is a range scan on its mpn_key text_pattern_ops index
+    # (the key only holds [A-Z0-9], so it needs no LIKE escaping)
+    branch = """
+        (SELECT %s AS source, mpn_key, MIN(mpn) AS mpn, COUNT(*) AS matches
+         FROM {table} WHERE mpn_key LIKE %s
+         GROUP BY mpn_key ORDER BY mpn_key LIMIT %s)
     """
+    query = " UNION ALL ".join(branch.format(table=model._meta.db_table) for _, model in TYPEAHEAD_SOURCES)
+    params = []
+    for source, _ in TYPEAHEAD_SOURCES:
+        params += [source, prefix + '%', limit]
+
     try:
         with connection.cursor() as cursor:
-            cursor.execute(query, [mpn, mpn])
-            columns = [col[0] for col in cursor.description]
-            results = [dict(zip(columns, row)) for row in cursor.fetchall()]
-        
-        return Response(results, status=200)
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
     except Exception as e:
         return Response({"error": str(e)}, status=500)
 
+    merged = {}
+    for source, key, mpn, matches in rows:
+        entry = merged.setdefault(key, {"mpn_key": key, "mpn": mpn, "sources": {}})
+        entry["sources"][source] = matches
+    results = [merged[key] for key in sorted(merged)[:limit]]
+    return Response({"results": results}, status=200)
+
 # get_suppliers view to get a list of unique suppliers
 @api_view(['GET'])
 def get_suppliers(request):
@@ -220,7 +276,12 @@ def bulk_delete_inventory(request):
     if not ids_to_delete:
         return Response({"error": "No IDs provided"}, status=400)
     try:
-        deleted_count, _ = InventoryItem.objects.filter(id__in=ids_to_delete).delete()
+        # the summary is refreshed in the same transaction, so a failure can't leave it stale
+        with transaction.atomic():
+            items = InventoryItem.objects.filter(id__in=ids_to_delete)
+            mpn_keys = set(items.values_list("mpn_key", flat=True))
+            deleted_count, _ = items.delete()
+            refresh_stock_summary(mpn_keys)
         return Response({"success": f"Deleted {deleted_count} items successfully"}, status=200)
     except Exception as e:
         return Response({"error": str(e)}, status=500)
@@ -240,7 +301,15 @@ def bulk_edit_inventory(request):
         return Response({"error": "No Fields to update provided"}, status=400)
     print(f"Updating items with IDs: {ids_to_edit} with updates: {updates}")
     try:
-        updated_count = InventoryItem.objects.filter(id__in=ids_to_edit).update(**updates)
+        # QuerySet.update() skips auto_now and pre_save; bump it so delta exports pick the rows up
+        updates["updated_at"] = timezone.now()
+        if "mpn" in updates:
+            updates["mpn_key"] = normalize_mpn(updates["mpn"])
+        with transaction.atomic():
+            items = InventoryItem.objects.filter(id__in=ids_to_edit)
+            mpn_keys = set(items.values_list("mpn_key", flat=True))
+            updated_count = items.update(**updates)
+            refresh_stock_summary(mpn_keys | {updates.get("mpn_key")})
         return Response({"success": f"Updated {updated_count} items successfully"}, status=200)
     except Exception as e:
         return Response({"error": str(e)}, status=500)
@@ -249,23 +318,16 @@ def bulk_edit_inventory(request):
 @api_view(['POST'])
 def export_inventory(request):
     """
-    Export inventory data to a CSV/Excel file using Pandas.
-    Supports NetComponents and IC Source exports.
-    Can be triggered from the web or Make.com.
+    Queue a NetComponents / IC Source export as a background job.
+    Can be triggered from the web or Make.com; both return the job id right away.
+    Poll GET /api/jobs/<id>/ and download the files from /api/jobs/<id>/download/.
 
-    NEW:
     - Use separate stockSuppliers and availableSuppliers lists.
     - For each platform (NC/ICS): fill stock first, overflow to available,
       then process available suppliers.
     """
-    start_time = time.time()
-    print("Starting export process...")
-
-    # ---------- Parse input / system settings ----------
-
     data = request.data
     source = data.get("source", "web") # "web" | "make"
-    action = data.get("action", "send")  # "send" | "download" | "both"
 
     # When triggered from Make.com – read from SystemSettings
     if source == "make":
@@ -276,402 +338,101 @@ def export_inventory(request):
         if not system_settings.auto_update:
             return Response({"message": "Auto update disabled"}, status=200)
 
-        net_components_enabled = system_settings.export_netcomponents
-        ic_source_enabled = system_settings.export_icsource
-        # You can decide default action for make:
-        action = "send"
-
-        stock_suppliers = system_settings.stock_suppliers or []
-        available_suppliers = system_settings.available_suppliers or []
-
-        file_format = system_settings.export_file_format or "csv"
-
-        max_nc_stock = system_settings.netcomponents_max_stock or 0
-        max_nc_avail = system_settings.netcomponents_max_available or 0
-        max_ics_stock = system_settings.icsource_max_stock or 0
-        max_ics_avail = system_settings.icsource_max_available or 0
-
+        params = params_from_system_settings(system_settings)
     else:
         # Web: use payload
-        net_components_enabled = data.get("netCOMPONENTS", {}).get("enabled", False)
-        ic_source_enabled = data.get("icSource", {}).get("enabled", False)
-
-        stock_suppliers = data.get("stockSuppliers", []) or []
-        available_suppliers = data.get("availableSuppliers", []) or []
-
-        file_format = data.get("fileFormat", "csv")
-
-        max_nc_stock = data.get("netCOMPONENTS", {}).get("max_stock_rows", 0) or 0
-        max_nc_avail = data.get("netCOMPONENTS", {}).get("max_available_rows", 0) or 0
-        max_ics_stock = data.get("icSource", {}).get("max_stock_rows", 0) or 0
-        max_ics_avail = data.get("icSource", {}).get("max_available_rows", 0) or 0
+        params = params_from_payload(data)
 
     # Validate platforms
-    if not net_components_enabled and not ic_source_enabled:
+    if not params["net_components_enabled"] and not params["ic_source_enabled"]:
         return Response({"error": "Please enable at least one platform"}, status=400)
 
-    # Map action to booleans
-    send_to_nc = action in ("send", "both") and net_components_enabled
-    send_to_ics = action in ("send", "both") and ic_source_enabled
-    download = action in ("download", "both")
-
     # Must have at least one supplier if any export is enabled
-    if not (stock_suppliers or available_suppliers):
-        if net_components_enabled or ic_source_enabled:
-            return Response({"error": "No suppliers selected"}, status=400)
-
-    # Union of all suppliers for inventory export / DB fetch
-    all_suppliers = []
-    for s in stock_suppliers + available_suppliers:
-        if s not in all_suppliers:
-            all_suppliers.append(s)
-
-    # ---------- Prepare zip / email attachments ----------
-    zip_buffer = io.BytesIO()
-    zip_file = zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED)
-    nc_attachments, ics_attachments = [], []
-
-    # ---------- Columns per destination ----------
-    NC_FIELDS   = ["mpn", "description", "manufacturer", "quantity", "url", "break_qty_a", "price_a"]
-    NC_COLUMNS  = ["P/N", "DESCRIPTION", "MFG", "QTY", "Shopping Cart URL", "BreakQtyA", "PriceA"]
-
-    ICS_FIELDS  = ["mpn", "description", "manufacturer", "quantity"]
-    ICS_COLUMNS = ["P/N", "DESCRIPTION", "MFG", "QTY"]
-
-    # ---------- Helper to write a dataframe into the zip & attachments ----------
-    def write_rows(rows, filename, fields, column_names, recipient=None):
-        print(f"Exporting {filename} ({len(rows)} rows)...")
-        if not rows:
-            return
-        df = pd.DataFrame(rows)
-
-        # make sure all columns exist (in case some fields absent)
-        for f in fields:
-            if f not in df.columns:
-                df[f] = ""
-        df = df[fields]
-        df.columns = column_names
-
-        out = io.BytesIO()
-        if file_format == "xlsx":
-            df.to_excel(out, index=False, engine="xlsxwriter")
-        else:
-            df.to_csv(out, index=False, encoding="utf-8-sig")
-        out.seek(0)
-
-        zip_file.writestr(filename, out.getvalue())
-
-        if recipient == "netcomponents":
-            nc_attachments.append((filename, out.getvalue()))
-        elif recipient == "icsource":
-            ics_attachments.append((filename, out.getvalue()))
-
-    # ---------- Fetch rows once for all suppliers (for NC/ICS) ----------
-    rows_by_supplier = {}
-    need_any_platform = (net_components_enabled or ic_source_enabled) and all_suppliers
-
-    if need_any_platform:
-        union_fields = sorted(set(NC_FIELDS) | set(ICS_FIELDS) | {"supplier"})
-
-        print(f"Shared fetch start. Suppliers={len(all_suppliers)}")
-        t0 = time.time()
-
-        qs = (
-            InventoryItem.objects
-            .filter(supplier__in=all_suppliers)
-            .order_by("supplier", "id")
-            .values(*union_fields)
-        )
-
-        CHUNK_SIZE = 10000
-        for row in qs.iterator(chunk_size=CHUNK_SIZE):
-            s = row["supplier"]
-            rows_by_supplier.setdefault(s, []).append(row)
-
-        print(
-            f"Shared fetch done in {time.time() - t0:.2f}s; "
-            f"collected rows for {len(rows_by_supplier)} suppliers."
-        )
-
-    # ---------- Helper: build stock/available rows for a single platform ----------
-    def build_platform_rows(stock_list, avail_list, stock_limit, avail_limit):
-        """
-        Fill stock rows first, overflow to available, then process available suppliers.
-        """
-        stock_rows = []
-        avail_rows = []
-
-        # Phase 1: STOCK suppliers
-        for s in stock_list:
-            supplier_rows = rows_by_supplier.get(s, [])
-            for row in supplier_rows:
-                if len(stock_rows) < stock_limit:
-                    stock_rows.append(row)
-                elif len(avail_rows) < avail_limit:
-                    # overflow from stock → available
-                    avail_rows.append(row)
-                else:
-                    return stock_rows, avail_rows
-
-        # Phase 2: AVAILABLE suppliers
-        for s in avail_list:
-            supplier_rows = rows_by_supplier.get(s, [])
-            for row in supplier_rows:
-                if len(avail_rows) < avail_limit:
-                    avail_rows.append(row)
-                else:
-                    return stock_rows, avail_rows
-
-        return stock_rows, avail_rows
-
-    # ---------- Build NC exports ----------
-    if net_components_enabled:
-        t1 = time.time()
-
-        nc_stock_rows, nc_avail_rows = build_platform_rows(
-            stock_suppliers,
-            available_suppliers,
-            max_nc_stock,
-            max_nc_avail
-        )
-
-        write_rows(
-            nc_stock_rows,
-            f"netcomponents_stock.{file_format}",
-            NC_FIELDS,
-            NC_COLUMNS,
-            "netcomponents",
-        )
-        write_rows(
-            nc_avail_rows,
-            f"netcomponents_available.{file_format}",
-            NC_FIELDS,
-            NC_COLUMNS,
-            "netcomponents",
-        )
-        print(f"NC file creation time: {time.time() - t1:.2f}s")
-
-    # ---------- Build ICS exports ----------
-    if ic_source_enabled:
-        t2 = time.time()
-
-        ics_stock_rows, ics_avail_rows = build_platform_rows(
-            stock_suppliers,
-            available_suppliers,
-            max_ics_stock,
-            max_ics_avail,
-        )
-
-        write_rows(
-            ics_stock_rows,
-            f"icsource_stock.{file_format}",
-            ICS_FIELDS,
-            ICS_COLUMNS,
-            "icsource",
-        )
-        write_rows(
-            ics_avail_rows,
-            f"icsource_available.{file_format}",
-            ICS_FIELDS,
-            ICS_COLUMNS,
-            "icsource",
-        )
-        print(f"ICS file creation time: {time.time() - t2:.2f}s")
-
-    # ---------- Finish up ----------
-    zip_file.close()
-    zip_buffer.seek(0)
-    print(f"Total export time: {time.time() - start_time:.2f} seconds")
-
-    # send emails if needed
-    if send_to_nc and nc_attachments:
-        print("Sending NetComponents email...")
-        send_html_email(
-            data={"email": settings.NC_INVENTORY_UPDATE_EMAIL, "my_company": settings.COMPANY_NAME},
-            template="ncupdate",
-            from_account="inventory",
-            attachments=[
-                (
-                    fname,
-                    io.BytesIO(content),
-                    "text/csv"
-                    if fname.endswith(".csv")
-                    else "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                )
-                for (fname, content) in nc_attachments
-            ],
-        )
-
-    if send_to_ics and ics_attachments:
-        print("Sending IC Source email...")
-        send_html_email(
-            data={"email": settings.ICS_INVENTORY_UPDATE_EMAIL, "my_company": settings.COMPANY_NAME},
-            template="icsupdate",
-            from_account="inventory",
-            attachments=[
-                (
-                    fname,
-                    io.BytesIO(content),
-                    "text/csv"
-                    if fname.endswith(".csv")
-                    else "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                )
-                for (fname, content) in ics_attachments
-            ],
-        )
-
-    if download:
-        resp = HttpResponse(zip_buffer, content_type="application/zip")
-        resp["Content-Disposition"] = "attachment; filename=export.zip"
-        return resp
-
-    return Response({"success": "Export completed successfully"}, status=200)
+    if not (params["stock_suppliers"] or params["available_suppliers"]):
+        return Response({"error": "No suppliers selected"}, status=400)
+
+    job = enqueue_job(PLATFORM_EXPORT_JOB, PLATFORM_EXPORT_HANDLER, params, user=request.user)
+    logger.debug(f"Queued platform export job {job.id} (source={params['source']}, action={params['action']})")
+
+    return Response({
+        "job_id": job.id,
+        "status": job.status,
+        "message": "Export queued",
+    }, status=status.HTTP_202_ACCEPTED)
 
 class InventoryViewSet(viewsets.ModelViewSet):
+    """
+    List is unpaginated unless page_size / cursor / startRow is sent (see KeysetPagination);
+    filterModel / sortModel / quickFilter follow AG Grid's server-side row model (see GridFilterBackend).
+    """
     queryset = InventoryItem.objects.all()
     serializer_class = InventoryItemSerializer
+    pagination_class = KeysetPagination
+    filter_backends = [*api_settings.DEFAULT_FILTER_BACKENDS, GridFilterBackend]
+    grid_fields = [
+        'id', 'mpn', 'description', 'manufacturer', 'quantity', 'location', 'supplier',
+        'date_code', 'price', 'cost', 'break_qty_a', 'price_a', 'created_at', 'updated_at',
+        'url', 'notes',
+    ]
+    grid_quick_search_fields = ['mpn_key', 'manufacturer', 'supplier', 'description']
+
+    # each write and its StockSummary refresh commit (or roll back) together
+    @transaction.atomic
+    def perform_create(self, serializer):
+        item = serializer.save()
+        refresh_stock_summary([item.mpn_key])
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        old_key = serializer.instance.mpn_key
+        item = serializer.save()
+        refresh_stock_summary([old_key, item.mpn_key])
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+        refresh_stock_summary([instance.mpn_key])
 
 class BulkUploadView(APIView):
     parser_classes = (MultiPartParser, FormParser, FileUploadParser)
 
     def post(self, request):
-        print("Starting bulk upload...")
+        """
+        mode=append (default): add the rows to the inventory.
+        mode=replace: make each supplier in the file match the file exactly
+        (insert / update / delete by mpn, supplier, date_code, location).
+        upload_id (optional): progress is pushed to ws/inventory/uploads/<upload_id>/.
+        """
         file = request.FILES.get('file')
+        mode = request.data.get('mode', 'append')
 
         if not file:
-            print("No file provided")
             return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
+        if mode not in ('append', 'replace'):
+            return Response({'error': f"Invalid mode '{mode}'"}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            df = pd.read_excel(file)
-            print(f"File uploaded with {len(df)} rows")
-            chunk_size = 1000
-            successful_rows = 0
-            failed_rows = 0
-            failed_rows_details = []
-
-            for i in range(0, len(df), chunk_size):
-                chunk = df[i:i + chunk_size]
-                print("Processing chunk...")
-                inventory_items = []
-                for index, row in chunk.iterrows():
-                    try:
-                        #validate required fields
-                        if pd.isna(row['mpn']) or pd.isna(row['quantity']) or pd.isna(row['supplier']):
-                            raise ValueError("MPN, quantity, and supplier are required fields")
-                        try:
-                            quantity = int(row['quantity'])
-                        except ValueError:
-                            raise ValueError(f"Invalid quantity value: {row['quantity']}")
-                        
-                        # price      = self.clean_value(row, 'price')
-                        # cost       = self.clean_value(row, 'cost')
-                        # break_qty_a= self.clean_value(row, 'BreakQtyA', to_int=True)
-                        # price_a    = self.clean_value(row, 'PriceA')
-
-                        field_map = {
-                            'manufacturer': {'column': 'manufacturer'},
-                            'location':     {'column': 'location'},
-                            'supplier':     {'column': 'supplier'},  # already validated
-                            'description':  {'column': 'description'},
-                            'date_code':    {'column': 'dc'},
-                            'price':        {'column': 'price', 'type': 'decimal'},
-                            'cost':         {'column': 'cost',  'type': 'decimal'},
-                            'break_qty_a':  {'column': 'break_qty_a', 'type': 'int'},
-                            'price_a':      {'column': 'price_a', 'type': 'decimal'},
-                            'url':          {'column': 'url'},
-                            'notes':        {'column': 'notes'},
-                        }
-
-                        # Clean and convert values
-                        cleaned_fields = {}
-                        for field_name, meta in field_map.items():
-                            col = meta['column']
-                            val = self.clean_value(row, col, meta.get('type'))
-                            cleaned_fields[field_name] = val
-
-                        item = InventoryItem(
-                            mpn=row['mpn'],
-                            quantity=quantity,
-                            **cleaned_fields
-                        )
-                        print(f"Adding item {item.mpn}")
-                        inventory_items.append(item)    
-                        successful_rows += 1
-
-                    except Exception as e:
-                        print(f"Error processing row {index}: {str(e)}")
-                        failed_rows += 1
-                        failed_rows_details.append({"row": index, "error": str(e)})
-
-                        
-                        # price = row.get('price', None)
-                        # if price is not None and isinstance(price, float) and math.isnan(price):
-                        #     price = None
-
-                        # cost = row.get('cost', None)
-                        # if cost is not None and isinstance(cost, float) and math.isnan(cost):
-                        #     cost = None
-
-                        # break_qty_a = row.get('BreakQtyA', None)
-                        # if break_qty_a is not None and isinstance(break_qty_a, float) and math.isnan(break_qty_a):
-                        #     break_qty_a = None
-
-                        # price_a = row.get('PriceA', None)
-                        # if price_a is not None and isinstance(price_a, float) and math.isnan(price_a):
-                        #     price_a = None
-
-                        # Create InventoryItem instance
-
-                        # item = InventoryItem(
-                        #     mpn = row['mpn'],
-                        #     quantity = quantity,
-                        #     manufacturer = self.convert_nan_to_none(row.get('manufacturer', None)),
-                        #     location = self.convert_nan_to_none(row.get('location', None)),
-                        #     supplier = row.get('supplier', None),
-                        #     description = self.convert_nan_to_none(row.get('description', None)),
-                        #     date_code = self.convert_nan_to_none(row.get('dc', None)),
-                        #     price = price,
-                        #     cost = cost,
-                        #     break_qty_a = break_qty_a,
-                        #     price_a = price_a,
-                        #     url = self.convert_nan_to_none(row.get('url', None))
-                        # )
-                        # print(f"Adding item {item.mpn}")
-                        # inventory_items.append(item)
-                        # successful_rows += 1
-                    # except Exception as e:
-                    #     print(f"Error processing row {index}: {str(e)}")
-                    #     failed_rows += 1
-                    #     failed_rows_details.append({"row": index, "error": str(e)})
-                
-                InventoryItem.objects.bulk_create(inventory_items)
-                print(f"Added {len(inventory_items)} items")
-                
-            logger.debug(f"Successfully uploaded {successful_rows} items")
-            logger.debug(f"{failed_rows} rows failed to upload")
-            logger.debug(f"Failed details: {failed_rows_details}")
-
-            return Response({
-                "success_count": successful_rows,
-                "failed_count": failed_rows,
-                "failed_details": failed_rows_details
-            }, status=status.HTTP_201_CREATED)
+            t0 = time.time()
+            # .csv / .xlsx are parsed in fixed-size batches; each batch is validated
+            # column-wise and COPYed into a staging table as soon as it is read
+            total, batches = open_upload(file)
+            result = import_upload(
+                batches,
+                mode=mode,
+                total=total,
+                on_progress=upload_progress_notifier(request.data.get('upload_id'), request.user),
+            )
+            logger.debug(f"Upload ({mode}) finished in {time.time() - t0:.2f}s: "
+                         f"{result['success_count']} ok, {result['failed_count']} failed")
+
+            if mode == 'replace':
+                if result['failed_count']:
+                    # a partial file would delete the stock of every failed row
+                    result['error'] = "Replace mode requires every row to be valid; nothing was changed"
+                    return Response(result, status=status.HTTP_400_BAD_REQUEST)
+                return Response(result, status=status.HTTP_200_OK)
+
+            return Response(result, status=status.HTTP_201_CREATED)
         except Exception as e:
-            print(f"Error uploading file: {str(e)}")
+            logger.error(f"Error uploading file: {str(e)}")
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
-    # def convert_nan_to_none(self, value):
-    #     if pd.isna(value):
-    #         return None
-    #     return value
-    
-    def clean_value(self, row, col_name, val_type=None):
-        val = row.get(col_name, None)
-        if pd.isna(val):
-            return None
-        if val_type == 'int':
-            return int(val)
-        if val_type == 'decimal':
-            return Decimal(str(val))
-        return val
\ No newline at end of file
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import Job
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'progress', 'created_by', 'created_at', 'started_at', 'finished_at')
+    list_filter = ('kind', 'status', 'created_at')
+    search_fields = ('kind', 'progress_message', 'error')
+    readonly_fields = ('created_at', 'updated_at', 'started_at', 'finished_at')
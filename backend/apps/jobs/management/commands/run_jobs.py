@@ -0,0 +1,42 @@
+import os
+import socket
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from apps.jobs.utils import claim_next_job, requeue_stale_jobs, run_job
+from apps.email_templates.cache import warm_template_cache
+
+# how often the worker looks for jobs orphaned by a dead worker
+STALE_SWEEP_SECONDS = 60
+
+
+class Command(BaseCommand):
+    help = "Run the local background job worker (polls the Job table and executes queued jobs)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Exit when the queue is empty instead of polling.")
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument('--kind', action='append', dest='kinds', help="Only run jobs of this kind (repeatable).")
+
+    def handle(self, *args, **options):
+        worker_name = f"{socket.gethostname()}:{os.getpid()}"
+        self.stdout.write(f"Job worker {worker_name} started")
+        warm_template_cache()
+
+        last_sweep = None
+        while True:
+            close_old_connections()
+            if last_sweep is None or time.monotonic() - last_sweep > STALE_SWEEP_SECONDS:
+                requeued, failed = requeue_stale_jobs()
+                if requeued or failed:
+                    self.stdout.write(f"Stale jobs: {requeued} requeued, {failed} failed")
+                last_sweep = time.monotonic()
+            job = claim_next_job(worker_name, kinds=options['kinds'])
+            if job:
+                self.stdout.write(f"Running job {job.pk} ({job.kind})")
+                job = run_job(job)
+                self.stdout.write(f"Job {job.pk} {job.status} in {job.timings.get('total')}s")
+                continue
+            if options['once']:
+                break
+            time.sleep(options['poll_interval'])
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 20:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='run_after',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,87 @@
+from django.db import models
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    A unit of background work executed by the job worker (manage.py run_jobs).
+    `handler` is the dotted path of a callable that receives the Job instance
+    and returns a JSON-serializable result dict.
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'Queued'
+        RUNNING = 'running', 'Running'
+        SUCCEEDED = 'succeeded', 'Succeeded'
+        FAILED = 'failed', 'Failed'
+
+    kind = models.CharField(max_length=100, db_index=True)
+    handler = models.CharField(max_length=255)
+    params = models.JSONField(default=dict, blank=True)
+
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.QUEUED)
+    progress = models.PositiveSmallIntegerField(default=0)  # 0-100
+    progress_message = models.CharField(max_length=255, blank=True, default='')
+
+    result = models.JSONField(default=dict, blank=True)
+    artifacts = models.JSONField(default=list, blank=True)  # [{name, path, size, content_type}]
+    error = models.TextField(blank=True, default='')
+    timings = models.JSONField(default=dict, blank=True)  # step name -> seconds
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True, default='')
+    run_after = models.DateTimeField(null=True, blank=True)  # set when a retry is scheduled (backoff)
+
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='idx_job_status_created'),
+        ]
+
+    def __str__(self):
+        return f"Job#{self.pk} {self.kind} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.Status.SUCCEEDED, self.Status.FAILED)
+
+    def set_progress(self, progress, message=''):
+        """Persist progress immediately so pollers see it while the job runs."""
+        self.progress = max(0, min(100, int(progress)))
+        self.progress_message = message[:255]
+        Job.objects.filter(pk=self.pk).update(
+            progress=self.progress,
+            progress_message=self.progress_message,
+            updated_at=timezone.now(),
+        )
+
+    def add_timing(self, step, seconds):
+        self.timings[step] = round(seconds, 3)
+
+    def add_artifact(self, name, fileobj, content_type):
+        """Store a generated file under MEDIA_ROOT/jobs/<id>/ and register it on the job."""
+        path = default_storage.save(f"jobs/{self.pk}/{name}", File(fileobj, name=name))
+        self.artifacts.append({
+            'name': name,
+            'path': path,
+            'size': default_storage.size(path),
+            'content_type': content_type,
+        })
+        Job.objects.filter(pk=self.pk).update(artifacts=self.artifacts, updated_at=timezone.now())
+        return path
+
+    def get_artifact(self, name=None):
+        for artifact in self.artifacts:
+            if name is None or artifact['name'] == name:
+                return artifact
+        return None
+
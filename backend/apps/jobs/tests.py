@@ -0,0 +1,141 @@
+import threading
+from datetime import timedelta
+from unittest import mock
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.utils import timezone
+from .models import Job
+from .utils import RetryJob, _mark_running, backoff_delay, claim_next_job, requeue_stale_jobs, run_job
+
+
+def retrying_handler(job):
+    raise RetryJob("SMTP unavailable", delay=30, max_attempts=3)
+
+
+def succeeding_handler(job):
+    return {"sent": 1}
+
+
+class BackoffTests(SimpleTestCase):
+    def test_doubles_per_attempt_up_to_the_cap(self):
+        self.assertEqual([backoff_delay(n, 30) for n in range(1, 5)], [30, 60, 120, 240])
+        self.assertEqual(backoff_delay(20, 30), 3600)
+        self.assertEqual(backoff_delay(0, 30), 30)
+
+
+class RunJobTests(SimpleTestCase):
+    """Job.save is mocked: these cover the state run_job / _mark_running leave on the job."""
+
+    def setUp(self):
+        self.save = mock.patch.object(Job, 'save').start()
+        self.addCleanup(mock.patch.stopall)
+
+    def _job(self, handler, attempts):
+        return Job(pk=1, kind='email', handler=f'apps.jobs.tests.{handler}', status=Job.Status.RUNNING, attempts=attempts)
+
+    def test_retry_requeues_with_backoff(self):
+        job = self._job('retrying_handler', attempts=1)
+        before = timezone.now()
+
+        run_job(job)
+
+        self.assertEqual(job.status, Job.Status.QUEUED)
+        self.assertGreaterEqual(job.run_after, before + timedelta(seconds=30))
+        self.assertLess(job.run_after, timezone.now() + timedelta(seconds=31))
+        self.assertEqual(job.error, 'SMTP unavailable')
+        self.assertEqual(job.progress_message, 'Retry 1/2 in 30s: SMTP unavailable')
+        self.assertIn('attempt_1', job.timings)
+        self.assertIsNone(job.finished_at)
+
+    def test_retry_fails_at_max_attempts(self):
+        job = self._job('retrying_handler', attempts=3)
+
+        run_job(job)
+
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertEqual(job.error, 'SMTP unavailable')
+        self.assertIsNotNone(job.finished_at)
+
+    def test_success_records_the_result(self):
+        job = self._job('succeeding_handler', attempts=1)
+
+        run_job(job)
+
+        self.assertEqual((job.status, job.result, job.progress), (Job.Status.SUCCEEDED, {'sent': 1}, 100))
+
+    def test_claiming_a_retried_job_clears_the_previous_attempt(self):
+        job = Job(pk=1, status=Job.Status.QUEUED, attempts=1, error='SMTP unavailable', finished_at=timezone.now())
+
+        _mark_running(job, 'worker-1')
+
+        self.assertEqual((job.status, job.attempts, job.worker), (Job.Status.RUNNING, 2, 'worker-1'))
+        self.assertEqual(job.error, '')
+        self.assertIsNone(job.finished_at)
+        self.assertIn('error', self.save.call_args.kwargs['update_fields'])
+        self.assertIn('finished_at', self.save.call_args.kwargs['update_fields'])
+
+
+@skipUnlessDBFeature('has_select_for_update_skip_locked')
+class ClaimNextJobTests(TransactionTestCase):
+    def _queue(self, kind='export', **fields):
+        return Job.objects.create(kind=kind, handler='apps.jobs.tests.succeeding_handler', **fields)
+
+    def test_claims_the_oldest_ready_job(self):
+        first = self._queue()
+        self._queue(run_after=timezone.now() + timedelta(minutes=5))  # backing off
+        self._queue()
+
+        job = claim_next_job('worker-1')
+
+        self.assertEqual(job.pk, first.pk)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker, job.attempts), (Job.Status.RUNNING, 'worker-1', 1))
+
+    def test_skips_a_job_locked_by_another_worker(self):
+        locked, free = self._queue(), self._queue()
+        claimed = []
+
+        def other_worker():
+            try:
+                claimed.append(claim_next_job('worker-2'))
+            finally:
+                connection.close()
+
+        with transaction.atomic():
+            Job.objects.select_for_update().get(pk=locked.pk)
+            thread = threading.Thread(target=other_worker)
+            thread.start()
+            thread.join(timeout=10)
+
+        self.assertEqual(claimed[0].pk, free.pk)
+
+    def test_only_the_requested_kinds(self):
+        self._queue(kind='export')
+        email = self._queue(kind='email')
+
+        self.assertEqual(claim_next_job('worker-1', kinds=['email']).pk, email.pk)
+        self.assertIsNone(claim_next_job('worker-1', kinds=['email']))
+
+
+@override_settings(JOBS_STALE_AFTER_SECONDS=1800, JOBS_MAX_ATTEMPTS=3)
+class RequeueStaleJobsTests(TransactionTestCase):
+    def _running(self, attempts, idle_seconds):
+        job = Job.objects.create(kind='export', handler='x.y', status=Job.Status.RUNNING, attempts=attempts, worker='dead:1')
+        # updated_at is auto_now: age it with update()
+        Job.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(seconds=idle_seconds))
+        return job
+
+    def test_requeues_stale_jobs_and_fails_those_out_of_attempts(self):
+        retry = self._running(attempts=1, idle_seconds=3600)
+        exhausted = self._running(attempts=3, idle_seconds=3600)
+        alive = self._running(attempts=1, idle_seconds=60)
+
+        self.assertEqual(requeue_stale_jobs(), (1, 1))
+
+        retry.refresh_from_db()
+        exhausted.refresh_from_db()
+        alive.refresh_from_db()
+        self.assertEqual((retry.status, retry.worker), (Job.Status.QUEUED, ''))
+        self.assertEqual(exhausted.status, Job.Status.FAILED)
+        self.assertIsNotNone(exhausted.finished_at)
+        self.assertEqual(alive.status, Job.Status.RUNNING)
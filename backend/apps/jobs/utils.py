@@ -0,0 +1,197 @@
+import logging
+import threading
+import time
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import Job
+
+logger = logging.getLogger('myapp')
+
+
+class RetryJob(Exception):
+    """
+    Raised by a handler for a transient failure (e.g. SMTP down): the job goes back
+    to the queue and runs again after `delay` seconds, until `max_attempts` is reached.
+    """
+
+    def __init__(self, message, delay, max_attempts):
+        super().__init__(message)
+        self.delay = delay
+        self.max_attempts = max_attempts
+
+
+def backoff_delay(attempt, base, cap=3600):
+    """Exponential backoff: base, 2*base, 4*base ... seconds, at most `cap`."""
+    return min(base * 2 ** max(attempt - 1, 0), cap)
+
+
+def enqueue_job(kind, handler, params=None, user=None):
+    """
+    Persist a new queued job and return it.
+    The worker (manage.py run_jobs) picks it up; with JOBS_RUN_IN_PROCESS the
+    job is also started right away in a background thread of this process.
+    """
+    job = Job.objects.create(
+        kind=kind,
+        handler=handler,
+        params=params or {},
+        created_by=user if user and user.is_authenticated else None,
+    )
+    if getattr(settings, 'JOBS_RUN_IN_PROCESS', False):
+        transaction.on_commit(lambda: _start_in_thread(job.pk))
+    return job
+
+
+def enqueue_jobs(kind, handler, params_list, user=None):
+    """enqueue_job for many jobs of one kind, inserted with a single bulk_create."""
+    created_by = user if user and user.is_authenticated else None
+    jobs = Job.objects.bulk_create([
+        Job(kind=kind, handler=handler, params=params, created_by=created_by)
+        for params in params_list
+    ])
+    if jobs and getattr(settings, 'JOBS_RUN_IN_PROCESS', False):
+        transaction.on_commit(lambda: [_start_in_thread(job.pk) for job in jobs])
+    return jobs
+
+
+def claim_next_job(worker_name, kinds=None):
+    """
+    Atomically move the oldest queued job to 'running' and return it (or None).
+    SKIP LOCKED lets several workers poll the same table without double-claiming.
+    """
+    with transaction.atomic():
+        qs = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.Status.QUEUED)
+            .filter(Q(run_after__isnull=True) | Q(run_after__lte=timezone.now()))
+        )
+        if kinds:
+            qs = qs.filter(kind__in=kinds)
+        job = qs.order_by('created_at', 'id').first()
+        if not job:
+            return None
+        _mark_running(job, worker_name)
+    return job
+
+
+def requeue_stale_jobs():
+    """
+    Put jobs left 'running' by a worker that died back in the queue. A job counts as
+    stale when it has not been updated (claim, set_progress) for JOBS_STALE_AFTER_SECONDS;
+    one that was already started JOBS_MAX_ATTEMPTS times is failed instead.
+    Returns (requeued, failed).
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status=Job.Status.RUNNING,
+        updated_at__lt=now - timedelta(seconds=settings.JOBS_STALE_AFTER_SECONDS),
+    )
+    message = 'The worker running this job stopped responding'
+    with transaction.atomic():
+        failed = stale.filter(attempts__gte=settings.JOBS_MAX_ATTEMPTS).update(
+            status=Job.Status.FAILED,
+            error=message,
+            progress_message=f"{message} ({settings.JOBS_MAX_ATTEMPTS} attempts)"[:255],
+            finished_at=now,
+            updated_at=now,
+        )
+        requeued = stale.filter(attempts__lt=settings.JOBS_MAX_ATTEMPTS).update(
+            status=Job.Status.QUEUED,
+            worker='',
+            run_after=None,
+            progress_message=f"Requeued: {message}"[:255],
+            updated_at=now,
+        )
+    if requeued or failed:
+        logger.warning(f"Stale jobs: {requeued} requeued, {failed} failed")
+    return requeued, failed
+
+
+def _mark_running(job, worker_name):
+    job.status = Job.Status.RUNNING
+    job.worker = worker_name
+    job.attempts += 1
+    job.started_at = timezone.now()
+    # a retried job must not show the previous attempt's error while it runs
+    job.error = ''
+    job.finished_at = None
+    job.save(update_fields=['status', 'worker', 'attempts', 'started_at', 'error', 'finished_at', 'updated_at'])
+
+
+def run_job(job):
+    """Execute a claimed job and record result, timings and final status."""
+    start = time.time()
+    logger.debug(f"Running job {job.pk} ({job.kind})")
+    try:
+        handler = import_string(job.handler)
+        result = handler(job) or {}
+    except RetryJob as e:
+        if job.attempts < e.max_attempts:
+            return _schedule_retry(job, e, time.time() - start)
+        logger.error(f"Job {job.pk} ({job.kind}) failed after {job.attempts} attempts: {e}")
+        job.status = Job.Status.FAILED
+        job.error = str(e)
+        job.progress_message = str(e)[:255]
+    except Exception as e:
+        logger.error(f"Job {job.pk} ({job.kind}) failed: {e}")
+        job.status = Job.Status.FAILED
+        job.error = traceback.format_exc()
+        job.progress_message = str(e)[:255]
+    else:
+        job.status = Job.Status.SUCCEEDED
+        job.result = result
+        job.progress = 100
+        job.progress_message = 'Completed'
+    job.add_timing('total', time.time() - start)
+    job.finished_at = timezone.now()
+    job.save(update_fields=[
+        'status', 'result', 'error', 'progress', 'progress_message',
+        'timings', 'finished_at', 'updated_at',
+    ])
+    logger.debug(f"Job {job.pk} finished with status {job.status} in {job.timings['total']}s")
+    return job
+
+
+def _schedule_retry(job, retry, elapsed):
+    job.status = Job.Status.QUEUED
+    job.run_after = timezone.now() + timedelta(seconds=retry.delay)
+    job.error = str(retry)
+    job.progress_message = f"Retry {job.attempts}/{retry.max_attempts - 1} in {retry.delay}s: {retry}"[:255]
+    job.add_timing(f'attempt_{job.attempts}', elapsed)
+    job.save(update_fields=['status', 'run_after', 'error', 'progress_message', 'timings', 'updated_at'])
+    logger.debug(f"Job {job.pk} ({job.kind}) will retry in {retry.delay}s: {retry}")
+    if getattr(settings, 'JOBS_RUN_IN_PROCESS', False):
+        timer = threading.Timer(retry.delay, _start_in_thread, args=(job.pk,))
+        timer.daemon = True
+        timer.start()
+    return job
+
+
+def run_job_by_id(job_id, worker_name='in-process'):
+    """Claim a specific queued job (if no worker got it first) and run it."""
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(pk=job_id, status=Job.Status.QUEUED)
+            .first()
+        )
+        if not job:
+            return None
+        _mark_running(job, worker_name)
+    return run_job(job)
+
+
+def _start_in_thread(job_id):
+    def target():
+        close_old_connections()
+        try:
+            run_job_by_id(job_id)
+        finally:
+            connection.close()
+
+    threading.Thread(target=target, name=f"job-{job_id}", daemon=True).start()
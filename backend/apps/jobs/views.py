@@ -0,0 +1,39 @@
+from django.core.files.storage import default_storage
+from django.http import FileResponse
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from .models import Job
+from .serializers import JobSerializer
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Poll background jobs. GET /api/jobs/<id>/ returns status, progress,
+    timings and artifacts; /download/?name=<artifact> streams a generated file.
+    """
+    queryset = Job.objects.select_related('created_by').order_by('-created_at')
+    serializer_class = JobSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        kind = self.request.query_params.get('kind')
+        if kind:
+            queryset = queryset.filter(kind=kind)
+        job_status = self.request.query_params.get('status')
+        if job_status:
+            queryset = queryset.filter(status=job_status)
+        return queryset
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        job = self.get_object()
+        artifact = job.get_artifact(request.query_params.get('name'))
+        if not artifact or not default_storage.exists(artifact['path']):
+            return Response({"error": "Artifact not found"}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(
+            default_storage.open(artifact['path'], 'rb'),
+            as_attachment=True,
+            filename=artifact['name'],
+            content_type=artifact['content_type'],
+        )
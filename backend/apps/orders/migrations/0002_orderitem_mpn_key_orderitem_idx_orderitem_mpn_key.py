@@ -0,0 +1,27 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:56
+
+import apps.common.mpn
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='mpn_key',
+            field=apps.common.mpn.MpnKeyField(blank=True, default='', max_length=128),
+        ),
+        migrations.RunSQL(
+            "UPDATE orders_orderitem SET mpn_key = upper(regexp_replace(mpn, '[^A-Za-z0-9]', '', 'g'))",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['mpn_key'], name='idx_orderitem_mpn_key', opclasses=['text_pattern_ops']),
+        ),
+    ]
@@ -5,6 +5,7 @@ from apps.contacts.models import Contact
 from django.conf import settings
 from django.utils import timezone
 from django.db.models import Sum
+from apps.common.mpn import MpnKeyField
 
 
 # helper for money rounding to 2 decimals
@@ -131,6 +132,7 @@ class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
     customer_part_number = models.CharField(max_length=128, blank=True, default="")
     mpn = models.CharField(max_length=128)
+    mpn_key = MpnKeyField(max_length=128)  # normalized mpn for prefix / typeahead search
     manufacturer = models.CharField(max_length=128, blank=True, default="")
     description = models.CharField(max_length=256, blank=True, default="")
     date_code = models.CharField(max_length=64, blank=True, default="")
@@ -150,6 +152,7 @@ class OrderItem(models.Model):
     class Meta:
         indexes = [
             models.Index(fields=['mpn']),
+            models.Index(fields=['mpn_key'], opclasses=['text_pattern_ops'], name='idx_orderitem_mpn_key'),
             models.Index(fields=['status']),
             models.Index(fields=['order']),
         ]
@@ -3,6 +3,7 @@ from django.conf import settings
 from django.utils import timezone
 from apps.crm_accounts.models import CRMAccount, CRMInteraction
 from django.core.validators import MinValueValidator
+from apps.common.mpn import MpnKeyField
 
 class Quote(models.Model):
     crm_account = models.ForeignKey(CRMAccount, on_delete=models.CASCADE, related_name='quotes')
@@ -33,6 +34,7 @@ class Quote(models.Model):
 class QuoteItem(models.Model):
     quote = models.ForeignKey(Quote, on_delete=models.CASCADE, related_name='items')
     mpn = models.CharField(max_length=255)
+    mpn_key = MpnKeyField()  # normalized mpn for prefix / typeahead search
     manufacturer = models.CharField(max_length=255, blank=True)
     qty_offered = models.PositiveIntegerField()
     unit_price = models.DecimalField(max_digits=10, decimal_places=4)
@@ -45,5 +47,10 @@ class QuoteItem(models.Model):
     def total_price(self):
         return self.qty_offered * self.unit_price
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['mpn_key'], opclasses=['text_pattern_ops'], name='idx_quoteitem_mpn_key'),
+        ]
+
     def __str__(self):
         return f"{self.mpn} ({self.qty_offered} pcs)"
\ No newline at end of file
@@ -6,8 +6,8 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
 from apps.email_connections.models import EmailConnection
+from apps.email_connections.google_api import gmail_send
 from apps.email_connections.utils import refresh_google_token
-import requests
 import base64
 
 class QuoteViewSet(viewsets.ModelViewSet):
@@ -104,15 +104,13 @@ class QuoteViewSet(viewsets.ModelViewSet):
         }
 
         # Send the email reply
-        from apps.email_templates.models import EmailTemplate
-        from django.template import Template, Context
+        from apps.email_templates.cache import template_cache
+        from django.template import Context
 
-        template_obj = EmailTemplate.objects.filter(name='quote_multiple_items').first()
-        if not template_obj:
+        compiled = template_cache.get('quote_multiple_items')
+        if not compiled:
             return Response({"error": "Email template not found"}, status=500)
-        email_body_template = template_obj.content
-        email_body_template = email_body_template.replace("{{items_table}}", "{{items_table|safe}}")
-        body_html = Template(email_body_template).render(Context(data))
+        body_html = compiled.items_table_body.render(Context(data))
 
         # base64 encode
         subject_encoded = base64.b64encode(subject_raw.encode("utf-8")).decode("utf-8")
@@ -131,16 +129,11 @@ Content-Transfer-Encoding: 7bit
         
         raw_base64 = base64.urlsafe_b64encode(email_raw.encode("utf-8")).decode("utf-8")
 
-        url = "https://gmail.googleapis.com/gmail/v1/users/me/messages/send"
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Content-Type": "application/json"
-        }
         payload = {
             "raw": raw_base64,
             "threadId": thread_id
         } 
-        response = requests.post(url, headers=headers, json=payload)
+        response = gmail_send(access_token, payload)
         if response.status_code == 200:
             # Update quote status and sent_at timestamp
             quote.status = 'sent'
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import RFQ
+from .changes import record_rfq_deletions
 
 # Register your models here.
 @admin.register(RFQ)
@@ -21,3 +22,13 @@ class RFQAdmin(admin.ModelAdmin):
     )
     readonly_fields = ('created_at', 'updated_at')
     save_on_top = True
+
+    def delete_model(self, request, obj):
+        rfq_id = obj.id
+        super().delete_model(request, obj)
+        record_rfq_deletions([rfq_id])
+
+    def delete_queryset(self, request, queryset):
+        ids = list(queryset.values_list('id', flat=True))
+        super().delete_queryset(request, queryset)
+        record_rfq_deletions(ids)
@@ -0,0 +1,151 @@
+import json
+import logging
+import smtplib
+from decimal import Decimal, ROUND_HALF_UP
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.timezone import now
+from apps.jobs.utils import enqueue_job, enqueue_jobs, RetryJob, backoff_delay
+from utils.email_utils import send_html_email, smtp_pool
+from .broadcast import notify_rfq_module
+from .models import RFQ
+
+logger = logging.getLogger('myapp')
+
+AUTO_QUOTE_JOB = "rfq_auto_quote"
+AUTO_QUOTE_HANDLER = "apps.rfqs.auto_quote.send_auto_quote"
+
+# connection-level problems worth retrying; template / address errors are not
+TRANSIENT_EMAIL_ERRORS = (smtplib.SMTPException, OSError)
+
+
+def find_auto_quote_offers(mpns):
+    """
+    {mpn: latest RFQ with a live auto-quote offer} for many MPNs, in one query.
+    Served by the partial idx_rfq_auto_quote_offers index (mpn, updated_at DESC),
+    which only holds RFQs with a deadline.
+    """
+    mpns = {m for m in mpns if m}
+    if not mpns:
+        return {}
+    offers = (
+        RFQ.objects
+        .filter(mpn__in=mpns, auto_quote_deadline__gte=now(), offered_price__isnull=False)
+        .order_by('mpn', '-updated_at')
+        .distinct('mpn')
+    )
+    return {offer.mpn: offer for offer in offers}
+
+
+def find_auto_quote_offer(mpn):
+    """Latest RFQ with a live auto-quote offer for this MPN, or None."""
+    return find_auto_quote_offers([mpn]).get(mpn)
+
+
+def sweep_expired_auto_quotes():
+    """
+    Clear auto_quote_deadline on RFQs whose offer expired, so the partial offer
+    index only holds live offers. updated_at is bumped like disable_auto_quotes does,
+    so clients of the changes feed see the cleared deadline too.
+    Returns the number of RFQs swept.
+    """
+    swept_at = now()
+    return RFQ.objects.filter(auto_quote_deadline__lt=swept_at).update(auto_quote_deadline=None, updated_at=swept_at)
+
+
+def auto_quote_terms(offer, target_price):
+    """
+    Fields to copy from a live offer onto a new RFQ, or None when there is no
+    offer or the customer's target price is above the offered price.
+    """
+    if offer is None:
+        return None
+    if target_price:
+        try:
+            target_price = float(target_price)
+        except (TypeError, ValueError):
+            target_price = None
+            logger.error("Failed to convert target_price to float")
+    if target_price and offer.offered_price <= target_price:
+        return None
+    return {
+        'offered_price': offer.offered_price,
+        'qty_offered': offer.qty_offered,
+        'date_code': offer.date_code,
+        'manufacturer': offer.manufacturer,
+        'auto_quote_deadline': offer.auto_quote_deadline,
+        'parent_rfq': offer.id,
+    }
+
+
+def auto_quote_email_data(rfq_data, rfq_id, contact):
+    """Template context of the 'quote' email for a new RFQ that took an offer's terms."""
+    if hasattr(rfq_data, "dict"):
+        rfq_data = rfq_data.dict()  # QueryDict (form posts): one value per key
+    data = dict(rfq_data)
+    price = Decimal(str(data['offered_price']))
+    qty = Decimal(str(data['qty_offered']))
+    data.update({
+        'id': rfq_id,
+        'customer_name': contact.name if contact else None,
+        'company_name': contact.company.name if contact and contact.company else None,
+        'email': contact.email if contact else None,
+        'total_price': (price * qty).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP),
+        'my_company': settings.COMPANY_NAME,
+        'current_time': now().strftime("%d-%m-%Y %H:%M"),
+    })
+    return data
+
+
+def _job_params(rfq_id, email_data):
+    return {
+        "rfq_id": rfq_id,
+        "template": "quote",
+        "from_account": "rfq",
+        # Decimal / datetime values -> plain JSON for Job.params
+        "data": json.loads(json.dumps(email_data, cls=DjangoJSONEncoder)),
+    }
+
+
+def queue_auto_quote(rfq, email_data, user=None):
+    """
+    Queue the auto-quote email of a freshly created RFQ.
+    The RFQ is marked 'Quote Sent' by the job once the email is out, so
+    RFQ creation never waits for SMTP.
+    """
+    return enqueue_job(AUTO_QUOTE_JOB, AUTO_QUOTE_HANDLER, _job_params(rfq.id, email_data), user=user)
+
+
+def queue_auto_quotes(items, user=None):
+    """queue_auto_quote for [(rfq, email_data)] with one insert."""
+    params_list = [_job_params(rfq.id, email_data) for rfq, email_data in items]
+    return enqueue_jobs(AUTO_QUOTE_JOB, AUTO_QUOTE_HANDLER, params_list, user=user)
+
+
+def send_auto_quote(job):
+    """
+    Job handler: send the auto-quote over the worker's pooled SMTP connection
+    for the account, then mark the RFQ. SMTP errors are retried with
+    exponential backoff (EMAIL_QUEUE_RETRY_BASE_SECONDS, EMAIL_QUEUE_MAX_ATTEMPTS).
+    """
+    params = job.params
+    rfq = RFQ.objects.filter(pk=params["rfq_id"]).first()
+    if rfq is None:
+        return {"skipped": "RFQ was deleted"}
+
+    try:
+        with smtp_pool.connection(params["from_account"]) as connection:
+            sent = send_html_email(params["data"], params["template"], from_account=params["from_account"], connection=connection)
+    except TRANSIENT_EMAIL_ERRORS as e:
+        raise RetryJob(
+            f"SMTP error: {e}",
+            delay=backoff_delay(job.attempts, settings.EMAIL_QUEUE_RETRY_BASE_SECONDS),
+            max_attempts=settings.EMAIL_QUEUE_MAX_ATTEMPTS,
+        )
+    if sent is None:
+        raise ValueError(f"Email template {params['template']} not found")
+
+    RFQ.objects.filter(pk=rfq.pk).update(status='Quote Sent', updated_at=now())
+    notify_rfq_module({"id": rfq.id, "status": 'Quote Sent'})
+    logger.debug(f"Auto-quote for RFQ {rfq.id} sent (attempt {job.attempts})")
+    return {"rfq_id": rfq.id, "status": 'Quote Sent', "attempts": job.attempts}
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import threading
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+logger = logging.getLogger('myapp')
+
+# every signed-in user with access to the RFQ module (same rule as the REST API)
+RFQ_MODULE_GROUP = 'rfq_updates'
+
+
+def rfq_user_group(user_id):
+    """Group that only reaches the websocket connections of one user."""
+    return f'rfq_updates.user.{user_id}'
+
+
+def can_receive_rfq_updates(user):
+    return bool(user and user.is_authenticated and user.is_active)
+
+
+def _event(messages):
+    # a single update keeps its original shape; a burst becomes {"batch": [...], "count": n}
+    message = messages[0] if len(messages) == 1 else {"batch": messages, "count": len(messages)}
+    return {'type': 'send_rfq_update', 'message': message}
+
+
+def _send(group, messages):
+    try:
+        async_to_sync(get_channel_layer().group_send)(group, _event(messages))
+    except Exception as e:
+        logger.error(f"Error sending WebSocket message to {group}: {e}")
+
+
+async def _asend(group, messages):
+    try:
+        await get_channel_layer().group_send(group, _event(messages))
+    except Exception as e:
+        logger.error(f"Error sending WebSocket message to {group}: {e}")
+
+
+async def _running_loop():
+    return asyncio.get_running_loop()
+
+
+class UpdateCoalescer:
+    """
+    Collects RFQ updates per group and sends them as one message per debounce window,
+    so a burst (e.g. 50 RFQs created from an inbound email batch) costs the clients
+    one refresh instead of 50. The window starts with the first update after a flush.
+
+    The flush is scheduled on the ASGI server's event loop, which is the loop the
+    websocket consumers (and the in-memory channel layer's queues) live on. Outside
+    of the server (the run_jobs worker, management commands) it falls back to a timer
+    thread, which only reaches other processes through the Redis layer anyway.
+    """
+
+    def __init__(self, window=None):
+        self.window = window
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._scheduled = None  # concurrent.futures.Future or threading.Timer of the next flush
+        self._loop = None
+
+    def _server_loop(self):
+        """The event loop of the ASGI server if this process runs one, else None."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # in a sync view async_to_sync runs on the server's loop; elsewhere on a
+            # throwaway loop that is closed again by the time it returns
+            try:
+                loop = async_to_sync(_running_loop)()
+            except Exception:
+                loop = None
+        if loop is not None and loop.is_running():
+            self._loop = loop
+        elif self._loop is not None and (self._loop.is_closed() or not self._loop.is_running()):
+            self._loop = None
+        # a job thread of the web process (JOBS_RUN_IN_PROCESS) reuses the loop seen last
+        return self._loop
+
+    def add(self, group, message):
+        window = settings.RFQ_UPDATES_DEBOUNCE_SECONDS if self.window is None else self.window
+        if window <= 0:
+            _send(group, [message])
+            return
+        with self._lock:
+            self._pending.setdefault(group, []).append(message)
+            if self._scheduled is not None:
+                return
+            self._scheduled = True  # claimed; set to the real handle below
+        loop = self._server_loop()
+        if loop is not None:
+            scheduled = asyncio.run_coroutine_threadsafe(self._flush_later(window), loop)
+        else:
+            scheduled = threading.Timer(window, self.flush)
+            scheduled.daemon = True
+            scheduled.start()
+        with self._lock:
+            if self._scheduled is True:
+                self._scheduled = scheduled
+
+    def _take_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            scheduled, self._scheduled = self._scheduled, None
+        return pending, scheduled
+
+    async def _flush_later(self, window):
+        await asyncio.sleep(window)
+        pending, _ = self._take_pending()
+        for group, messages in pending.items():
+            await _asend(group, messages)
+
+    def flush(self):
+        """Send everything pending now (from a thread without a running event loop)."""
+        pending, scheduled = self._take_pending()
+        if scheduled is not None and scheduled is not True:
+            scheduled.cancel()
+        for group, messages in pending.items():
+            _send(group, messages)
+
+
+coalescer = UpdateCoalescer()
+
+
+def notify_rfq_module(message):
+    """Coalesced update for everyone looking at the RFQ grid."""
+    coalescer.add(RFQ_MODULE_GROUP, message)
+
+
+def notify_rfq_user(user, message):
+    """Update for the user who triggered it (e.g. bulk email results); not coalesced."""
+    if can_receive_rfq_updates(user):
+        _send(rfq_user_group(user.id), [message])
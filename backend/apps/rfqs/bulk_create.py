@@ -0,0 +1,113 @@
+import logging
+from django.db import transaction
+from apps.common.mpn import normalize_mpn
+from apps.companies.models import Company
+from apps.contacts.models import Contact
+from apps.inventory.stock_summary import stock_sources_for
+from .auto_quote import auto_quote_terms, auto_quote_email_data, find_auto_quote_offers, queue_auto_quotes
+from .broadcast import notify_rfq_module
+from .models import RFQ
+from .serializers import RFQBulkRowSerializer
+
+logger = logging.getLogger('myapp')
+
+BULK_CREATE_MAX_ROWS = 1000
+SENDER_FIELDS = ('email', 'contact_name', 'company_name', 'country')
+
+
+def resolve_contacts(rows):
+    """
+    {email: Contact (with company)} for the senders of the batch, in the same way
+    RFQViewSet.create resolves a single sender: existing contact by email, else a
+    new contact under the company with the email's domain (created if missing).
+    A sender without a contact / company name gets the email's local part / domain.
+    One email__in query, one domain__in query and at most two bulk inserts.
+    """
+    first_row = {}
+    for row in rows:
+        first_row.setdefault(row['email'], row)
+
+    contacts = {}
+    for contact in Contact.objects.select_related('company').filter(email__in=first_row).order_by('id'):
+        contacts.setdefault(contact.email, contact)
+
+    missing = [email for email in first_row if email not in contacts]
+    if not missing:
+        return contacts
+
+    domains = {email: email.split('@')[1] for email in missing}
+    companies = {}
+    for company in Company.objects.filter(domain__in=set(domains.values())).order_by('id'):
+        companies.setdefault(company.domain, company)
+
+    new_companies = {}
+    for email in missing:
+        domain = domains[email]
+        if domain not in companies and domain not in new_companies:
+            row = first_row[email]
+            new_companies[domain] = Company(name=row.get('company_name') or domain, domain=domain, country=row.get('country'))
+    Company.objects.bulk_create(new_companies.values())
+    companies.update(new_companies)
+
+    new_contacts = [
+        Contact(
+            name=first_row[email].get('contact_name') or email.split('@')[0],
+            email=email,
+            company=companies[domains[email]],
+        )
+        for email in missing
+    ]
+    Contact.objects.bulk_create(new_contacts)
+    contacts.update({contact.email: contact for contact in new_contacts})
+    return contacts
+
+
+def bulk_create_rfqs(payload, user=None):
+    """
+    Create a batch of inbound RFQs: [{email, contact_name, company_name, country, mpn, ...}].
+    Invalid rows are reported and skipped. Contacts, stock sources and auto-quote
+    offers are looked up once for the whole batch, the RFQs are inserted with one
+    bulk_create, auto-quotes are queued with one insert and a single websocket event is sent.
+    Returns {created, auto_quoted, errors}.
+    """
+    rows, errors = [], []
+    for index, item in enumerate(payload):
+        serializer = RFQBulkRowSerializer(data=item)
+        if serializer.is_valid():
+            rows.append(serializer.validated_data)
+        else:
+            errors.append({"index": index, "errors": serializer.errors})
+    if not rows:
+        return {"created": [], "auto_quoted": 0, "errors": errors}
+
+    mpns = {row['mpn'] for row in rows}
+    stock_sources = stock_sources_for(mpns)
+    offers = find_auto_quote_offers(mpns)
+
+    with transaction.atomic():
+        contacts = resolve_contacts(rows)
+
+        rfqs, quotes = [], []
+        for row in rows:
+            contact = contacts[row['email']]
+            fields = {k: v for k, v in row.items() if k not in SENDER_FIELDS}
+            fields['stock_source'] = stock_sources.get(normalize_mpn(row['mpn']))
+            terms = auto_quote_terms(offers.get(row['mpn']), row.get('target_price'))
+            if terms:
+                fields.update(terms)
+                fields['parent_rfq_id'] = fields.pop('parent_rfq')
+            rfqs.append(RFQ(customer=contact, company=contact.company, **fields))
+            quotes.append((contact, fields) if terms else None)
+
+        RFQ.objects.bulk_create(rfqs)
+        auto_quotes = [
+            (rfq, auto_quote_email_data(quote[1], rfq.id, quote[0]))
+            for rfq, quote in zip(rfqs, quotes) if quote
+        ]
+        if auto_quotes:
+            queue_auto_quotes(auto_quotes, user=user)
+
+    created_ids = [rfq.id for rfq in rfqs]
+    notify_rfq_module({"created_ids": created_ids, "count": len(created_ids)})
+    logger.debug(f"Bulk-created {len(created_ids)} RFQs ({len(auto_quotes)} auto-quoted, {len(errors)} invalid)")
+    return {"created": created_ids, "auto_quoted": len(auto_quotes), "errors": errors}
@@ -0,0 +1,97 @@
+import logging
+import smtplib
+from decimal import Decimal, ROUND_HALF_UP
+from django.conf import settings
+from django.utils.timezone import now
+from utils.email_utils import build_html_email, compile_email_template, smtp_pool
+from .broadcast import notify_rfq_module, notify_rfq_user
+from .models import RFQ
+
+logger = logging.getLogger('myapp')
+
+# status an RFQ gets once the template was sent
+TEMPLATE_STATUS = {
+    "quote": "Quote Sent",
+    "reminder": "Reminder Sent",
+    "lowtp": "T/P Request Sent",
+    "nostock": "No Stock Alert Sent",
+    "noexport": "No Export Alert Sent",
+    "mov": "MOV Requirement Sent",
+}
+
+# push a progress message to the sender every N emails
+PROGRESS_EVERY = 10
+
+
+def rfq_email_data(rfq, template, current_time):
+    """Template context for one RFQ (same keys the single-send path uses)."""
+    data = {
+        'id': str(rfq.id).zfill(6),
+        'mpn': rfq.mpn,
+        'qty_offered': rfq.qty_offered,
+        'offered_price': rfq.offered_price,
+        'date_code': rfq.date_code,
+        'manufacturer': rfq.manufacturer,
+        'customer_name': rfq.customer.name if rfq.customer else None,
+        'company_name': rfq.company.name if rfq.company else None,
+        'email': rfq.customer.email if rfq.customer else None,
+        'my_company': settings.COMPANY_NAME,
+        'current_time': current_time,
+    }
+    if template == "reminder":
+        price = Decimal(str(data['offered_price']))
+        qty = Decimal(str(data['qty_offered']))
+        data['total_price'] = (price * qty).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    return data
+
+
+def send_bulk_rfq_emails(rfq_ids, template, user=None, from_account='rfq'):
+    """
+    Send `template` to the customer of every RFQ in rfq_ids.
+    One query loads the RFQs with their contact and company, the template is
+    compiled once, every email goes over one SMTP session (reconnecting once
+    if the server drops it) and the statuses are written with one UPDATE.
+    Progress is pushed to the sender's websocket group.
+    Returns {success_count, failed_ids, total_count}.
+    """
+    total = len(rfq_ids)
+    rfq_ids = [int(i) for i in rfq_ids]
+    rfqs = list(RFQ.objects.select_related('customer', 'company').filter(id__in=rfq_ids).order_by('id'))
+    failed_ids = sorted(set(rfq_ids) - {rfq.id for rfq in rfqs})
+    compiled_template = compile_email_template(template)
+    if compiled_template is None:
+        return {"success_count": 0, "failed_ids": rfq_ids, "total_count": total}
+
+    current_time = now().strftime("%d-%m-%Y %H:%M")
+    sent_ids = []
+
+    def progress(done):
+        notify_rfq_user(user, {
+            "bulk_email_progress": {"done": done, "total": len(rfqs), "sent": len(sent_ids)},
+        })
+
+    with smtp_pool.connection(from_account) as connection:
+        for done, rfq in enumerate(rfqs, 1):
+            try:
+                data = rfq_email_data(rfq, template, current_time)
+                if not data['email']:
+                    raise ValueError("RFQ has no contact email")
+                email = build_html_email(data, compiled_template, from_account, connection)
+                try:
+                    email.send()
+                except smtplib.SMTPServerDisconnected:
+                    connection.close()
+                    connection.open()
+                    email.send()
+                sent_ids.append(rfq.id)
+            except Exception as e:
+                logger.error(f"Failed to send email for RFQ {rfq.id}: {e}")
+                failed_ids.append(rfq.id)
+            if done % PROGRESS_EVERY == 0:
+                progress(done)
+
+    if sent_ids:
+        RFQ.objects.filter(id__in=sent_ids).update(status=TEMPLATE_STATUS[template], updated_at=now())
+        notify_rfq_module({"updated_ids": sent_ids})
+    progress(len(rfqs))
+    return {"success_count": len(sent_ids), "failed_ids": failed_ids, "total_count": total}
@@ -0,0 +1,78 @@
+import base64
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import RFQ, RFQTombstone
+
+# more changes than this and the client is told to reload the list instead
+MAX_CHANGES = 1000
+
+
+class InvalidChangesToken(ValueError):
+    pass
+
+
+def encode_token(moment):
+    return base64.urlsafe_b64encode(json.dumps({"t": moment.isoformat()}).encode()).decode()
+
+
+def decode_token(token):
+    try:
+        moment = parse_datetime(json.loads(base64.urlsafe_b64decode(token.encode()))["t"])
+    except (ValueError, KeyError, TypeError):
+        moment = None
+    if moment is None:
+        raise InvalidChangesToken("Invalid since token")
+    return moment
+
+
+def record_rfq_deletions(ids):
+    """Tombstone deleted RFQ ids (call after the delete) and prune expired tombstones."""
+    ids = [i for i in ids if i is not None]
+    if not ids:
+        return
+    RFQTombstone.objects.bulk_create([RFQTombstone(rfq_id=i) for i in ids])
+    cutoff = timezone.now() - timedelta(days=settings.RFQ_TOMBSTONE_RETENTION_DAYS)
+    RFQTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+
+
+def rfq_changes(since):
+    """
+    RFQs created / updated and ids deleted since the `since` token.
+    Returns {"token", "reset", "updated": <RFQ queryset or None>, "deleted": [ids]}.
+
+    Each call re-reads RFQ_CHANGES_OVERLAP_SECONDS before the token, so rows
+    committed by transactions that were still open at the previous call are
+    not missed; clients apply changes by id, so the overlap is harmless.
+    reset=True means the client has to reload the full list: the token is older
+    than the tombstone retention, or there are more than MAX_CHANGES changes.
+    """
+    now = timezone.now()
+    token = encode_token(now)
+    if since is None:
+        return {"token": token, "reset": True, "updated": None, "deleted": []}
+
+    moment = decode_token(since)
+    if moment < now - timedelta(days=settings.RFQ_TOMBSTONE_RETENTION_DAYS):
+        return {"token": token, "reset": True, "updated": None, "deleted": []}
+    moment -= timedelta(seconds=settings.RFQ_CHANGES_OVERLAP_SECONDS)
+
+    updated = list(
+        RFQ.objects.select_related('customer__company', 'company')
+        .filter(updated_at__gt=moment)
+        .order_by('updated_at', 'id')[:MAX_CHANGES + 1]
+    )
+    deleted = list(
+        RFQTombstone.objects.filter(deleted_at__gt=moment)
+        .order_by('deleted_at')
+        .values_list('rfq_id', flat=True)[:MAX_CHANGES + 1]
+    )
+    if len(updated) + len(deleted) > MAX_CHANGES:
+        return {"token": token, "reset": True, "updated": None, "deleted": []}
+
+    # an RFQ deleted after an update is only reported as deleted
+    gone = set(deleted)
+    updated = [rfq for rfq in updated if rfq.id not in gone]
+    return {"token": token, "reset": False, "updated": updated, "deleted": sorted(gone)}
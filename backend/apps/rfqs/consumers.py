@@ -1,22 +1,30 @@
 import json
 from channels.generic.websocket import AsyncWebsocketConsumer
+from .broadcast import RFQ_MODULE_GROUP, rfq_user_group, can_receive_rfq_updates
 
 class RFQConsumer(AsyncWebsocketConsumer):
     async def connect(self):
-        self.group_name = 'rfq_updates'
+        user = self.scope.get('user')
+        if not can_receive_rfq_updates(user):
+            # rejects the handshake; the client connects with ?token=<knox token>
+            await self.close()
+            return
 
-        await self.channel_layer.group_add(
-            self.group_name,
-            self.channel_name
-        )
+        self.group_names = [RFQ_MODULE_GROUP, rfq_user_group(user.id)]
+        for group_name in self.group_names:
+            await self.channel_layer.group_add(
+                group_name,
+                self.channel_name
+            )
 
         await self.accept()
 
     async def disconnect(self, close_code):
-        await self.channel_layer.group_discard(
-            self.group_name,
-            self.channel_name
-        )
+        for group_name in getattr(self, 'group_names', []):
+            await self.channel_layer.group_discard(
+                group_name,
+                self.channel_name
+            )
 
     async def send_rfq_update(self, event):
         message = event['message']
@@ -24,4 +32,3 @@ class RFQConsumer(AsyncWebsocketConsumer):
         await self.send(text_data=json.dumps({
             'message': message
         }))
-        
\ No newline at end of file
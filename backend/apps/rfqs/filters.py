@@ -0,0 +1,23 @@
+import django_filters
+from .models import RFQ
+
+
+class CharInFilter(django_filters.BaseInFilter, django_filters.CharFilter):
+    pass
+
+
+class RFQFilter(django_filters.FilterSet):
+    # ?status=pending,Quote Sent  /  ?source=Website,IC Source
+    status = CharInFilter(field_name="status", lookup_expr="in")
+    source = CharInFilter(field_name="source", lookup_expr="in")
+    # date range filters
+    created_from = django_filters.DateFilter(field_name="created_at", lookup_expr="date__gte")
+    created_to   = django_filters.DateFilter(field_name="created_at", lookup_expr="date__lte")
+
+    class Meta:
+        model = RFQ
+        fields = {
+            "company": ["exact"],
+            "customer": ["exact"],
+            "stock_source": ["exact"],
+        }
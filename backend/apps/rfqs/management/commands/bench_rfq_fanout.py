@@ -0,0 +1,111 @@
+import asyncio
+import multiprocessing
+import statistics
+import time
+from channels.layers import DEFAULT_CHANNEL_LAYER, channel_layers
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.rfqs.broadcast import UpdateCoalescer
+
+BENCH_GROUP = 'rfq_updates.bench'
+
+
+def _worker(index, clients, updates, timeout, ready, results):
+    """One simulated ASGI worker: `clients` websocket channels in BENCH_GROUP on its own layer instance."""
+    layer = channel_layers.make_backend(DEFAULT_CHANNEL_LAYER)
+
+    async def client(channel):
+        messages, latencies = 0, []
+        deadline = time.monotonic() + timeout
+        while len(latencies) < updates and time.monotonic() < deadline:
+            try:
+                event = await asyncio.wait_for(layer.receive(channel), deadline - time.monotonic())
+            except asyncio.TimeoutError:
+                break
+            received_at = time.time()
+            message = event['message']
+            batch = message['batch'] if 'batch' in message else [message]
+            messages += 1
+            latencies += [received_at - m['sent_at'] for m in batch]
+        return messages, latencies
+
+    async def run():
+        channels = [await layer.new_channel() for _ in range(clients)]
+        for channel in channels:
+            await layer.group_add(BENCH_GROUP, channel)
+        ready.put(index)
+        per_client = await asyncio.gather(*(client(channel) for channel in channels))
+        for channel in channels:
+            await layer.group_discard(BENCH_GROUP, channel)
+        return per_client
+
+    results.put((index, asyncio.run(run())))
+
+
+class Command(BaseCommand):
+    help = (
+        "Fan-out benchmark for the RFQ websocket updates: N worker processes with C clients each "
+        "receive U updates sent through the configured channel layer. "
+        "Run it with CHANNEL_REDIS_URL set; the in-memory layer cannot reach other processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help="Worker processes (simulated ASGI workers).")
+        parser.add_argument('--clients', type=int, default=25, help="Websocket clients per worker.")
+        parser.add_argument('--updates', type=int, default=50, help="RFQ updates to send in one burst.")
+        parser.add_argument('--window', type=float, default=settings.RFQ_UPDATES_DEBOUNCE_SECONDS,
+                            help="Coalescing window in seconds (0 sends every update on its own).")
+        parser.add_argument('--timeout', type=float, default=10.0, help="Seconds the clients wait for updates.")
+
+    def handle(self, *args, **options):
+        workers, clients, updates = options['workers'], options['clients'], options['updates']
+        backend = settings.CHANNEL_LAYERS[DEFAULT_CHANNEL_LAYER]['BACKEND']
+        self.stdout.write(f"Layer: {backend}")
+        if backend.endswith('InMemoryChannelLayer'):
+            self.stdout.write(self.style.WARNING("In-memory layer: worker processes will not receive anything."))
+
+        ready, results = multiprocessing.Queue(), multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=_worker, args=(i, clients, updates, options['timeout'], ready, results))
+            for i in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        for _ in processes:
+            ready.get(timeout=30)
+
+        coalescer = UpdateCoalescer(window=options['window'])
+        t0 = time.time()
+        for n in range(updates):
+            coalescer.add(BENCH_GROUP, {'id': n, 'sent_at': time.time()})
+        if options['window'] > 0:
+            time.sleep(options['window'])
+        coalescer.flush()
+        send_time = time.time() - t0
+
+        per_worker = dict(results.get(timeout=options['timeout'] + 30) for _ in processes)
+        for process in processes:
+            process.join()
+
+        latencies, messages, delivered = [], 0, 0
+        for index in sorted(per_worker):
+            worker_latencies = [l for _, client_latencies in per_worker[index] for l in client_latencies]
+            worker_messages = sum(m for m, _ in per_worker[index])
+            latencies += worker_latencies
+            messages += worker_messages
+            delivered += len(worker_latencies)
+            self.stdout.write(
+                f"worker {index}: {len(worker_latencies)}/{clients * updates} updates "
+                f"in {worker_messages} messages"
+            )
+
+        expected = workers * clients * updates
+        self.stdout.write(f"Sent {updates} updates in {send_time * 1000:.0f} ms (window {options['window']}s)")
+        self.stdout.write(f"Delivered {delivered}/{expected} updates in {messages} websocket messages")
+        if latencies:
+            latencies.sort()
+            p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else latencies[-1]
+            self.stdout.write(
+                f"Latency ms: p50 {statistics.median(latencies) * 1000:.1f}, "
+                f"p95 {p95 * 1000:.1f}, max {latencies[-1] * 1000:.1f}"
+            )
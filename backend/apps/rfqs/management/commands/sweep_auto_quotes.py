@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from apps.rfqs.auto_quote import sweep_expired_auto_quotes
+
+
+class Command(BaseCommand):
+    help = "Clear expired auto-quote deadlines so the live-offer index stays small (run periodically, e.g. hourly)."
+
+    def handle(self, *args, **options):
+        swept = sweep_expired_auto_quotes()
+        self.stdout.write(f"Cleared {swept} expired auto-quote deadlines")
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:56
+
+import apps.common.mpn
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0003_alter_company_options'),
+        ('contacts', '0001_initial'),
+        ('inventory', '0010_inventoryitem_mpn_key_inventoryitem_idx_inv_mpn_key'),
+        ('rfqs', '0010_alter_rfq_offered_price'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rfq',
+            name='mpn_key',
+            field=apps.common.mpn.MpnKeyField(blank=True, default='', max_length=255),
+        ),
+        migrations.RunSQL(
+            "UPDATE rfqs_rfq SET mpn_key = upper(regexp_replace(mpn, '[^A-Za-z0-9]', '', 'g'))",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='rfq',
+            index=models.Index(fields=['mpn_key'], name='idx_rfq_mpn_key', opclasses=['text_pattern_ops']),
+        ),
+    ]
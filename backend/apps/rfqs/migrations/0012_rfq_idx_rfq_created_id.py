@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-18 20:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfqs', '0011_rfq_mpn_key_rfq_idx_rfq_mpn_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rfq',
+            index=models.Index(fields=['created_at', 'id'], name='idx_rfq_created_id'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.4 on 2026-10-18 20:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfqs', '0012_rfq_idx_rfq_created_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rfq',
+            index=models.Index(fields=['updated_at'], name='idx_rfq_updated_at'),
+        ),
+        migrations.CreateModel(
+            name='RFQTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rfq_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
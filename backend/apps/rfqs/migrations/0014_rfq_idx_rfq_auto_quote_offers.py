@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-18 20:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfqs', '0013_rfq_idx_rfq_updated_at_rfqtombstone'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rfq',
+            index=models.Index(condition=models.Q(('auto_quote_deadline__isnull', False)), fields=['mpn', '-updated_at'], name='idx_rfq_auto_quote_offers'),
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 from apps.contacts.models import Contact
 from apps.companies.models import Company
 from apps.inventory.models import InventoryItem
+from apps.common.mpn import MpnKeyField
 from django.utils.timezone import now
 from datetime import timedelta
 
@@ -10,6 +11,7 @@ from datetime import timedelta
 
 class RFQ(models.Model):
     mpn = models.CharField(max_length=255)  # manufacturer part number
+    mpn_key = MpnKeyField()  # normalized mpn for prefix / typeahead search
     target_price = models.DecimalField(max_digits=10, decimal_places=5, blank=True, null=True)
     manufacturer = models.CharField(max_length=255, blank=True, null=True)
     customer = models.ForeignKey(Contact, on_delete=models.SET_NULL, blank=True, null=True)
@@ -33,6 +35,21 @@ class RFQ(models.Model):
     auto_quote_deadline = models.DateTimeField(blank=True, null=True)
     parent_rfq = models.ForeignKey('self', on_delete=models.SET_NULL, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['mpn_key'], opclasses=['text_pattern_ops'], name='idx_rfq_mpn_key'),
+            # keyset pagination of the RFQ list (newest first)
+            models.Index(fields=['created_at', 'id'], name='idx_rfq_created_id'),
+            # delta sync ("changes since token")
+            models.Index(fields=['updated_at'], name='idx_rfq_updated_at'),
+            # live auto-quote offers by MPN (newest first); expired deadlines are cleared by sweep_auto_quotes
+            models.Index(
+                fields=['mpn', '-updated_at'],
+                condition=models.Q(auto_quote_deadline__isnull=False),
+                name='idx_rfq_auto_quote_offers',
+            ),
+        ]
+
     def set_auto_quote_deadline(self, validity_period):
         if validity_period and validity_period > 0:
             self.auto_quote_deadline = now() + timedelta(days=validity_period)
@@ -40,4 +57,15 @@ class RFQ(models.Model):
             self.auto_quote_deadline = None
 
     def __str__(self):
-        return self.mpn
\ No newline at end of file
+        return self.mpn
+
+class RFQTombstone(models.Model):
+    """
+    Log of deleted RFQ ids for the delta-sync endpoint (see apps.rfqs.changes).
+    Written by every delete path; rows older than RFQ_TOMBSTONE_RETENTION_DAYS are pruned.
+    """
+    rfq_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"RFQ {self.rfq_id} deleted at {self.deleted_at}"
@@ -10,4 +10,55 @@ class RFQSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = RFQ
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+
+class RFQListCompanySerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    country = serializers.CharField()
+
+
+class RFQListContactSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    email = serializers.CharField()
+    company_name = serializers.CharField(source='company.name', default=None)
+    company_object = RFQListCompanySerializer(source='company', default=None)
+
+
+class RFQListSerializer(serializers.ModelSerializer):
+    """
+    Read-only RFQ row for the grid: only the columns rfqs.jsx renders, plus the
+    contact fields the bulk email modal reads, in RFQSerializer's contact_object
+    shape. The drawer loads the full RFQ from the detail endpoint.
+    Expects select_related('customer__company').
+    """
+    contact_object = RFQListContactSerializer(source='customer', read_only=True, default=None)
+
+    class Meta:
+        model = RFQ
+        fields = [
+            'id', 'mpn', 'target_price', 'qty_requested', 'manufacturer', 'stock_source', 'source',
+            'status', 'created_at', 'updated_at', 'contact_object',
+        ]
+
+
+class RFQBulkRowSerializer(serializers.ModelSerializer):
+    """
+    One inbound RFQ of a bulk-create batch. Contact / company are resolved from
+    the sender fields for the whole batch at once, so no relation is validated here.
+    """
+    email = serializers.EmailField(write_only=True)
+    # missing names are filled in by resolve_contacts (Contact.name / Company.name are NOT NULL)
+    contact_name = serializers.CharField(write_only=True, required=False, allow_blank=True, allow_null=True, max_length=255)
+    company_name = serializers.CharField(write_only=True, required=False, allow_blank=True, allow_null=True, max_length=255)
+    country = serializers.CharField(write_only=True, required=False, allow_blank=True, allow_null=True, max_length=50)
+
+    class Meta:
+        model = RFQ
+        fields = [
+            'email', 'contact_name', 'company_name', 'country',
+            'mpn', 'target_price', 'manufacturer', 'qty_requested', 'qty_offered',
+            'offered_price', 'date_code', 'source', 'status', 'notes',
+        ]
@@ -1,3 +1,115 @@
-from django.test import TestCase
+import asyncio
+import threading
+import time
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from django.test import SimpleTestCase, override_settings
+from apps.companies.models import Company
+from apps.contacts.models import Contact
+from .broadcast import UpdateCoalescer
+from .models import RFQ
+from .serializers import RFQListSerializer
 
-# Create your tests here.
+IN_MEMORY_LAYER = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+GROUP = 'rfq_updates.test'
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYER)
+class UpdateCoalescerTests(SimpleTestCase):
+    window = 0.2
+
+    async def _join(self):
+        layer = get_channel_layer()
+        channel = await layer.new_channel()
+        await layer.group_add(GROUP, channel)
+        return layer, channel
+
+    async def _receive(self, layer, channel):
+        return await asyncio.wait_for(layer.receive(channel), timeout=self.window + 1)
+
+    async def test_burst_from_sync_views_is_delivered_within_the_window(self):
+        # the views call notify_rfq_module from a sync thread of the server's event loop
+        layer, channel = await self._join()
+        coalescer = UpdateCoalescer(window=self.window)
+        started = time.monotonic()
+        for n in range(3):
+            await sync_to_async(coalescer.add)(GROUP, {'id': n})
+
+        event = await self._receive(layer, channel)
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(event['message'], {'batch': [{'id': 0}, {'id': 1}, {'id': 2}], 'count': 3})
+        self.assertGreaterEqual(elapsed, self.window * 0.9)
+        self.assertLess(elapsed, self.window + 0.5)
+
+    async def test_single_update_keeps_its_shape(self):
+        layer, channel = await self._join()
+        coalescer = UpdateCoalescer(window=self.window)
+        await sync_to_async(coalescer.add)(GROUP, {'id': 7})
+
+        event = await self._receive(layer, channel)
+
+        self.assertEqual(event, {'type': 'send_rfq_update', 'message': {'id': 7}})
+
+    async def test_zero_window_sends_immediately(self):
+        layer, channel = await self._join()
+        coalescer = UpdateCoalescer(window=0)
+        await sync_to_async(coalescer.add)(GROUP, {'id': 1})
+        await sync_to_async(coalescer.add)(GROUP, {'id': 2})
+
+        first = await self._receive(layer, channel)
+        second = await self._receive(layer, channel)
+
+        self.assertEqual([first['message'], second['message']], [{'id': 1}, {'id': 2}])
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYER)
+class UpdateCoalescerWithoutServerLoopTests(SimpleTestCase):
+    """The run_jobs worker / management commands: no ASGI loop, the flush runs on a timer thread."""
+
+    def setUp(self):
+        self.layer = get_channel_layer()
+        self.channel = async_to_sync(self.layer.new_channel)()
+        async_to_sync(self.layer.group_add)(GROUP, self.channel)
+
+    def test_flush_sends_pending_updates_as_one_batch(self):
+        coalescer = UpdateCoalescer(window=60)
+        coalescer.add(GROUP, {'id': 1})
+        coalescer.add(GROUP, {'id': 2})
+
+        coalescer.flush()
+        event = async_to_sync(self.layer.receive)(self.channel)
+
+        self.assertEqual(event['message'], {'batch': [{'id': 1}, {'id': 2}], 'count': 2})
+        self.assertEqual(coalescer._pending, {})
+        self.assertIsNone(coalescer._scheduled)
+
+    def test_timer_flushes_after_the_window(self):
+        coalescer = UpdateCoalescer(window=0.1)
+        coalescer.add(GROUP, {'id': 1})
+        self.assertIsInstance(coalescer._scheduled, threading.Timer)
+
+        coalescer._scheduled.join(timeout=2)
+        event = async_to_sync(self.layer.receive)(self.channel)
+
+        self.assertEqual(event['message'], {'id': 1})
+
+
+class RFQListSerializerTests(SimpleTestCase):
+    def test_row_holds_only_the_grid_columns(self):
+        company = Company(id=3, name='Acme', country='IL')
+        rfq = RFQ(id=1, mpn='LM317T', status='pending', customer=Contact(id=2, name='Dana', email='d@acme.com', company=company))
+
+        row = RFQListSerializer(rfq).data
+
+        self.assertEqual(set(row), {
+            'id', 'mpn', 'target_price', 'qty_requested', 'manufacturer', 'stock_source', 'source',
+            'status', 'created_at', 'updated_at', 'contact_object',
+        })
+        self.assertEqual(row['contact_object'], {
+            'id': 2, 'name': 'Dana', 'email': 'd@acme.com', 'company_name': 'Acme',
+            'company_object': {'id': 3, 'name': 'Acme', 'country': 'IL'},
+        })
+
+    def test_row_without_a_contact(self):
+        self.assertIsNone(RFQListSerializer(RFQ(id=1, mpn='LM317T')).data['contact_object'])
@@ -1,14 +1,23 @@
 from django.shortcuts import render
-from .models import RFQ, Contact, Company, InventoryItem
-from .serializers import RFQSerializer
+from .models import RFQ, Contact, Company
+from .serializers import RFQSerializer, RFQListSerializer
+from .filters import RFQFilter
+from .changes import rfq_changes, record_rfq_deletions, InvalidChangesToken
 from rest_framework import viewsets, status
 from rest_framework import permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.decorators import action, api_view
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
+from .broadcast import notify_rfq_module, notify_rfq_user
+from .auto_quote import queue_auto_quote, find_auto_quote_offer, auto_quote_terms, auto_quote_email_data
+from .bulk_email import send_bulk_rfq_emails, TEMPLATE_STATUS
+from .bulk_create import bulk_create_rfqs, BULK_CREATE_MAX_ROWS
 from utils.email_utils import send_html_email
+from apps.common.mpn import normalize_mpn
+from apps.inventory.stock_summary import stock_source_for
+from apps.common.pagination import KeysetPagination
+from apps.common.grid import GridFilterBackend
+from rest_framework.settings import api_settings
 import logging
 from django.utils.timezone import now, timedelta
 from django.conf import settings
@@ -19,10 +28,10 @@ logger = logging.getLogger('myapp')
 def search_rfqs(request, mpn):
     """
     Search for RFQs by mpn.
-    Return all RFQs that match the exact mpn.
+    Return all RFQs that match the mpn, ignoring case, dashes and spaces.
     """
     try:
-        rfqs = RFQ.objects.filter(mpn=mpn)
+        rfqs = RFQ.objects.select_related('customer__company').filter(mpn_key=normalize_mpn(mpn))
         serializer = RFQSerializer(rfqs, many=True)
         return Response(serializer.data)
     except RFQ.DoesNotExist:
@@ -30,8 +39,28 @@ def search_rfqs(request, mpn):
 
 
 class RFQViewSet(viewsets.ModelViewSet):
-    queryset = RFQ.objects.all()
+    """
+    List: newest first (created_at, id), keyset-paginated when page_size / cursor is sent,
+    filterable by status / source (comma separated) and created_from / created_to.
+    filterModel / sortModel / quickFilter follow the RFQ grid's columns (see GridFilterBackend).
+    """
+    queryset = RFQ.objects.select_related('customer__company', 'company')
     serializer_class = RFQSerializer
+    pagination_class = KeysetPagination
+    filterset_class = RFQFilter
+    filter_backends = [*api_settings.DEFAULT_FILTER_BACKENDS, GridFilterBackend]
+    grid_fields = [
+        'id', 'mpn', 'target_price', 'qty_requested', 'manufacturer', 'stock_source', 'source',
+        'status', 'created_at', 'updated_at',
+    ]
+    grid_quick_search_fields = ['mpn_key', 'manufacturer', 'source', 'status']
+    ordering_fields = ['created_at', 'updated_at', 'mpn', 'status', 'source', 'target_price', 'qty_requested']
+    ordering = ['-created_at', '-id']
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return RFQListSerializer
+        return RFQSerializer
 
     @action(detail=False, methods=['delete'], url_path='bulk-delete')
     def bulk_delete(self, request):
@@ -40,9 +69,51 @@ class RFQViewSet(viewsets.ModelViewSet):
             return Response({"error": "No RFQ IDs provided"}, status=status.HTTP_400_BAD_REQUEST)
         if not isinstance(ids, list):
             return Response({"error": "ids must be a list"}, status=status.HTTP_400_BAD_REQUEST)
-        RFQ.objects.filter(id__in=ids).delete()
+        rfqs = RFQ.objects.filter(id__in=ids)
+        deleted_ids = list(rfqs.values_list('id', flat=True))
+        rfqs.delete()
+        record_rfq_deletions(deleted_ids)
         return Response({"success": "RFQs deleted successfully"})
 
+    @action(detail=False, methods=['get'], url_path='changes')
+    def changes(self, request):
+        """
+        Delta sync for the RFQ grid.
+        GET ?since=<token> -> {token, reset, updated: [rows], deleted: [ids]}.
+        Without since (or with reset=true) the client reloads the list and keeps the token.
+        """
+        try:
+            result = rfq_changes(request.query_params.get('since'))
+        except InvalidChangesToken as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        updated = result['updated']
+        result['updated'] = RFQListSerializer(updated, many=True).data if updated is not None else []
+        return Response(result)
+
+    def perform_destroy(self, instance):
+        rfq_id = instance.id
+        instance.delete()
+        record_rfq_deletions([rfq_id])
+
+    @action(detail=False, methods=['post'], url_path='bulk-create')
+    def bulk_create(self, request):
+        """
+        Create a batch of inbound RFQs in a few set-based queries.
+        Body: {"rfqs": [{email, contact_name, company_name, country, mpn, target_price, qty_requested, source, ...}]}
+        Returns {created: [ids], auto_quoted, errors: [{index, errors}]}.
+        """
+        rows = request.data.get('rfqs')
+        if not rows:
+            return Response({"error": "No RFQs provided"}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(rows, list):
+            return Response({"error": "rfqs must be a list"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > BULK_CREATE_MAX_ROWS:
+            return Response({"error": f"At most {BULK_CREATE_MAX_ROWS} RFQs per request"}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = bulk_create_rfqs(rows, user=request.user)
+        code = status.HTTP_201_CREATED if result['created'] else status.HTTP_400_BAD_REQUEST
+        return Response(result, status=code)
+
     @action(detail=False, methods=['post'], url_path='disable-auto-quotes')
     def disable_auto_quotes(self, request):
         mpn = request.data.get('mpn')
@@ -52,7 +123,7 @@ class RFQViewSet(viewsets.ModelViewSet):
         updated_count = RFQ.objects.filter(
             mpn=mpn,
             auto_quote_deadline__gte=now()
-        ).update(auto_quote_deadline=None)
+        ).update(auto_quote_deadline=None, updated_at=now())
         
         return Response({'message': f'Disabled auto-quotes for {updated_count} RFQs.'})
     
@@ -85,79 +156,31 @@ class RFQViewSet(viewsets.ModelViewSet):
         request.data['company'] = contact.company.id if contact.company else None
 
         # check if the MPN is in stock and if so, set the stock_source field accordingly
+        # ('Stock' / 'Stock & Available' / 'Available' is precomputed in the stock summary)
         mpn = request.data.get('mpn')
-        suppliers = InventoryItem.objects.filter(mpn=mpn).values_list('supplier', flat=True)
-        stock_source = None
-        if suppliers:
-            stock_supplier = settings.STOCK_SUPPLIER.lower().replace("-", "").replace(" ", "")
-            if len(suppliers) == 1 and stock_supplier in suppliers[0].lower().replace("-", "").replace(" ", ""):
-                stock_source = 'Stock'
-            elif any(stock_supplier in supplier.lower().replace("-", "").replace(" ", "") for supplier in suppliers):
-                stock_source = 'Stock & Available'
-            else:
-                stock_source = 'Available'
+        stock_source = stock_source_for(mpn)
 
         # check if there is a similar RFQ with a recent auto_quote_deadline and use its offer
-        similar_rfq = RFQ.objects.filter(
-            mpn=mpn,
-            auto_quote_deadline__gte=now(),
-            offered_price__isnull=False
-        ).order_by('-updated_at').first()
+        terms = auto_quote_terms(find_auto_quote_offer(mpn), request.data.get('target_price'))
 
         rfq_data = request.data.copy()
         rfq_data['stock_source'] = stock_source
-
-        if similar_rfq:
-            new_tp = request.data.get('target_price')
-            if new_tp:
-                try:
-                    new_tp = float(new_tp)
-                except ValueError:
-                    new_tp = None
-                    logger.error("Failed to convert target_price to float")
-
-            if new_tp is None or similar_rfq.offered_price > new_tp:
-                rfq_data.update({
-                    'offered_price': similar_rfq.offered_price,
-                    'qty_offered': similar_rfq.qty_offered,
-                    'date_code': similar_rfq.date_code,
-                    'manufacturer': similar_rfq.manufacturer,
-                    'auto_quote_deadline': similar_rfq.auto_quote_deadline,
-                    'parent_rfq': similar_rfq.id,
-                    'customer_name': contact.name if contact else None,
-                    'company_name': contact.company.name if contact.company else None,
-                    'email': contact.email if contact else None
-                })
+        if terms:
+            rfq_data.update(terms)
 
         # create the RFQ
         serializer = self.get_serializer(data=rfq_data)
         serializer.is_valid(raise_exception=True)
         rfq_instance = serializer.save()
 
-        # send the RFQ to the customer if the there is similar RFQ
-        if similar_rfq:
-            rfq_data['id'] = rfq_instance.id
-            price = Decimal(str(rfq_data['offered_price']))
-            qty = Decimal(str(rfq_data['qty_offered']))
-            rfq_data['total_price'] = (price * qty).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-            # rfq_data['total_price'] = Decimal(rfq_data['offered_price']) * int(rfq_data['qty_offered'])
-            print(f'Sending email with total price: {rfq_data["total_price"]}')
-            rfq_data['my_company'] = settings.COMPANY_NAME
-            rfq_data['current_time'] = now().strftime("%d-%m-%Y %H:%M")
-            logger.debug(f"Found similar RFQ with MPN: {mpn}. Sending auto-quote email to customer")
-            try:
-                send_html_email(rfq_data, 'quote', from_account='rfq')
-                rfq_instance.status = 'Quote Sent'
-                rfq_instance.save(update_fields=['status'])
-            except Exception as e:
-                logger.error(f"Failed to send email for RFQ {rfq_instance.id}: {e}")
+        # send the offer to the customer if there is a similar RFQ
+        if terms:
+            logger.debug(f"Found similar RFQ with MPN: {mpn}. Queueing auto-quote email to customer")
+            # sent by the job worker over a pooled SMTP connection; the job marks the RFQ 'Quote Sent'
+            queue_auto_quote(rfq_instance, auto_quote_email_data(rfq_data, rfq_instance.id, contact), user=request.user)
 
-        # send the RFQ to the websocket
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)('rfq_updates', {
-            'type': 'send_rfq_update',
-            'message': serializer.data
-        })
+        # send the RFQ to the websocket (coalesced with other updates in the same window)
+        notify_rfq_module(serializer.data)
 
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
@@ -175,17 +198,7 @@ class RFQViewSet(viewsets.ModelViewSet):
         self.perform_update(serializer)
 
         # send the RFQ new status to the websocket
-        try:
-            channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
-                "rfq_updates",
-                {
-                    "type": "send_rfq_update",
-                    "message": serializer.data,
-                },
-            )
-        except Exception as e:
-            logger.error(f"Error sending WebSocket message: {e}")
+        notify_rfq_module(serializer.data)
 
         return Response(serializer.data, status=status.HTTP_200_OK) 
     
@@ -199,65 +212,24 @@ class RFQViewSet(viewsets.ModelViewSet):
         if not template:
             return Response({"error": "No email template provided"}, status=status.HTTP_400_BAD_REQUEST)
         
-        rfqs = RFQ.objects.filter(id__in=rfq_ids)
-        success_count = 0
-        failed_ids = []
-        template_status = {
-            "quote": "Quote Sent",
-            "reminder": "Reminder Sent",
-            "lowtp": "T/P Request Sent",
-            "nostock": "No Stock Alert Sent",
-            "noexport": "No Export Alert Sent",
-            "mov": "MOV Requirement Sent"
-        }
-        for rfq in rfqs:
-            try:
-                formData = {
-                    'id': str(rfq.id).zfill(6),
-                    'mpn': rfq.mpn,
-                    'qty_offered': rfq.qty_offered,
-                    'offered_price': rfq.offered_price,
-                    'date_code': rfq.date_code,
-                    'manufacturer': rfq.manufacturer,
-                    'customer_name': rfq.customer.name if rfq.customer else None,
-                    'company_name': rfq.company.name if rfq.company else None,
-                    'email': rfq.customer.email if rfq.customer else None,
-                    'my_company': settings.COMPANY_NAME,
-                    'current_time': now().strftime("%d-%m-%Y %H:%M")
-                }
-
-                if (template=="reminder"):
-                    price = Decimal(str(formData['offered_price']))
-                    qty = Decimal(str(formData['qty_offered']))
-                    formData['total_price'] = (price * qty).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-                    # formData['total_price'] = float(formData['offered_price']) * int(formData['qty_offered'])
+        if not isinstance(rfq_ids, list):
+            return Response({"error": "rfq_ids must be a list"}, status=status.HTTP_400_BAD_REQUEST)
+        if template not in TEMPLATE_STATUS:
+            return Response({"error": f"Unknown email template '{template}'"}, status=status.HTTP_400_BAD_REQUEST)
 
-                result = send_html_email(formData, template, from_account='rfq')
-                if result is None:
-                    raise Exception("Failed to send email")
-                rfq.status = template_status[template]
-                rfq.save(update_fields=['status'])
-                success_count += 1
-            except Exception as e:
-                logger.error(f"Failed to send email for RFQ {rfq.id}: {e}")
-                failed_ids.append(rfq.id)
+        try:
+            result = send_bulk_rfq_emails(rfq_ids, template, user=request.user)
+        except ValueError:
+            return Response({"error": "rfq_ids must be a list of ids"}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            # SMTP login / connect failed before anything was sent
+            logger.error(f"Bulk email failed: {e}")
+            result = {"success_count": 0, "failed_ids": rfq_ids, "total_count": len(rfq_ids)}
 
-        # send the RFQ new status to the websocket
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)('rfq_updates', {
-            'type': 'send_rfq_update',
-            'message': {
-                "failed_ids": failed_ids,
-                "success_count": success_count,
-                "total_count": len(rfq_ids),
-            }
-        })
+        # the send results only go to the sender
+        notify_rfq_user(request.user, result)
 
-        return Response({
-            "success_count": success_count,
-            "failed_ids": failed_ids,
-            "total_count": len(rfq_ids)
-        }, status=status.HTTP_200_OK)
+        return Response(result, status=status.HTTP_200_OK)
     
     @action(detail=False, methods=['patch'], url_path='bulk-edit')
     def bulk_edit(self,request):
@@ -269,6 +241,10 @@ class RFQViewSet(viewsets.ModelViewSet):
         if not updates:
             return Response({"error": "No update fields provided."}, status=status.HTTP_400_BAD_REQUEST)
         try:
+            # QuerySet.update() skips auto_now and MpnKeyField.pre_save
+            updates["updated_at"] = now()
+            if "mpn" in updates:
+                updates["mpn_key"] = normalize_mpn(updates["mpn"])
             updated_count = RFQ.objects.filter(id__in=ids).update(**updates)
             return Response({
                 "success": f"Updated {updated_count} RFQ(s) successfully.",
@@ -295,12 +271,8 @@ class SendEmailView(APIView):
         if send_html_email(formData, template, from_account='rfq') is None:
             return Response({"error": "Failed to send email"}, status=status.HTTP_500_INTERNAL_SERVER)
         
-        # send the RFQ new status to the websocket
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)('rfq_updates', {
-            'type': 'send_rfq_update',
-            'message': template + ' was sent'
-        })
+        # confirm to the sender's websocket connections
+        notify_rfq_user(request.user, template + ' was sent')
 
         return Response({"success": "Email sent successfully"})
     
\ No newline at end of file
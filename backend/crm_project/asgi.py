@@ -13,15 +13,25 @@ from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
 import apps.rfqs.routing
+import apps.inventory.routing
+from apps.common.ws_auth import KnoxTokenAuthMiddleware
 
 settings_module = 'crm_project.deployment_settings' if 'RENDER_EXTERNAL_HOSTNAME' in os.environ else 'crm_project.settings'
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
 
+django_asgi_app = get_asgi_application()
+
+from apps.email_templates.cache import warm_template_cache
+warm_template_cache()
+
 application = ProtocolTypeRouter({
-    "http": get_asgi_application(),
+    "http": django_asgi_app,
     "websocket": AuthMiddlewareStack(
-        URLRouter(
-            apps.rfqs.routing.websocket_urlpatterns
+        KnoxTokenAuthMiddleware(
+            URLRouter(
+                apps.rfqs.routing.websocket_urlpatterns
+                + apps.inventory.routing.websocket_urlpatterns
+            )
         )
     ),
 })
\ No newline at end of file
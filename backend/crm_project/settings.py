@@ -64,6 +64,7 @@ INSTALLED_APPS = [
     'apps.crm_accounts',
     'apps.quotes',
     'apps.orders',
+    'apps.jobs',
     'rest_framework',
     'channels',
     'django_extensions',
@@ -72,11 +73,29 @@ INSTALLED_APPS = [
 
 ASGI_APPLICATION = 'crm_project.asgi.application'
 
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+# Set CHANNEL_REDIS_URL (e.g. redis://localhost:6379/0) to share websocket groups
+# between ASGI workers; without it the in-process layer only reaches clients of the same worker.
+CHANNEL_REDIS_URL = get_env_variable('CHANNEL_REDIS_URL', default=None)
+if CHANNEL_REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': [CHANNEL_REDIS_URL],
+                'capacity': 1000,
+                'expiry': 30,
+            },
+        }
     }
-}
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        }
+    }
+
+# RFQ websocket updates sent within this window are coalesced into one message
+RFQ_UPDATES_DEBOUNCE_SECONDS = float(get_env_variable('RFQ_UPDATES_DEBOUNCE_SECONDS', default='0.5'))
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
@@ -282,4 +301,65 @@ ASSISTANT_ID = get_env_variable('ASSISTANT_ID')
 GOOGLE_OAUTH_CLIENT_ID = get_env_variable('GOOGLE_OAUTH_CLIENT_ID')
 GOOGLE_OAUTH_CLIENT_SECRET = get_env_variable('GOOGLE_OAUTH_CLIENT_SECRET')
 GOOGLE_OAUTH_REDIRECT_URI = get_env_variable('GOOGLE_OAUTH_REDIRECT_URI')
-MFA_ISSUER = get_env_variable('MFA_ISSUER', default='DotzHub')
\ No newline at end of file
+MFA_ISSUER = get_env_variable('MFA_ISSUER', default='DotzHub')
+# pg_trgm similarity (0-1) an MPN needs to show up in inventory "similar parts"
+INVENTORY_SIMILARITY_THRESHOLD = float(get_env_variable('INVENTORY_SIMILARITY_THRESHOLD', default='0.5'))
+
+# Background jobs: the worker is `python manage.py run_jobs`.
+# Set JOBS_RUN_IN_PROCESS=True to also start jobs in a thread of the web process (single-service deployments).
+JOBS_RUN_IN_PROCESS = str(get_env_variable('JOBS_RUN_IN_PROCESS', default='False')).lower() in ('1', 'true', 'yes')
+# A running job without any progress update for this long belongs to a dead worker: run_jobs
+# requeues it, or fails it once it has been started JOBS_MAX_ATTEMPTS times.
+JOBS_STALE_AFTER_SECONDS = int(get_env_variable('JOBS_STALE_AFTER_SECONDS', default='1800'))
+JOBS_MAX_ATTEMPTS = int(get_env_variable('JOBS_MAX_ATTEMPTS', default='3'))
+# RFQ delta sync (GET /api/rfqs/changes/): how far back each call re-reads to cover
+# transactions that committed late, and how long delete tombstones are kept.
+RFQ_CHANGES_OVERLAP_SECONDS = int(get_env_variable('RFQ_CHANGES_OVERLAP_SECONDS', default='5'))
+RFQ_TOMBSTONE_RETENTION_DAYS = int(get_env_variable('RFQ_TOMBSTONE_RETENTION_DAYS', default='7'))
+
+# Outbound email jobs (RFQ auto-quotes): attempts before giving up, and the first
+# retry delay in seconds (doubled on every further attempt).
+EMAIL_QUEUE_MAX_ATTEMPTS = int(get_env_variable('EMAIL_QUEUE_MAX_ATTEMPTS', default='5'))
+EMAIL_QUEUE_RETRY_BASE_SECONDS = int(get_env_variable('EMAIL_QUEUE_RETRY_BASE_SECONDS', default='30'))
+
+# Compiled email templates are cached per process; entries older than this many seconds
+# are revalidated against EmailTemplate.updated_at (edits from other processes).
+EMAIL_TEMPLATE_CACHE_TTL = int(get_env_variable('EMAIL_TEMPLATE_CACHE_TTL', default='60'))
+
+# CRM mail routing index (email / company domain -> account) is kept per process; after this
+# many seconds it is revalidated against the CRMAccount table (changes from other processes).
+CRM_ROUTING_CACHE_TTL = int(get_env_variable('CRM_ROUTING_CACHE_TTL', default='60'))
+# Route mail from an unknown address to the account whose company owns the sender's domain.
+# Off by default: only exact account addresses are strategic unless this is turned on.
+CRM_ROUTE_BY_COMPANY_DOMAIN = str(get_env_variable('CRM_ROUTE_BY_COMPANY_DOMAIN', default='False')).lower() in ('1', 'true', 'yes')
+# Public mailbox providers never route by domain (RFQ intake creates a Company per sender domain,
+# so e.g. a "gmail.com" company exists); neither does a domain shared by several companies.
+CRM_FREE_MAIL_DOMAINS = get_list_env_variable(
+    'CRM_FREE_MAIL_DOMAINS',
+    default='gmail.com,googlemail.com,outlook.com,hotmail.com,live.com,msn.com,yahoo.com,icloud.com,me.com,'
+            'aol.com,proton.me,protonmail.com,gmx.com,gmx.net,mail.com,yandex.com,yandex.ru,qq.com,163.com,126.com',
+)
+
+# CRM message_id dedup cache: Bloom filter target false-positive rate, size of the LRU of
+# recently seen ids, and how often (seconds) the filter is rebuilt from the table.
+CRM_DEDUP_BLOOM_ERROR_RATE = float(get_env_variable('CRM_DEDUP_BLOOM_ERROR_RATE', default='0.01'))
+CRM_DEDUP_LRU_SIZE = int(get_env_variable('CRM_DEDUP_LRU_SIZE', default='10000'))
+CRM_DEDUP_REBUILD_SECONDS = int(get_env_variable('CRM_DEDUP_REBUILD_SECONDS', default='3600'))
+
+# Gmail thread viewer: concurrent attachment-body fetches per thread, how long a cached
+# thread is served before its historyId is revalidated, and how many of an account's
+# latest threads are prefetched when its CRM drawer opens.
+GMAIL_ATTACHMENT_CONCURRENCY = int(get_env_variable('GMAIL_ATTACHMENT_CONCURRENCY', default='8'))
+GMAIL_THREAD_CACHE_TTL = int(get_env_variable('GMAIL_THREAD_CACHE_TTL', default='60'))
+GMAIL_PREFETCH_THREADS = int(get_env_variable('GMAIL_PREFETCH_THREADS', default='5'))
+
+# Google API client (OAuth, Gmail): request timeout (seconds), idle keep-alive sessions kept
+# per process, retries on 429 / 5xx with exponential backoff, calls slower than GOOGLE_API_SLOW_MS
+# are logged, and access tokens are refreshed this many seconds before they expire.
+GOOGLE_API_TIMEOUT = int(get_env_variable('GOOGLE_API_TIMEOUT', default='15'))
+GOOGLE_API_POOL_SIZE = int(get_env_variable('GOOGLE_API_POOL_SIZE', default='10'))
+GOOGLE_API_MAX_RETRIES = int(get_env_variable('GOOGLE_API_MAX_RETRIES', default='3'))
+GOOGLE_API_RETRY_BASE_SECONDS = float(get_env_variable('GOOGLE_API_RETRY_BASE_SECONDS', default='0.5'))
+GOOGLE_API_RETRY_MAX_SECONDS = float(get_env_variable('GOOGLE_API_RETRY_MAX_SECONDS', default='8'))
+GOOGLE_API_SLOW_MS = int(get_env_variable('GOOGLE_API_SLOW_MS', default='2000'))
+GOOGLE_TOKEN_REFRESH_MARGIN_SECONDS = int(get_env_variable('GOOGLE_TOKEN_REFRESH_MARGIN_SECONDS', default='300'))
@@ -15,3 +15,6 @@ settings_module = 'crm_project.deployment_settings' if 'RENDER_EXTERNAL_HOSTNAME
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
 
 application = get_wsgi_application()
+
+from apps.email_templates.cache import warm_template_cache
+warm_template_cache()
@@ -1,13 +1,77 @@
 from django.template.loader import render_to_string
 from django.core.mail import EmailMessage, get_connection
+from contextlib import contextmanager
 import logging
+import threading
+import time
 from django.conf import settings
-from apps.email_templates.models import EmailTemplate
-from apps.email_templates.serializers import EmailTemplateSerializer
-from django.template import Template, Context
+from apps.email_templates.cache import template_cache
+from django.template import Context
 logger = logging.getLogger('myapp')
 
 
+def smtp_connection(from_account="default"):
+    """A (not yet opened) SMTP connection for an EMAIL_ACCOUNTS entry."""
+    email_config = settings.EMAIL_ACCOUNTS.get(from_account, settings.EMAIL_ACCOUNTS["default"])
+    return get_connection(
+        host=email_config["EMAIL_HOST"],
+        port=email_config["EMAIL_PORT"],
+        username=email_config["EMAIL_HOST_USER"],
+        password=email_config["EMAIL_HOST_PASSWORD"],
+        use_tls=email_config["EMAIL_USE_TLS"],
+    )
+
+
+class SMTPConnectionPool:
+    """
+    Keeps one open, authenticated SMTP connection per EMAIL_ACCOUNTS entry so
+    long-running workers don't pay the connect + TLS + login round trips per email.
+    A connection is used by one thread at a time (concurrent senders open their own),
+    is reopened after max_idle seconds (servers drop idle sessions) and is thrown
+    away when a send through it fails.
+    """
+
+    def __init__(self, max_idle=60):
+        self.max_idle = max_idle
+        self._lock = threading.Lock()
+        self._idle = {}  # account -> (connection, last_used)
+
+    @contextmanager
+    def connection(self, from_account="default"):
+        with self._lock:
+            conn, last_used = self._idle.pop(from_account, (None, 0))
+        if conn is not None and time.monotonic() - last_used > self.max_idle:
+            self._close(conn)
+            conn = None
+        if conn is None:
+            conn = smtp_connection(from_account)
+            conn.open()
+        try:
+            yield conn
+        except Exception:
+            self._close(conn)
+            raise
+        with self._lock:
+            spare = self._idle.get(from_account)
+            self._idle[from_account] = (conn, time.monotonic())
+        if spare:
+            self._close(spare[0])
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conn, _ in idle.values():
+            self._close(conn)
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+smtp_pool = SMTPConnectionPool()
 
 
 def parse_recipients(to_emails):
@@ -35,41 +99,25 @@ def parse_recipients(to_emails):
     return result
 
 
-# Function to send an HTML email
-# data contains the email data including the email recipient, email subject, and email variables to be used in the template
-# template is the name of the template to be used for the email subject and body
-# from_account is an optional parameter that specifies the email account to be used for sending the email
-# attachments is an optional parameter that contains a list of triplets (file_name, file_content, content_type) to be attached to the email
-def send_html_email(data, template, from_account="default", attachments=None):
-    email_config = settings.EMAIL_ACCOUNTS.get(from_account, settings.EMAIL_ACCOUNTS["default"])
-    print(email_config)
-    connection = get_connection(
-        host=email_config["EMAIL_HOST"],
-        port=email_config["EMAIL_PORT"],
-        username=email_config["EMAIL_HOST_USER"],
-        password=email_config["EMAIL_HOST_PASSWORD"],
-        use_tls=email_config["EMAIL_USE_TLS"],
-    )
-
-    print(f'Email data: {data}')
-
-    # Get the email subject and body from the database
-    email_template = EmailTemplate.objects.filter(name=template).first()
-    email_template_serializer = EmailTemplateSerializer(email_template)
-    email_subject = email_template_serializer.data.get('subject')
-    email_body = email_template_serializer.data.get('content')
-    if not email_subject or not email_body:
+def compile_email_template(template):
+    """
+    Compiled (subject, body) Templates of an EmailTemplate, or None if it is missing / empty.
+    Served from the process-wide template cache (apps.email_templates.cache).
+    """
+    compiled = template_cache.get(template)
+    if compiled is None or not compiled.subject.source or not compiled.body.source:
         logger.error(f"Email template {template} not found")
-        print(f"Email template {template} not found")
         return None
-    print(f'Email template: {email_subject}')
-    email_subject = Template(email_subject).render(Context(data))
-    email_body = email_body.replace("{{items_table}}", "{{items_table|safe}}")
-    email_body = Template(email_body).render(Context(data))
+    return compiled.subject, compiled.items_table_body
+
 
+def build_html_email(data, compiled_template, from_account="default", connection=None, attachments=None):
+    """Render a compiled template with data into an html EmailMessage to data['email']."""
+    email_config = settings.EMAIL_ACCOUNTS.get(from_account, settings.EMAIL_ACCOUNTS["default"])
+    subject_template, body_template = compiled_template
     email = EmailMessage(
-        subject=email_subject,
-        body=email_body,
+        subject=subject_template.render(Context(data)),
+        body=body_template.render(Context(data)),
         from_email=email_config["EMAIL_HOST_USER"],
         to=[data['email']],
         connection=connection
@@ -79,8 +127,26 @@ def send_html_email(data, template, from_account="default", attachments=None):
     if attachments:
         for file_name, file_content, content_type in attachments:
             email.attach(file_name, file_content.read(), content_type)
+    return email
+
+
+# Function to send an HTML email
+# data contains the email data including the email recipient, email subject, and email variables to be used in the template
+# template is the name of the template to be used for the email subject and body
+# from_account is an optional parameter that specifies the email account to be used for sending the email
+# attachments is an optional parameter that contains a list of triplets (file_name, file_content, content_type) to be attached to the email
+# connection is an optional already-open connection (e.g. from smtp_pool); it is left open after sending
+def send_html_email(data, template, from_account="default", attachments=None, connection=None):
+    if connection is None:
+        connection = smtp_connection(from_account)
+
+    # Get the email subject and body from the database
+    compiled_template = compile_email_template(template)
+    if compiled_template is None:
+        return None
 
-    email.send()    
+    email = build_html_email(data, compiled_template, from_account, connection, attachments)
+    email.send()
     return 1
 
 # TO DO: create "system" email account in settings.py and use it for system emails - from_account="system"
@@ -88,13 +154,7 @@ def send_html_email(data, template, from_account="default", attachments=None):
 def send_system_email(to_email, subject, template_path, context=None, from_account="inventory", attachments=None):
     context = context or {}
     email_config = settings.EMAIL_ACCOUNTS.get(from_account, settings.EMAIL_ACCOUNTS["default"])
-    connection = get_connection(
-        host=email_config["EMAIL_HOST"],
-        port=email_config["EMAIL_PORT"],
-        username=email_config["EMAIL_HOST_USER"],
-        password=email_config["EMAIL_HOST_PASSWORD"],
-        use_tls=email_config["EMAIL_USE_TLS"],
-    )
+    connection = smtp_connection(from_account)
 
     html_body = render_to_string(template_path, context)
     to_list = parse_recipients(to_email)
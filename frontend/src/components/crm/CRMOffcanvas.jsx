@@ -9,6 +9,9 @@ import { showToast } from '../common/toast';
 import GmailThreadViewer from './GmailThreadViewer';
 import QuoteModal from '../quotes/QuoteModal';
 
+// interactions are loaded into the drawer this many at a time
+const INTERACTIONS_PAGE_SIZE = 25;
+
 const CRMOffcanvas = ({ id, account, onDelete, fetchAccounts }) => {
     const [accountData, setAccountData] = useState({
         name: '',
@@ -22,6 +25,9 @@ const CRMOffcanvas = ({ id, account, onDelete, fetchAccounts }) => {
     });
 
     const [interactions, setInteractions] = useState([]);
+    const [interactionCount, setInteractionCount] = useState(0);
+    const [interactionsCursor, setInteractionsCursor] = useState(null); // next page, null = all loaded
+    const [loadingInteractions, setLoadingInteractions] = useState(false);
     const [tasks, setTasks] = useState([]);
     const [newInteraction, setNewInteraction] = useState({
         type: 'note',
@@ -46,11 +52,28 @@ const CRMOffcanvas = ({ id, account, onDelete, fetchAccounts }) => {
                 created_at: account.created_at || '',
                 last_interaction: account.last_interaction || '',
             });
-            setInteractions(account.interactions || []);
+            setInteractionCount(account.interaction_count || 0);
             setTasks(account.tasks || []);
+            setInteractions([]);
+            fetchInteractions(null);
         }
     }, [account]);
 
+    // the history is paged (newest first) instead of embedded in the account
+    const fetchInteractions = async (cursor) => {
+        setLoadingInteractions(true);
+        try {
+            const params = { page_size: INTERACTIONS_PAGE_SIZE, ...(cursor && { cursor }) };
+            const response = await axiosInstance.get(`/api/crm/accounts/${account.id}/interactions/`, { params });
+            setInteractions(prev => cursor ? [...prev, ...response.data.results] : response.data.results);
+            setInteractionsCursor(response.data.next_cursor);
+        } catch (error) {
+            console.error('Failed to load interactions:', error);
+        } finally {
+            setLoadingInteractions(false);
+        }
+    };
+
     const refreshAccount = async () => {
         try {
             const response = await axiosInstance.get(`/api/crm/accounts/${account.id}/`);
@@ -66,6 +89,7 @@ const CRMOffcanvas = ({ id, account, onDelete, fetchAccounts }) => {
                 created_at: updatedAccount.created_at || '',
                 last_interaction: updatedAccount.last_interaction || '',
             });
+            setInteractionCount(updatedAccount.interaction_count || 0);
         } catch (error) {
             console.error('Failed to refresh account:', error);
         }
@@ -89,6 +113,7 @@ const CRMOffcanvas = ({ id, account, onDelete, fetchAccounts }) => {
                 summary: newInteraction.summary,
             });
             setInteractions(prev => [response.data, ...prev]);
+            setInteractionCount(prev => prev + 1);
             setNewInteraction({ type: 'note', summary: '' });
         } catch (error) {
             console.error('Failed to add interaction:', error);
@@ -103,6 +128,7 @@ const CRMOffcanvas = ({ id, account, onDelete, fetchAccounts }) => {
         try {
             await axiosInstance.delete(`/api/crm/interactions/${id}/`);
             setInteractions(prev => prev.filter(i => i.id !== id));
+            setInteractionCount(prev => Math.max(prev - 1, 0));
         } catch (error) {
             console.error('Failed to delete interaction:', error);
         }
@@ -205,7 +231,7 @@ const CRMOffcanvas = ({ id, account, onDelete, fetchAccounts }) => {
                             <div className="card shadow-sm bg-light">
                                 <div className="card-body">
                                     <h6 className="card-title text-primary">Summary</h6>
-                                    <p><strong>Interactions:</strong> <span className="badge bg-secondary">{interactions.length}</span></p>
+                                    <p><strong>Interactions:</strong> <span className="badge bg-secondary">{interactionCount}</span></p>
                                     <p><strong>Open Tasks:</strong> <span className="badge bg-warning text-dark">{tasks.filter(t => !t.is_completed).length}</span></p>
                                     <p><strong>Notes:</strong> {accountData.notes ? accountData.notes : <span className="text-muted">None</span>}</p>
                                     <p><strong>Last Interaction:</strong> {accountData.last_interaction ? new Date(accountData.last_interaction).toLocaleString('en-GB', {
@@ -247,7 +273,7 @@ const CRMOffcanvas = ({ id, account, onDelete, fetchAccounts }) => {
 
                                     {/* Interactions List */}
                                     {interactions.length === 0 ? (
-                                        <p className="text-muted">No interactions found.</p>
+                                        <p className="text-muted">{loadingInteractions ? 'Loading interactions...' : 'No interactions found.'}</p>
                                     ) : (
                                         <div className="list-group">
                                             {interactions.map((interaction, idx) => (
@@ -344,6 +370,15 @@ const CRMOffcanvas = ({ id, account, onDelete, fetchAccounts }) => {
                                             ))}
                                         </div>
                                     )}
+                                    {interactionsCursor && (
+                                        <button
+                                            className="btn btn-sm btn-outline-primary w-100"
+                                            disabled={loadingInteractions}
+                                            onClick={() => fetchInteractions(interactionsCursor)}
+                                        >
+                                            {loadingInteractions ? 'Loading...' : `Load more (${interactions.length} of ${interactionCount})`}
+                                        </button>
+                                    )}
                                 </div>
 
                                 {/* Tasks Tab */}
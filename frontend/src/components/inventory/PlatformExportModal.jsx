@@ -16,6 +16,10 @@ import SortableItem from "./SortableItem";
 import "./export-modal.css";
 import { showToast } from "../common/toast";
 
+const JOB_POLL_INTERVAL_MS = 2000;
+// give up polling after this long (e.g. no job worker is running)
+const JOB_MAX_WAIT_MS = 10 * 60 * 1000;
+
 // Helpers
 const uniqBy = (arr, keyFn) => {
   const map = new Map();
@@ -273,6 +277,22 @@ const PlatformExportModal = ({ id }) => {
     window.URL.revokeObjectURL(url);
   };
 
+  const waitForJob = async (jobId) => {
+    const deadline = Date.now() + JOB_MAX_WAIT_MS;
+    let job = null;
+    while (Date.now() < deadline) {
+      const { data } = await axiosInstance.get(`/api/jobs/${jobId}/`);
+      if (data.status === "succeeded" || data.status === "failed") return data;
+      job = data;
+      await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+    }
+    const error = new Error(`Export job ${jobId} did not finish in time`);
+    error.toastMessage = job?.status === "queued"
+      ? "Export is still waiting in the queue. Is the job worker (run_jobs) running?"
+      : "Export is taking too long. Check the job status later.";
+    throw error;
+  };
+
   const handleExport = async (action) => {
     try {
       setIsExporting(true);
@@ -331,14 +351,18 @@ const PlatformExportModal = ({ id }) => {
         });
       }
 
-      const res = await axiosInstance.post(
-        "/api/inventory/export/platforms/",
-        payload,
-        { responseType: action !== "send" ? "blob" : undefined }
-      );
+      // The export runs as a background job: queue it, then poll until it finishes
+      const res = await axiosInstance.post("/api/inventory/export/platforms/", payload);
+      const job = await waitForJob(res.data.job_id);
+      if (job.status !== "succeeded") {
+        const error = new Error(job.progress_message || "Export job failed");
+        error.toastMessage = `Export failed: ${job.progress_message || "unknown error"}`;
+        throw error;
+      }
 
       if (action !== "send") {
-        downloadBlobAsZip(res.data);
+        const file = await axiosInstance.get(`/api/jobs/${job.id}/download/`, { responseType: "blob" });
+        downloadBlobAsZip(file.data);
       }
 
       if (action === "send") {
@@ -351,7 +375,7 @@ const PlatformExportModal = ({ id }) => {
 
     } catch (e) {
       console.error("Export failed:", e);
-      showToast({ title: "Export", message: "Export failed. Please try again.", type: "danger" });
+      showToast({ title: "Export", message: e.toastMessage || "Export failed. Please try again.", type: "danger" });
     } finally {
       setIsExporting(false);
     }
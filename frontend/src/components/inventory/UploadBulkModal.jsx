@@ -2,11 +2,23 @@ import React, { useState, useEffect, useRef } from 'react';
 import axiosInstance from '../../AxiosInstance';
 import Modal from '../common/modal';
 import { showToast } from '../common/toast';
+import { CONFIG } from '../../config';
+
+// open a progress socket for this upload (authenticated like the REST API); resolves once connected (or failed)
+const openProgressSocket = (uploadId, onMessage) => new Promise((resolve) => {
+    const token = localStorage.getItem('access_token');
+    const ws = new WebSocket(`${CONFIG.WS_ROOT_URL}inventory/uploads/${uploadId}/?token=${encodeURIComponent(token || '')}`);
+    ws.onmessage = (event) => onMessage(JSON.parse(event.data).message);
+    ws.onopen = () => resolve(ws);
+    ws.onerror = () => resolve(ws);
+});
 
 const UploadBulkModal = ({ id, fetchInventory }) => {
     const [file, setFile] = useState(null);
     const [isUploading, setIsUploading] = useState(false);
     const [failedRows, setFailedRows] = useState([]);
+    const [mode, setMode] = useState('append'); // 'append' | 'replace'
+    const [progress, setProgress] = useState(null); // { processed, total, success_count, failed_count, done }
     const fileInputRef = useRef();
 
     const handleFileChange = (e) => {
@@ -21,9 +33,15 @@ const UploadBulkModal = ({ id, fetchInventory }) => {
         }
         const formData = new FormData(); 
         formData.append('file', file);
+        formData.append('mode', mode);
+        const uploadId = crypto.randomUUID();
+        formData.append('upload_id', uploadId);
+        let progressSocket = null;
 
         try {
             setIsUploading(true);
+            setProgress(null);
+            progressSocket = await openProgressSocket(uploadId, setProgress);
             const response = await axiosInstance.post('api/inventory/upload/', formData, {
                 headers: {
                     'Content-Type': 'multipart/form-data',
@@ -34,7 +52,9 @@ const UploadBulkModal = ({ id, fetchInventory }) => {
             const failed = response.data.failed_details || [];
             setFailedRows(failed);
             const total = successCount + failedCount;
-            const baseMessage = `${successCount} item(s) uploaded successfully out of ${total}.`;
+            const baseMessage = mode === 'replace'
+                ? `${response.data.inserted} added, ${response.data.updated} updated, ${response.data.deleted} removed, ${response.data.unchanged} unchanged.`
+                : `${successCount} item(s) uploaded successfully out of ${total}.`;
             if(successCount === 0) {
                 showToast({ 
                     type: 'danger',
@@ -64,6 +84,8 @@ const UploadBulkModal = ({ id, fetchInventory }) => {
             showToast({ type: 'danger', title: 'Upload Failed', message: 'Something went wrong during upload', icon: '<i class="bi bi-exclamation-triangle-fill"></i>' });
             setFailedRows(error?.response?.data?.failed_details || []);
         } finally {
+            if (progressSocket) progressSocket.close();
+            setProgress(null);
             setFile(null);
             if(fileInputRef.current) fileInputRef.current.value = null;
             setIsUploading(false);
@@ -78,18 +100,36 @@ const UploadBulkModal = ({ id, fetchInventory }) => {
                     <input
                         type="file"
                         className="form-control"
+                        accept=".xlsx,.csv"
                         onChange={handleFileChange}
                         ref={fileInputRef}
                     />
                 </div>
+                <div className="mb-3">
+                    <div className="form-check form-check-inline">
+                        <input className="form-check-input" type="radio" id={`${id}-mode-append`} checked={mode === 'append'} onChange={() => setMode('append')} />
+                        <label className="form-check-label" htmlFor={`${id}-mode-append`}>Add to inventory</label>
+                    </div>
+                    <div className="form-check form-check-inline">
+                        <input className="form-check-input" type="radio" id={`${id}-mode-replace`} checked={mode === 'replace'} onChange={() => setMode('replace')} />
+                        <label className="form-check-label" htmlFor={`${id}-mode-replace`}>Replace supplier stock</label>
+                    </div>
+                </div>
                 <div className="alert alert-warning" role="alert">
                     <i className="bi bi-exclamation-circle me-2"></i>
                     Please note:
-                    <ul className="mb-0 mt-1">
-                        <li>This will <strong>add</strong> new items to your existing inventory.</li>
-                        <li>Existing inventory will <strong>not</strong> be overwritten or cleared.</li>
-                        <li>The upload process might take a few minutes depending on file size.</li>
-                    </ul>
+                    {mode === 'append' ? (
+                        <ul className="mb-0 mt-1">
+                            <li>This will <strong>add</strong> new items to your existing inventory.</li>
+                            <li>Existing inventory will <strong>not</strong> be overwritten or cleared.</li>
+                        </ul>
+                    ) : (
+                        <ul className="mb-0 mt-1">
+                            <li>The stock of every supplier in the file will be <strong>replaced</strong> by the file.</li>
+                            <li>Items of those suppliers that are missing from the file will be <strong>removed</strong>.</li>
+                            <li>Nothing is changed if any row is invalid.</li>
+                        </ul>
+                    )}
                 </div>
                 <button type="button" className="btn btn-primary" onClick={handleUpload} disabled={isUploading}>
                     {isUploading ? (
@@ -101,6 +141,19 @@ const UploadBulkModal = ({ id, fetchInventory }) => {
                         'Upload'
                     )}
                 </button>
+                {isUploading && progress && (
+                    <div className="mt-3">
+                        <div className="progress" role="progressbar">
+                            <div
+                                className="progress-bar progress-bar-striped progress-bar-animated"
+                                style={{ width: `${progress.total ? Math.min(100, Math.round(progress.processed * 100 / progress.total)) : 100}%` }}
+                            ></div>
+                        </div>
+                        <small className="text-muted">
+                            {progress.processed} row(s) processed{progress.total ? ` of ~${progress.total}` : ''}, {progress.failed_count} failed
+                        </small>
+                    </div>
+                )}
                 {failedRows.length > 0 && (
                     <div className="mt-4">
                         <h6 className="text-danger">Failed Rows:</h6>
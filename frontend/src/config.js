@@ -1,8 +1,10 @@
 const isDevlopment = import.meta.env.MODE === 'development';
+const wsBaseUrl = isDevlopment ? import.meta.env.VITE_WS_BASE_URL_LOCAL : import.meta.env.VITE_WS_BASE_URL_DEPLOY;
 
 export const CONFIG = {
     API_BASE_URL: isDevlopment ? import.meta.env.VITE_API_BASE_URL_LOCAL : import.meta.env.VITE_API_BASE_URL_DEPLOY,
-    WS_BASE_URL: isDevlopment ? import.meta.env.VITE_WS_BASE_URL_LOCAL : import.meta.env.VITE_WS_BASE_URL_DEPLOY,
+    WS_BASE_URL: wsBaseUrl,
+    WS_ROOT_URL: (wsBaseUrl || '').replace(/rfqs\/?$/, ''), // ".../ws/"
     DEFAULT_SUPPLIER: import.meta.env.VITE_DEFAULT_SUPPLIER || "Unknown Supplier",
     IS_DEV: isDevlopment,
 };
@@ -1,4 +1,4 @@
-import React, { useEffect, useState, useRef, useCallback } from 'react';
+import React, { useEffect, useState, useRef, useCallback, useMemo } from 'react';
 import axiosInstance from '../AxiosInstance';
 import { AgGridReact } from 'ag-grid-react';
 import { AllCommunityModule, ModuleRegistry, themeQuartz } from 'ag-grid-community';
@@ -13,14 +13,27 @@ import KanbanBoard from '../components/crm/KanbanBoard';
 
 ModuleRegistry.registerModules([AllCommunityModule]);
 
+// the table loads accounts from the server in blocks of this size (infinite row model)
+const ACCOUNTS_BLOCK_SIZE = 100;
+// the kanban loads at most this many accounts per status column
+const KANBAN_COLUMN_SIZE = 200;
+const ACCOUNT_STATUSES = ['new', 'active', 'slow', 'inactive', 'archived'];
+
 const CRMAccounts = () => {
-  const [accounts, setAccounts] = useState([]);
+  const [accounts, setAccounts] = useState([]); // kanban cards
   const [viewMode, setViewMode] = useState('table'); // table / kanban
   const [selectedAccount, setSelectedAccount] = useState(null);
-  const [activeUser, setActiveUser] = useState("All");
-  const [uniqueUsers, setUniqueUsers] = useState([]);
+  const [activeUser, setActiveUser] = useState("All"); // "All" or a user id
+  const [statusFilter, setStatusFilter] = useState("");
+  const [users, setUsers] = useState([]);
 
   const gridRef = useRef();
+  const quickFilterRef = useRef('');
+  const quickFilterTimer = useRef(null);
+  // the status / assigned_to params sent with every request (read by the grid datasource)
+  const serverFilterRef = useRef({});
+  // next_cursor of each loaded block, keyed by the startRow of the block that follows it
+  const cursorsRef = useRef({ key: null, next: {} });
   const myTheme = themeQuartz
     .withParams({
       browserColorScheme: "light",
@@ -28,35 +41,83 @@ const CRMAccounts = () => {
       headerTextColor: "#ffffff",
     });
 
-  const fetchAccounts = () => {
-    axiosInstance.get('/api/crm/accounts/')
-      .then((res) => setAccounts(res.data))
+  serverFilterRef.current = {
+    ...(activeUser !== "All" && { assigned_to: activeUser }),
+    ...(statusFilter && { status: statusFilter }),
+  };
+
+  // table rows come from the server block by block: status / assigned_to, column
+  // filters, sort and the quick filter are applied by the API
+  const accountsDatasource = useMemo(() => ({
+    getRows: async (params) => {
+      const { startRow, endRow, sortModel, filterModel } = params;
+      const query = {
+        sortModel: JSON.stringify(sortModel || []),
+        filterModel: JSON.stringify(filterModel || {}),
+        quickFilter: quickFilterRef.current,
+        ...serverFilterRef.current,
+      };
+      const key = JSON.stringify(query);
+      if (cursorsRef.current.key !== key) {
+        cursorsRef.current = { key, next: {} };
+      }
+      const cursor = cursorsRef.current.next[startRow];
+      const page = cursor ? { cursor, page_size: endRow - startRow } : { startRow, endRow };
+      try {
+        const { data } = await axiosInstance.get('/api/crm/accounts/', { params: { ...query, ...page } });
+        if (data.next_cursor) {
+          cursorsRef.current.next[endRow] = data.next_cursor;
+        }
+        // last_row is only known once the end was reached (-1 = keep scrolling)
+        const lastRow = data.last_row ?? (data.next_cursor ? -1 : startRow + data.results.length);
+        params.successCallback(data.results, lastRow);
+      } catch (err) {
+        console.error('Failed to fetch accounts:', err);
+        params.failCallback();
+      }
+    },
+  }), []);
+
+  // kanban: one bounded page per status column
+  const fetchKanbanAccounts = () => {
+    const params = { page_size: KANBAN_COLUMN_SIZE, ...serverFilterRef.current };
+    Promise.all(ACCOUNT_STATUSES.map(status =>
+      axiosInstance.get('/api/crm/accounts/', { params: { ...params, status } })
+    ))
+      .then((responses) => setAccounts(responses.flatMap(res => res.data.results)))
       .catch((err) => console.error('Failed to fetch accounts:', err));
   };
 
+  const fetchAccounts = () => {
+    if (viewMode === 'kanban') {
+      fetchKanbanAccounts();
+      return;
+    }
+    cursorsRef.current = { key: null, next: {} };
+    gridRef.current?.api?.refreshInfiniteCache();
+  };
+
   useEffect(() => {
-    fetchAccounts();
+    axiosInstance.get('api/user/')
+      .then((response) => setUsers(response.data))
+      .catch((error) => console.error('Error fetching users:', error));
+    return () => clearTimeout(quickFilterTimer.current);
   }, []);
 
   useEffect(() => {
-    if (accounts.length > 0) {
-      const users = [...new Set(accounts.map(acc => acc.assigned_to_name).filter(Boolean))];
-      setUniqueUsers(users);
+    if (viewMode === 'kanban') {
+      fetchKanbanAccounts();
     }
-  }, [accounts]);
+  }, [viewMode, activeUser]);
 
-  const externalFilterChanged = (user) => {
-    setActiveUser(user);
-    gridRef.current.api.onFilterChanged();
-  };
-
-  const isExternalFilterPresent = () => {
-    return activeUser !== "All";
-  };
-  const doesExternalFilterPass = (node) => {
-    if (activeUser === "All") return true;
-    return node.data.assigned_to_name === activeUser;
-  };
+  // a mounted grid reloads from the first block when the user / status filter changes
+  const filtersApplied = useRef(false);
+  useEffect(() => {
+    if (filtersApplied.current) {
+      gridRef.current?.api?.purgeInfiniteCache();
+    }
+    filtersApplied.current = true;
+  }, [activeUser, statusFilter]);
 
   const fetchFullAccount = async (accountId) => {
     try {
@@ -73,8 +134,8 @@ const CRMAccounts = () => {
       .then(() => {
         showToast?.({ type: 'success', title: 'Account Deleted' });
         setSelectedAccount(null);
-        fetchAccounts(); // Refresh the accounts list
         setAccounts((prev) => prev.filter(acc => acc.id !== id));
+        fetchAccounts(); // Refresh the accounts list
       })
       .catch((err) => {
         console.error('Delete error:', err);
@@ -133,9 +194,12 @@ const CRMAccounts = () => {
       field: 'company_details.name',
       headerName: 'Company',
       flex: 1,
-      valueGetter: p => p.data.company_details?.name || ''
+      valueGetter: p => p.data?.company_details?.name || '',
+      // related columns are not filtered / sorted by the server
+      filter: false,
+      sortable: false,
     },
-    { field: 'assigned_to_name', headerName: 'Assigned To', flex: 1 },
+    { field: 'assigned_to_name', headerName: 'Assigned To', flex: 1, filter: false, sortable: false },
     { field: 'status', headerName: 'Status', flex: 0.6 },
     {
       field: 'created_at',
@@ -151,13 +215,36 @@ const CRMAccounts = () => {
     },
   ];
 
+  // the server searches all accounts; wait for the user to stop typing
   const onFilterTextBoxChanged = useCallback(() => {
-    gridRef.current.api.setGridOption(
-      "quickFilterText",
-      document.getElementById("filter-text-box").value,
-    );
+    const value = document.getElementById("filter-text-box").value;
+    clearTimeout(quickFilterTimer.current);
+    quickFilterTimer.current = setTimeout(() => {
+      quickFilterRef.current = value.trim();
+      gridRef.current?.api?.purgeInfiniteCache();
+    }, 300);
   }, []);
 
+  const userFilterButtons = (
+    <div className="btn-group dotzhub-btn-group">
+      <Button
+        className={activeUser === "All" ? "active" : ""}
+        onClick={() => setActiveUser("All")}
+      >
+        All
+      </Button>
+      {users.map(user => (
+        <Button
+          key={user.id}
+          className={activeUser === user.id ? "active" : ""}
+          onClick={() => setActiveUser(user.id)}
+        >
+          {`${user.first_name || ''} ${user.last_name || ''}`.trim() || user.email}
+        </Button>
+      ))}
+    </div>
+  );
+
   return (
     <div className='module-container'>
       <div className="d-flex justify-content-between align-items-center">
@@ -197,24 +284,19 @@ const CRMAccounts = () => {
               onInput={onFilterTextBoxChanged}
               style={{ width: "200px" }}
             />
-
-            <div className="btn-group dotzhub-btn-group">
-              <Button
-                className={activeUser === "All" ? "active" : ""}
-                onClick={() => externalFilterChanged("All")}
-              >
-                All
-              </Button>
-              {uniqueUsers.map(user => (
-                <Button
-                  key={user}
-                  className={activeUser === user ? "active" : ""}
-                  onClick={() => externalFilterChanged(user)}
-                >
-                  {user}
-                </Button>
+            <select
+              className="form-select me-3"
+              value={statusFilter}
+              onChange={(e) => setStatusFilter(e.target.value)}
+              style={{ width: "160px" }}
+            >
+              <option value="">All statuses</option>
+              {ACCOUNT_STATUSES.map(status => (
+                <option key={status} value={status}>{status.charAt(0).toUpperCase() + status.slice(1)}</option>
               ))}
-            </div>
+            </select>
+
+            {userFilterButtons}
           </div>
 
 
@@ -224,11 +306,13 @@ const CRMAccounts = () => {
                 <AgGridReact
                   ref={gridRef}
                   columnDefs={colDefs}
-                  rowData={accounts}
+                  rowModelType="infinite"
+                  datasource={accountsDatasource}
+                  cacheBlockSize={ACCOUNTS_BLOCK_SIZE}
+                  maxBlocksInCache={20}
+                  getRowId={(params) => String(params.data.id)}
                   theme={myTheme}
                   defaultColDef={{ filter: true, flex: 1 }}
-                  isExternalFilterPresent={isExternalFilterPresent}
-                  doesExternalFilterPass={doesExternalFilterPass}
                   pagination={true}
                   paginationPageSize={20}
                   overlayNoRowsTemplate={`
@@ -246,7 +330,10 @@ const CRMAccounts = () => {
           </div>
         </>
       ) : (
-        <KanbanBoard accounts={accounts} onStatusChange={handleStatusChange} onDeleteAccount={handleDeleteAccount} onViewAccount={handleViewAccount} />
+        <>
+          <div className="mb-3">{userFilterButtons}</div>
+          <KanbanBoard accounts={accounts} onStatusChange={handleStatusChange} onDeleteAccount={handleDeleteAccount} onViewAccount={handleViewAccount} />
+        </>
       )}
       <AddCRMAccountModal id="addCRMAccountModal" onSuccess={fetchAccounts} />
       <CRMOffcanvas
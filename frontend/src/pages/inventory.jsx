@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback, useRef } from 'react';
+import React, { useState, useEffect, useCallback, useMemo, useRef } from 'react';
 import axiosInstance from '../AxiosInstance';
 import AddInventoryModal from '../components/inventory/AddInventoryModal';
 import UploadBulkModal from '../components/inventory/UploadBulkModal';
@@ -13,15 +13,23 @@ import ActionCellRenderer from '../components/ActionCellRenderer';
 
 ModuleRegistry.registerModules([AllCommunityModule]);
 
+// the inventory grid loads rows from the server in blocks of this size (infinite row model)
+const INVENTORY_BLOCK_SIZE = 100;
+
 const Inventory = () => {
-    const [inventory, setInventory] = useState([]);
-    const [inventoryData, setInventoryData] = useState(null);
+    const [inventory, setInventory] = useState([]); // archive rows (the archive grid is client-side)
     const [archiveData, setArchiveData] = useState(null);
+    const [inventoryCount, setInventoryCount] = useState(0);
     const [selectedItem, setSelectedItem] = useState(null);
     const [selectedRows, setSelectedRows] = useState([]);
     const [showArchive, setShowArchive] = useState(false); // false = inventory, true = archive
     const [downloadScope, setDownloadScope] = useState("all"); // "all" | "suppliers" | "selected"
     const gridRef = useRef();
+    const quickFilterRef = useRef('');
+    const quickFilterTimer = useRef(null);
+    // next_cursor of each loaded block, keyed by the startRow of the block that follows it;
+    // scrolling on seeks from the previous block instead of using an OFFSET
+    const cursorsRef = useRef({ key: null, next: {} });
     const myTheme = themeQuartz
         .withParams({
             browserColorScheme: "light",
@@ -53,16 +61,13 @@ const Inventory = () => {
             const res = await axiosInstance.delete(url, { data });
             console.log(res.data);
 
-            setInventory(prevInventory =>
-                isMultiple
-                    ? prevInventory.filter(item => !ids.includes(item.id))
-                    : prevInventory.filter(item => item.id !== ids)
-            );
-
             if (showArchive) {
+                setInventory(prevInventory =>
+                    isMultiple
+                        ? prevInventory.filter(item => !ids.includes(item.id))
+                        : prevInventory.filter(item => item.id !== ids)
+                );
                 setArchiveData(null);
-            } else {
-                setInventoryData(null);
             }
             fetchInventory(true);   // force fetch
             setSelectedRows([]);
@@ -87,10 +92,7 @@ const Inventory = () => {
             const res = await axiosInstance.post('api/archive/archive/', { ids });
             console.log(res.data);
 
-            setInventory(prevInventory =>
-                prevInventory.filter(item => !ids.includes(item.id))
-            );
-            setInventoryData(null);
+            setArchiveData(null);
             fetchInventory(true);
             setSelectedRows([]);
         }
@@ -126,7 +128,6 @@ const Inventory = () => {
                 setInventory(prevInventory => prevInventory.filter(item => !ids.includes(item.id)));
                 setSelectedRows([]);
                 setArchiveData(null);
-                setInventoryData(null);
                 fetchInventory(true);
             } catch (error) {
                 console.error("Restore failed", error);
@@ -191,43 +192,71 @@ const Inventory = () => {
             domLayout: 'normal',
         },
         enableCellTextSelection: true,
-        rowSelection: {
-            mode: 'multiRow',
-            selectAll: 'filtered',
-        },
+        // the inventory grid only holds the loaded blocks, so there is no "select all"
+        rowSelection: showArchive
+            ? { mode: 'multiRow', selectAll: 'filtered' }
+            : { mode: 'multiRow', headerCheckbox: false },
+        getRowId: (params) => String(params.data.id),
         onSelectionChanged,
     };
 
+    // inventory rows come from the server block by block: filters, sort and the
+    // quick filter are applied by the API (KeysetPagination + GridFilterBackend)
+    const inventoryDatasource = useMemo(() => ({
+        getRows: async (params) => {
+            const { startRow, endRow, sortModel, filterModel } = params;
+            const query = {
+                sortModel: JSON.stringify(sortModel || []),
+                filterModel: JSON.stringify(filterModel || {}),
+                quickFilter: quickFilterRef.current,
+            };
+            const key = JSON.stringify(query);
+            if (cursorsRef.current.key !== key) {
+                cursorsRef.current = { key, next: {} };
+            }
+            const cursor = cursorsRef.current.next[startRow];
+            const page = cursor ? { cursor, page_size: endRow - startRow } : { startRow, endRow };
+            try {
+                const { data } = await axiosInstance.get('api/inventory/', { params: { ...query, ...page } });
+                if (data.next_cursor) {
+                    cursorsRef.current.next[endRow] = data.next_cursor;
+                }
+                setInventoryCount(data.count);
+                // last_row is only known once the end was reached (-1 = keep scrolling)
+                const lastRow = data.last_row ?? (data.next_cursor ? -1 : startRow + data.results.length);
+                params.successCallback(data.results, lastRow);
+            } catch (error) {
+                console.error('Error fetching inventory: ' + error);
+                params.failCallback();
+            }
+        },
+    }), []);
 
-    // fetch inventory from the backend
+    // reload inventory (server blocks) or the archive list
     const fetchInventory = useCallback((forceRefresh = false) => {
-        if (!forceRefresh) {
-            if (showArchive && archiveData) {
-                console.log("using cached archive data");
-                setInventory(archiveData);
-                return;
-            } else if (!showArchive && inventoryData) {
-                console.log("using cached inventory data");
-                setInventory(inventoryData);
-                return;
+        if (!showArchive) {
+            if (forceRefresh) {
+                cursorsRef.current = { key: null, next: {} };
+                gridRef.current?.api?.refreshInfiniteCache();
             }
+            return;
+        }
+        if (!forceRefresh && archiveData) {
+            console.log("using cached archive data");
+            setInventory(archiveData);
+            return;
         }
         console.log("fetching from backend");
         gridRef.current?.api?.showLoadingOverlay();
-        const endpoint = showArchive ? 'api/archive/' : 'api/inventory/';
-        axiosInstance.get(endpoint)
+        axiosInstance.get('api/archive/')
             .then((response) => {
                 setInventory(response.data);
-                if (showArchive) {
-                    setArchiveData(response.data);
-                } else {
-                    setInventoryData(response.data);
-                }
+                setArchiveData(response.data);
             })
             .catch((error) => console.error('Error fetching inventory: ' + error))
             .finally(() => gridRef.current?.api?.hideOverlay());
 
-    }, [showArchive, inventoryData, archiveData]);
+    }, [showArchive, archiveData]);
 
     useEffect(() => {
         fetchInventory();
@@ -235,35 +264,43 @@ const Inventory = () => {
 
     //update inventory state after adding or editing an inventory
     const handleUpdateInventory = (updatedInventoryItem, mode) => {
-        if (mode === 'create') {
-            setInventory(prev => [...prev, updatedInventoryItem]);
-            if (showArchive) {
-                setArchiveData(prev => [...(prev || []), updatedInventoryItem]);
+        if (!showArchive) {
+            const node = mode === 'edit' && gridRef.current?.api?.getRowNode(String(updatedInventoryItem.id));
+            if (node) {
+                node.setData(updatedInventoryItem);
             } else {
-                setInventoryData(prev => [...(prev || []), updatedInventoryItem]);
+                fetchInventory(true);
             }
+            return;
+        }
+        if (mode === 'create') {
+            setInventory(prev => [...prev, updatedInventoryItem]);
+            setArchiveData(prev => [...(prev || []), updatedInventoryItem]);
         } else if (mode === 'edit') {
             setInventory(prev =>
                 prev.map(item => item.id === updatedInventoryItem.id ? updatedInventoryItem : item)
             );
-            if (showArchive) {
-                setArchiveData(prev =>
-                    prev.map(item => item.id === updatedInventoryItem.id ? updatedInventoryItem : item)
-                );
-            } else {
-                setInventoryData(prev =>
-                    prev.map(item => item.id === updatedInventoryItem.id ? updatedInventoryItem : item)
-                );
-            }
+            setArchiveData(prev =>
+                prev.map(item => item.id === updatedInventoryItem.id ? updatedInventoryItem : item)
+            );
         }
     };
 
     const onFilterTextBoxChanged = useCallback(() => {
-        gridRef.current.api.setGridOption(
-            "quickFilterText",
-            document.getElementById("filter-text-box").value,
-        );
-    }, []);
+        const value = document.getElementById("filter-text-box").value;
+        if (showArchive) {
+            gridRef.current.api.setGridOption("quickFilterText", value);
+            return;
+        }
+        // the server searches the whole inventory; wait for the user to stop typing
+        clearTimeout(quickFilterTimer.current);
+        quickFilterTimer.current = setTimeout(() => {
+            quickFilterRef.current = value.trim();
+            gridRef.current?.api?.purgeInfiniteCache();
+        }, 300);
+    }, [showArchive]);
+
+    useEffect(() => () => clearTimeout(quickFilterTimer.current), []);
 
 
     return (
@@ -354,7 +391,7 @@ const Inventory = () => {
 
                     {selectedRows.length > 0 && (
                         <div className="d-flex align-items-center ms-auto">
-                            <span className="me-2 text-muted small">{selectedRows.length} of {inventory.length} selected</span>
+                            <span className="me-2 text-muted small">{selectedRows.length} of {showArchive ? inventory.length : inventoryCount} selected</span>
                             <button className="btn btn-outline-danger btn-sm me-2" onClick={handleDeleteSelected}>
                                 <i className="bi bi-trash"></i> Delete
                             </button>
@@ -379,10 +416,18 @@ const Inventory = () => {
                 <div className="card-body p-2">
                     <div className="ag-theme-quartz" style={{ height: 650, width: '100%' }}>
                         <AgGridReact
+                            key={showArchive ? 'archive' : 'inventory'}
                             ref={gridRef}
                             columnDefs={colDefs}
                             gridOptions={gridOptions}
-                            rowData={inventory}
+                            {...(showArchive
+                                ? { rowData: inventory }
+                                : {
+                                    rowModelType: 'infinite',
+                                    datasource: inventoryDatasource,
+                                    cacheBlockSize: INVENTORY_BLOCK_SIZE,
+                                    maxBlocksInCache: 20,
+                                })}
                             theme={myTheme}
                             defaultColDef={{ flex: 1, filter: true }}
                             pagination={true}
@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback, useRef } from 'react';
+import React, { useState, useEffect, useCallback, useMemo, useRef } from 'react';
 import axiosInstance from '../AxiosInstance';
 import AddRfqModal from '../components/rfqs/AddRfqModal';
 import UploadBulkModal from '../components/rfqs/UploadBulkModal';
@@ -15,13 +15,34 @@ import { showToast } from '../components/common/toast';
 
 ModuleRegistry.registerModules([AllCommunityModule]);
 
+// the grid loads RFQs from the server in blocks of this size (infinite row model)
+const RFQ_BLOCK_SIZE = 100;
+
+// status filter options -> the ?status= values sent to api/rfqs/ (comma separated)
+const RFQ_STATUS_FILTERS = [
+    { label: "All statuses", value: "" },
+    { label: "Pending", value: "pending,Pending" },
+    { label: "Quote Sent", value: "Quote Sent" },
+    { label: "Reminder Sent", value: "Reminder Sent" },
+    { label: "Closed", value: "Closed" },
+    { label: "No Stock", value: "No Stock" },
+    { label: "Rejected", value: "Rejected" },
+    { label: "Unattractive", value: "Unattractive" },
+];
+
 const Rfqs = () => {
-    const [rfqs, setRfqs] = useState([]);
+    const [rfqCount, setRfqCount] = useState(0);
+    const [statusFilter, setStatusFilter] = useState("");
     const [selectedRfq, setSelectedRfq] = useState(null);
     const [selectedRows, setSelectedRows] = useState([]);
     const [autoFillData, setAutoFillData] = useState(null);
     const [colDefs, setColDefs] = useState([]);
     const gridRef = useRef();
+    const statusFilterRef = useRef("");
+    const quickFilterRef = useRef("");
+    const quickFilterTimer = useRef(null);
+    // next_cursor of each loaded block, keyed by the startRow of the block that follows it
+    const cursorsRef = useRef({ key: null, next: {} });
     const myTheme = themeQuartz
 	.withParams({
         browserColorScheme: "light",
@@ -29,6 +50,13 @@ const Rfqs = () => {
         headerTextColor:"#ffffff",
     });
 
+    // grid rows are slim list rows: the drawer / modals get the full RFQ
+    const openRfq = (rfqId) => {
+        axiosInstance.get(`api/rfqs/${rfqId}/`)
+            .then((response) => setSelectedRfq(response.data))
+            .catch((error) => console.error('Error fetching rfq: ' + error));
+    };
+
     const mobileColDefs = [
   {
     field: "mpn",
@@ -38,7 +66,7 @@ const Rfqs = () => {
             href="#offcanvasRight"
             data-bs-toggle="offcanvas"
             className="link-opacity-50-hover fw-medium"
-            onClick={() => { setSelectedRfq(params.data) }}
+            onClick={() => openRfq(params.data.id)}
         >
             {params.value}
         </a>
@@ -66,7 +94,6 @@ const Rfqs = () => {
 
         try {
             await axiosInstance.delete(url, { data });
-            setRfqs((prevRfqs) => prevRfqs.filter((rfq) => isMultiple ? !ids.includes(rfq.id) : rfq.id !== ids));
             setSelectedRfq(null);
             fetchRfqs();
             setSelectedRows([]);
@@ -103,7 +130,7 @@ const Rfqs = () => {
                 field: "id",
                 headerName: "ID",
                 width: 80,
-                valueFormatter: (params) => '#'+ params.value.toString().padStart(5, '0'),
+                valueFormatter: (params) => params.value != null ? '#'+ params.value.toString().padStart(5, '0') : '', // blank while the block loads
                 filter: false
             },
             {
@@ -114,7 +141,7 @@ const Rfqs = () => {
                         href="#offcanvasRight"
                         data-bs-toggle="offcanvas"
                         className="link-opacity-50-hover fw-medium"
-                        onClick={() => { setSelectedRfq(params.data) }}
+                        onClick={() => openRfq(params.data.id)}
                     >
                         {params.value}
                     </a>
@@ -126,8 +153,9 @@ const Rfqs = () => {
             { field: "manufacturer", headerName: "MFG", flex: 0.7 },
             { field: "stock_source", headerName: "Stock Source", flex: 1 },
             { field: "source", headerName: "RFQ Source", flex: 1 },
-            { field: "contact_object.company_object.name", headerName: "Company", flex: 1 },
-            { field: "contact_object.company_object.country", headerName: "Country", flex: 1 },
+            // related columns are not filtered / sorted by the server
+            { field: "contact_object.company_object.name", headerName: "Company", flex: 1, filter: false, sortable: false },
+            { field: "contact_object.company_object.country", headerName: "Country", flex: 1, filter: false, sortable: false },
             { field: "created_at", headerName: "Created At", valueFormatter: (params) => params.value ? new Date(params.value).toLocaleString() : '', sort: 'desc', hide: true },
             { field: "updated_at", headerName: "Updated At",flex: 1, valueFormatter: (params) => params.value ? new Date(params.value).toLocaleString() : '' },
             {
@@ -192,20 +220,59 @@ const Rfqs = () => {
             domLayout: 'normal',
         },
         enableCellTextSelection: true,
+        // only the loaded blocks are in the grid, so there is no "select all"
         rowSelection: {
             mode: 'multiRow',
-            selectAll: 'filtered',
+            headerCheckbox: false,
         },
+        getRowId: (params) => String(params.data.id),
         onSelectionChanged,
     };
 
-    // fetch rfqs from the backend function
+    // RFQs come from the server block by block: status, column filters, sort and
+    // the quick filter are applied by the API (KeysetPagination + GridFilterBackend)
+    const rfqDatasource = useMemo(() => ({
+        getRows: async (params) => {
+            const { startRow, endRow, sortModel, filterModel } = params;
+            const query = {
+                sortModel: JSON.stringify(sortModel || []),
+                filterModel: JSON.stringify(filterModel || {}),
+                quickFilter: quickFilterRef.current,
+                ...(statusFilterRef.current && { status: statusFilterRef.current }),
+            };
+            const key = JSON.stringify(query);
+            if (cursorsRef.current.key !== key) {
+                cursorsRef.current = { key, next: {} };
+            }
+            const cursor = cursorsRef.current.next[startRow];
+            const page = cursor ? { cursor, page_size: endRow - startRow } : { startRow, endRow };
+            try {
+                const { data } = await axiosInstance.get('api/rfqs/', { params: { ...query, ...page } });
+                if (data.next_cursor) {
+                    cursorsRef.current.next[endRow] = data.next_cursor;
+                }
+                setRfqCount(data.count);
+                // last_row is only known once the end was reached (-1 = keep scrolling)
+                const lastRow = data.last_row ?? (data.next_cursor ? -1 : startRow + data.results.length);
+                params.successCallback(data.results, lastRow);
+            } catch (error) {
+                console.error('Error fetching rfqs: ' + error);
+                params.failCallback();
+            }
+        },
+    }), []);
+
+    // reload the loaded blocks from the backend
     const fetchRfqs = () => {
-        axiosInstance.get('api/rfqs/')
-            .then((response) => {
-                setRfqs(response.data);
-            })
-            .catch((error) => console.error('Error fetching rfqs: ' + error));
+        cursorsRef.current = { key: null, next: {} };
+        gridRef.current?.api?.refreshInfiniteCache();
+    };
+
+    const onStatusFilterChanged = (event) => {
+        setStatusFilter(event.target.value);
+        statusFilterRef.current = event.target.value;
+        setSelectedRows([]);
+        gridRef.current?.api?.purgeInfiniteCache();
     };
 
     const handleMarkUnattractive = () => {
@@ -234,16 +301,16 @@ const Rfqs = () => {
 
 
     useEffect(() => {
-        fetchRfqs();
-        // WebSocket connection
-        const ws = new WebSocket(CONFIG.WS_BASE_URL);
+        // WebSocket connection (authenticated with the same token as the REST API)
+        const token = localStorage.getItem('access_token');
+        const ws = new WebSocket(`${CONFIG.WS_BASE_URL}?token=${encodeURIComponent(token || '')}`);
         ws.onopen = () => {
             console.log('Websocket connected');
         };
         ws.onmessage = (event) => {
             const data = JSON.parse(event.data);
             console.log("New data received via websocket: ", data);
-            fetchRfqs(); // fetch rfqs after receiving new data
+            fetchRfqs(); // reload the loaded blocks after receiving new data
         };
 
         ws.onclose = () => {
@@ -257,6 +324,7 @@ const Rfqs = () => {
         emailModal.addEventListener('hidden.bs.modal', handleModalClose);
 
         return () => {
+            clearTimeout(quickFilterTimer.current);
             ws.close();
             emailModal.removeEventListener('hidden.bs.modal', handleModalClose);
         };
@@ -267,22 +335,23 @@ const Rfqs = () => {
     //update rfqs state after adding or editing an rfq
     const handleUpdateRfqs = (updatedRfq, mode) => { 
         if (mode === 'create') {
-            setRfqs((prevRfqs) => [...prevRfqs, updatedRfq]);
+            fetchRfqs();
         } else if (mode === 'edit') {
-            setRfqs((prevRfqs) =>
-                prevRfqs.map((rfq) => (rfq.id === updatedRfq.id ? updatedRfq : rfq))
-            );
+            gridRef.current?.api?.getRowNode(String(updatedRfq.id))?.setData(updatedRfq);
             if (selectedRfq && selectedRfq.id === updatedRfq.id) {
                 setSelectedRfq(updatedRfq);
             }
         }
     };
 
+    // the server searches all RFQs; wait for the user to stop typing
     const onFilterTextBoxChanged = useCallback(() => {
-        gridRef.current.api.setGridOption(
-          "quickFilterText",
-          document.getElementById("filter-text-box").value,
-        );
+        const value = document.getElementById("filter-text-box").value;
+        clearTimeout(quickFilterTimer.current);
+        quickFilterTimer.current = setTimeout(() => {
+            quickFilterRef.current = value.trim();
+            gridRef.current?.api?.purgeInfiniteCache();
+        }, 300);
       }, []);
 
     return (
@@ -310,8 +379,20 @@ const Rfqs = () => {
                         onInput={onFilterTextBoxChanged}
                         style={{ width: '200px' }}
                     />
+                    <select
+                        className="form-select ms-2 me-auto"
+                        value={statusFilter}
+                        onChange={onStatusFilterChanged}
+                        style={{ width: '180px' }}
+                    >
+                        {RFQ_STATUS_FILTERS.map(({ label, value }) => (
+                            <option key={label} value={value}>{label}</option>
+                        ))}
+                    </select>
 
                     {selectedRows.length > 0 && (
+                        <div className="d-flex align-items-center">
+                        <span className="me-2 text-muted small">{selectedRows.length} of {rfqCount} selected</span>
                         <div className="btn-group">
                             <button type="button" className="btn btn-sm btn-danger dropdown-toggle" data-bs-toggle="dropdown" aria-expanded="false">
                             Bulk Actions
@@ -327,6 +408,7 @@ const Rfqs = () => {
                                 <li><button className="dropdown-item text-danger" type="button" onClick={handleDeleteSelected}> <i className="bi bi-trash"></i> Delete</button></li>
                             </ul>
                         </div>
+                        </div>
                     )}
                 </div>
             </div>
@@ -337,7 +419,10 @@ const Rfqs = () => {
                         ref={gridRef}
                         columnDefs={colDefs}
                         gridOptions={gridOptions}
-                        rowData={rfqs}
+                        rowModelType="infinite"
+                        datasource={rfqDatasource}
+                        cacheBlockSize={RFQ_BLOCK_SIZE}
+                        maxBlocksInCache={20}
                         theme={myTheme}
                         defaultColDef={{filter: true}}
                         pagination={true}